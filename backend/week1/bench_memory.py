@@ -0,0 +1,49 @@
+"""
+유저당 메모리 사용량 측정 - 저장소 백엔드별로 N명을 만들고 늘어난 RSS를 유저 수로 나눈다
+
+실행 (백엔드마다 따로 실행해야 서로의 메모리가 섞이지 않는다):
+uv run python bench_memory.py --backend dict --users 1000000
+uv run python bench_memory.py --backend compact --users 1000000
+"""
+
+import argparse
+import gc
+import resource
+import time
+
+from store import STORE_BACKENDS
+
+
+def max_rss_bytes() -> int:
+    # Linux는 KB 단위 (macOS는 바이트 단위)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def main(backend: str, users: int) -> None:
+    store = STORE_BACKENDS[backend]()
+    gc.collect()
+    before = max_rss_bytes()
+
+    started = time.perf_counter()
+    for i in range(users):
+        # 이름은 5,000종류만 반복 (동명이인이 많다고 가정)
+        # 요청마다 JSON에서 새 문자열이 만들어지는 상황을 흉내내 매번 새 객체로 만든다
+        store.create(f"유저{i % 5000}", f"user{i}@example.com")
+    elapsed = time.perf_counter() - started
+
+    gc.collect()
+    used = max_rss_bytes() - before
+    print(
+        f"[Bench] backend={backend} users={len(store):,} "
+        f"RSS 증가={used / 1024 / 1024:,.0f}MB 유저당={used / users:.0f}B "
+        f"(생성 {elapsed:.1f}초)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="week1 저장소 유저당 메모리 측정")
+    parser.add_argument("--backend", choices=sorted(STORE_BACKENDS), default="dict", help="저장소 백엔드 (기본값: dict)")
+    parser.add_argument("--users", type=int, default=1_000_000, help="생성할 유저 수 (기본값: 1,000,000)")
+
+    args = parser.parse_args()
+    main(args.backend, args.users)
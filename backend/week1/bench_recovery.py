@@ -0,0 +1,67 @@
+"""
+복구 시간 벤치마크 - 스냅샷 N명 + 로그 M줄을 만들고 recover()에 걸리는 시간 측정
+
+실행:
+uv run python bench_recovery.py --users 1000000 --log-records 100000
+uv run python bench_recovery.py --users 1000000 --log-records 100000 --backend compact
+"""
+
+import argparse
+import json
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from persistence import UserPersistence, _segment_path, write_snapshot
+from store import STORE_BACKENDS
+
+
+def build_data_dir(data_dir: Path, users: int, log_records: int) -> None:
+    """스냅샷(segment=1 이전 상태) + wal-00000001.log(이후 변경)를 직접 생성"""
+    ids = list(range(1, users + 1))
+    write_snapshot(
+        data_dir / "snapshot.bin",
+        next_id=users + 1,
+        segment=1,
+        columns=(ids, [f"유저{i % 5000}" for i in ids], [f"user{i}@example.com" for i in ids]),
+    )
+    del ids
+
+    with open(_segment_path(data_dir, 1), "w", encoding="utf-8") as f:
+        for n in range(log_records):
+            user_id = users + 1 + n
+            f.write(json.dumps(["put", user_id, f"신규{n}", f"new{n}@example.com"], ensure_ascii=False))
+            f.write("\n")
+
+
+def main(users: int, log_records: int, backend: str) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+
+        started = time.perf_counter()
+        build_data_dir(data_dir, users, log_records)
+        print(f"[Bench] 데이터 생성: {time.perf_counter() - started:.2f}초")
+
+        snapshot_mb = (data_dir / "snapshot.bin").stat().st_size / 1024 / 1024
+        log_mb = _segment_path(data_dir, 1).stat().st_size / 1024 / 1024
+        print(f"[Bench] 스냅샷 {snapshot_mb:.1f}MB, 로그 {log_mb:.1f}MB")
+
+        persistence = UserPersistence(data_dir, store_class=STORE_BACKENDS[backend])
+        started = time.perf_counter()
+        store = persistence.recover()
+        elapsed = time.perf_counter() - started
+        persistence.close()
+
+        max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"[Bench] backend={backend} 복구 완료: 유저 {len(store):,}명, {elapsed:.2f}초 (최대 RSS {max_rss_mb:,.0f}MB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="week1 저장소 복구 시간 벤치마크")
+    parser.add_argument("--users", type=int, default=1_000_000, help="스냅샷에 담을 유저 수 (기본값: 1,000,000)")
+    parser.add_argument("--backend", choices=sorted(STORE_BACKENDS), default="dict", help="저장소 백엔드 (기본값: dict)")
+    parser.add_argument("--log-records", type=int, default=100_000, help="스냅샷 이후 로그 줄 수 (기본값: 100,000)")
+
+    args = parser.parse_args()
+    main(args.users, args.log_records, args.backend)
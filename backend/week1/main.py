@@ -3,16 +3,43 @@
 - 백엔드가 뭔지 감 잡기
 - 첫 API 만들어보기
 - CRUD 맛보기 (DB 없이 dict로)
+
+환경 변수 WEEK1_DATA_DIR을 지정하면 변경 로그 + 스냅샷으로 재시작 후에도 데이터 유지
+환경 변수 WEEK1_STORE_BACKEND=compact로 메모리 절약형 저장소 사용 (기본값: dict)
 """
 
-from fastapi import FastAPI, HTTPException
+import json
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from persistence import UserPersistence
+from store import STORE_BACKENDS, DuplicateEmailError, UserStore
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    애플리케이션 생명주기 관리
+    시작 시: 주기적 스냅샷 스레드 시작
+    종료 시: 남은 로그 fsync 후 닫기
+    """
+    if persistence is not None:
+        persistence.start()
+    yield
+    if persistence is not None:
+        persistence.close()
+
+
 # FastAPI 앱 생성
 app = FastAPI(
     title="1주차 - FastAPI 기본",
     description="백엔드 첫 걸음",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 
@@ -38,13 +65,28 @@ def health_check():
 # ===========================================
 
 # 가짜 데이터베이스 (메모리에 저장, 서버 재시작하면 초기화됨)
-fake_db: dict[int, dict] = {
-    1: {"id": 1, "name": "김철수", "email": "kim@example.com"},
-    2: {"id": 2, "name": "이영희", "email": "lee@example.com"},
-}
+# 동기 핸들러는 스레드풀에서 동시에 실행되므로 전역 dict 대신
+# 스레드 안전한 저장소(store.py)를 사용한다
+DATA_DIR = os.getenv("WEEK1_DATA_DIR")
+STORE_CLASS = STORE_BACKENDS[os.getenv("WEEK1_STORE_BACKEND", "dict")]
+
+if DATA_DIR:
+    # 스냅샷 + 변경 로그에서 복구 (persistence.py)
+    persistence = UserPersistence(DATA_DIR, store_class=STORE_CLASS)
+    user_store = persistence.recover()
+else:
+    persistence = None
+    user_store = STORE_CLASS()
+
+# 처음 시작할 때만 예제 유저 생성 (복구된 데이터가 있으면 그대로 사용)
+if user_store.next_id == 1:
+    user_store.create("김철수", "kim@example.com")
+    user_store.create("이영희", "lee@example.com")
+
 
-# 다음에 생성할 유저의 ID
-next_id = 3
+def get_store() -> UserStore:
+    """FastAPI 의존성 주입용 함수 (테스트에서 새 저장소로 교체 가능)"""
+    return user_store
 
 
 # 요청 Body를 검증할 Pydantic 모델
@@ -62,68 +104,96 @@ class UserUpdate(BaseModel):
 # Create - POST /users
 # -------------------------------------------
 @app.post("/users", status_code=201)
-def create_user(user: UserCreate):
-    """새 유저 생성"""
-    global next_id
-
-    new_user = {
-        "id": next_id,
-        "name": user.name,
-        "email": user.email,
-    }
-    fake_db[next_id] = new_user
-    next_id += 1
-
-    return new_user
+def create_user(user: UserCreate, store: UserStore = Depends(get_store)):
+    """새 유저 생성 (이메일 중복 불가)"""
+    try:
+        return store.create(user.name, user.email)
+    except DuplicateEmailError:
+        raise HTTPException(status_code=400, detail="이미 존재하는 이메일입니다")
 
 
 # -------------------------------------------
-# Read - GET /users, GET /users/{user_id}
+# Read - GET /users, GET /users/stream, GET /users/{user_id}, GET /users/by-email/{email}
 # -------------------------------------------
 @app.get("/users")
-def get_users():
-    """모든 유저 조회"""
-    return list(fake_db.values())
+def get_users(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: int = Query(0, ge=0),
+    store: UserStore = Depends(get_store),
+):
+    """
+    유저 목록 조회 (커서 페이지네이션, ID 순)
+
+    - **limit**: 한 번에 가져올 최대 개수 (기본 100, 최대 1000)
+    - **cursor**: 이 ID 다음부터 조회 (처음엔 0). 다음 커서는 X-Next-Cursor 헤더로 전달
+    """
+    users = store.list_page(after_id=cursor, limit=limit)
+    # 한 페이지를 꽉 채웠으면 다음 페이지가 있을 수 있다
+    if len(users) == limit:
+        response.headers["X-Next-Cursor"] = str(users[-1]["id"])
+    return users
+
+
+@app.get("/users/stream")
+def stream_users(store: UserStore = Depends(get_store)):
+    """
+    전체 유저를 NDJSON(한 줄에 JSON 하나)으로 스트리밍
+
+    목록 전체를 메모리에 만들지 않고 1000명씩 읽으면서 바로바로 내려보낸다.
+    (/users/{user_id}보다 먼저 선언해야 "stream"이 user_id로 해석되지 않는다)
+    """
+    lines = (json.dumps(user, ensure_ascii=False) + "\n" for user in store.iter_users())
+    return StreamingResponse(lines, media_type="application/x-ndjson")
 
 
 @app.get("/users/{user_id}")
-def get_user(user_id: int):
+def get_user(user_id: int, store: UserStore = Depends(get_store)):
     """특정 유저 조회 (Path Parameter 사용)"""
-    if user_id not in fake_db:
+    user = store.get(user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
+
+    return user
+
+
+@app.get("/users/by-email/{email}")
+def get_user_by_email(email: str, store: UserStore = Depends(get_store)):
+    """이메일로 유저 조회 (이메일 인덱스 사용 - 전체 순회 없음)"""
+    user = store.get_by_email(email)
+    if user is None:
         raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
 
-    return fake_db[user_id]
+    return user
 
 
 # -------------------------------------------
 # Update - PUT /users/{user_id}
 # -------------------------------------------
 @app.put("/users/{user_id}")
-def update_user(user_id: int, user: UserUpdate):
+def update_user(
+    user_id: int, user: UserUpdate, store: UserStore = Depends(get_store)
+):
     """유저 정보 수정"""
-    if user_id not in fake_db:
+    # 전달된 값만 업데이트 (조회 + 수정을 저장소가 한 번에 처리)
+    try:
+        updated_user = store.update(user_id, name=user.name, email=user.email)
+    except DuplicateEmailError:
+        raise HTTPException(status_code=400, detail="이미 존재하는 이메일입니다")
+    if updated_user is None:
         raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
 
-    # 기존 데이터 가져오기
-    existing_user = fake_db[user_id]
-
-    # 전달된 값만 업데이트
-    if user.name is not None:
-        existing_user["name"] = user.name
-    if user.email is not None:
-        existing_user["email"] = user.email
-
-    return existing_user
+    return updated_user
 
 
 # -------------------------------------------
 # Delete - DELETE /users/{user_id}
 # -------------------------------------------
 @app.delete("/users/{user_id}")
-def delete_user(user_id: int):
+def delete_user(user_id: int, store: UserStore = Depends(get_store)):
     """유저 삭제"""
-    if user_id not in fake_db:
+    deleted_user = store.delete(user_id)
+    if deleted_user is None:
         raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
 
-    deleted_user = fake_db.pop(user_id)
     return {"message": "삭제 완료", "deleted": deleted_user}
@@ -0,0 +1,314 @@
+"""
+유저 저장소 영속화 - 추가 전용 로그(WAL) + 스냅샷
+- 재시작하면 메모리가 날아가므로, 모든 변경을 파일 끝에 한 줄씩 덧붙인다
+- fsync는 변경마다 하지 않고 fsync_interval마다 모아서 한 번 (그룹 커밋)
+  → 쓰기 처리량은 유지, 대신 OS가 죽으면 마지막 fsync_interval 동안의 변경은 잃을 수 있다
+- 로그가 끝없이 길어지지 않도록 주기적으로 스냅샷(전체 상태)을 찍고 이전 로그를 지운다
+- 시작 시: 스냅샷 로드 → 스냅샷 이후 로그 재생
+
+파일 구조 (data_dir):
+    snapshot.bin        marshal 포맷 (header, ids, names, emails)
+    wal-00000001.log    한 줄 = 한 변경, JSON 배열
+                        ["put", id, name, email] / ["del", id]
+"""
+
+import gc
+import json
+import marshal
+import os
+import threading
+from pathlib import Path
+
+from store import UserStore
+
+SNAPSHOT_FILE = "snapshot.bin"
+SNAPSHOT_VERSION = 1
+
+
+def _segment_path(data_dir: Path, segment: int) -> Path:
+    return data_dir / f"wal-{segment:08d}.log"
+
+
+def _list_segments(data_dir: Path) -> list[int]:
+    return sorted(int(path.stem.split("-")[1]) for path in data_dir.glob("wal-*.log"))
+
+
+class AppendOnlyLog:
+    """
+    변경 기록용 추가 전용 로그
+
+    - append는 파일 버퍼에 한 줄 쓰고 끝 (디스크 대기 없음)
+    - 백그라운드 스레드가 fsync_interval마다, 또는 batch_size개가 쌓이면
+      flush + fsync를 한 번에 처리
+    - rotate()로 새 세그먼트 파일로 넘어간다 (스냅샷 기준점)
+
+    락 두 개:
+    - _lock: 버퍼 쓰기용. append는 이것만 잡는다
+    - _sync_lock: fsync 중에 파일이 닫히지 않도록 sync/rotate/close끼리만 막는다
+    → fsync(수 ms)가 도는 동안에도 append는 기다리지 않고 다음 배치를 쌓는다
+    """
+
+    def __init__(
+        self,
+        data_dir: Path,
+        segment: int,
+        fsync_interval: float = 0.05,
+        batch_size: int = 1000,
+    ) -> None:
+        self.data_dir = data_dir
+        self.segment = segment
+        self.fsync_interval = fsync_interval
+        self.batch_size = batch_size
+        self.records_in_segment = 0
+
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._file = open(_segment_path(data_dir, segment), "a", encoding="utf-8")
+        self._pending = 0
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
+        self._sync_thread.start()
+
+    # -------------------------------------------
+    # 저장소가 호출하는 기록 함수
+    # -------------------------------------------
+    def log_put(self, user: dict) -> None:
+        self._append(["put", user["id"], user["name"], user["email"]])
+
+    def log_delete(self, user_id: int) -> None:
+        self._append(["del", user_id])
+
+    def _append(self, record: list) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._pending += 1
+            self.records_in_segment += 1
+            if self._pending >= self.batch_size:
+                self._wake.set()
+
+    # -------------------------------------------
+    # 그룹 커밋
+    # -------------------------------------------
+    def sync(self) -> None:
+        """버퍼를 비우고 fsync (쌓인 변경을 한 번에 디스크로)"""
+        with self._sync_lock:
+            # 파이썬 버퍼 → OS 페이지 캐시 복사만 append 락 안에서 (메모리 복사라 짧다)
+            with self._lock:
+                if self._pending == 0:
+                    return
+                self._file.flush()
+                self._pending = 0
+                fd = self._file.fileno()
+            # 디스크 대기는 락 밖에서. 그동안 들어온 append는 다음 sync가 처리
+            os.fsync(fd)
+
+    def _sync_loop(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.fsync_interval)
+            self._wake.clear()
+            self.sync()
+
+    def rotate(self) -> int:
+        """
+        현재 세그먼트를 닫고 새 세그먼트로 전환
+
+        Returns:
+            새 세그먼트 번호 (이 번호부터의 로그만 재생하면 됨)
+        """
+        with self._sync_lock, self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._pending = 0
+
+            self.segment += 1
+            self.records_in_segment = 0
+            self._file = open(_segment_path(self.data_dir, self.segment), "a", encoding="utf-8")
+            return self.segment
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+        self._sync_thread.join()
+        self.sync()
+        with self._sync_lock, self._lock:
+            self._file.close()
+
+
+def replay_segment(path: Path, changes: dict[int, tuple[str, str] | None]) -> int:
+    """
+    로그 세그먼트 하나를 읽어 ID별 최종 상태를 changes에 모은다 (삭제는 None)
+
+    put/del 모두 "그 ID의 최종 상태"를 기록하므로 같은 로그를 두 번 적용해도 결과가 같다.
+    마지막 줄이 쓰다 만 상태(프로세스 강제 종료)면 거기서 멈춘다.
+
+    Returns:
+        로그에 등장한 가장 큰 ID (삭제된 ID도 포함 → 재시작 후 ID 재사용 방지)
+    """
+    max_id = 0
+    loads = json.loads
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = loads(line)
+            except json.JSONDecodeError:
+                break
+            user_id = record[1]
+            changes[user_id] = (record[2], record[3]) if record[0] == "put" else None
+            if user_id > max_id:
+                max_id = user_id
+    return max_id
+
+
+def write_snapshot(
+    path: Path,
+    next_id: int,
+    segment: int,
+    columns: tuple[list[int], list[str], list[str]],
+) -> None:
+    """
+    전체 상태를 임시 파일에 쓰고 fsync 후 rename (중간에 죽어도 이전 스냅샷은 온전)
+
+    유저별 dict 대신 열(column) 단위 리스트 3개(ids, names, emails)로 저장한다.
+    marshal은 파이썬 내부(.pyc)에서 쓰는 직렬화라 기본 타입 리스트를 가장 빨리 읽고 쓴다.
+    (같은 프로그램이 쓰고 읽는 내부 파일 전용 - 외부에서 받은 파일을 읽으면 안 된다)
+    """
+    header = {"version": SNAPSHOT_VERSION, "next_id": next_id, "segment": segment}
+
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        marshal.dump(header, f)
+        marshal.dump(columns, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: Path) -> tuple[dict, tuple[list[int], list[str], list[str]]]:
+    """스냅샷을 읽어 (header, (ids, names, emails)) 반환"""
+    with open(path, "rb") as f:
+        header = marshal.load(f)
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"지원하지 않는 스냅샷 버전: {header.get('version')}")
+        columns = marshal.load(f)
+    return header, columns
+
+
+class UserPersistence:
+    """
+    WAL + 스냅샷 관리자
+
+    사용법:
+        persistence = UserPersistence("./data")
+        store = persistence.recover()   # 스냅샷 + 로그 재생, 이후 변경은 로그에 기록
+        persistence.start()             # 주기적 스냅샷 스레드 시작
+        ...
+        persistence.close()
+    """
+
+    def __init__(
+        self,
+        data_dir: str | Path,
+        snapshot_every: int = 100_000,
+        check_interval: float = 1.0,
+        fsync_interval: float = 0.05,
+        store_class: type[UserStore] = UserStore,
+    ) -> None:
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.snapshot_every = snapshot_every
+        self.check_interval = check_interval
+        self.fsync_interval = fsync_interval
+        self.store_class = store_class
+
+        self.store: UserStore | None = None
+        self.wal: AppendOnlyLog | None = None
+        self._snapshot_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def snapshot_path(self) -> Path:
+        return self.data_dir / SNAPSHOT_FILE
+
+    def recover(self) -> UserStore:
+        """스냅샷 + 이후 로그를 재생해 저장소를 복구하고, 새 로그 세그먼트를 연다"""
+        # 수백만 개 객체를 한꺼번에 만들 때는 순환 GC가 반복 실행되며 복구를 크게 늦춘다
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._recover()
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def _recover(self) -> UserStore:
+        store = self.store_class()
+        next_id = 1
+        first_segment = 0
+
+        if self.snapshot_path.exists():
+            header, (ids, names, emails) = read_snapshot(self.snapshot_path)
+            next_id = header["next_id"]
+            first_segment = header["segment"]
+            # 중간 dict 없이 열에서 바로 저장소로 적재 (복구 중 최대 메모리를 줄인다)
+            store.restore(zip(ids, names, emails), next_id=next_id)
+            del ids, names, emails
+
+        # 스냅샷 이후 로그는 ID별 최종 상태만 모아서 한 번에 적용
+        changes: dict[int, tuple[str, str] | None] = {}
+        segments = _list_segments(self.data_dir)
+        for segment in segments:
+            if segment >= first_segment:
+                max_id = replay_segment(_segment_path(self.data_dir, segment), changes)
+                next_id = max(next_id, max_id + 1)
+
+        store.restore(
+            ((user_id, *user) for user_id, user in changes.items() if user is not None),
+            next_id=next_id,
+        )
+        store.restore_deletes(user_id for user_id, user in changes.items() if user is None)
+
+        # 마지막 세그먼트는 끝이 잘렸을 수 있으므로 이어 쓰지 않고 새 파일을 연다
+        new_segment = max(segments[-1] + 1 if segments else 1, first_segment)
+        self.wal = AppendOnlyLog(self.data_dir, new_segment, fsync_interval=self.fsync_interval)
+        store.attach_wal(self.wal)
+        self.store = store
+        return store
+
+    def snapshot(self) -> None:
+        """
+        스냅샷 찍기
+
+        1. 로그를 새 세그먼트로 전환 (이후 변경은 새 세그먼트에 기록)
+        2. 저장소 전체를 복사해 스냅샷 파일로 저장
+           - 복사 중 들어온 변경이 일부 섞여도 괜찮다: 새 세그먼트를 다시 재생하면 같은 결과
+        3. 스냅샷보다 오래된 세그먼트 삭제
+        """
+        with self._snapshot_lock:
+            segment = self.wal.rotate()
+            next_id = self.store.next_id
+            write_snapshot(self.snapshot_path, next_id, segment, self.store.export_columns())
+
+            for old in _list_segments(self.data_dir):
+                if old < segment:
+                    _segment_path(self.data_dir, old).unlink()
+
+    def start(self) -> None:
+        """로그가 snapshot_every줄을 넘으면 스냅샷을 찍는 백그라운드 스레드 시작"""
+        self._thread = threading.Thread(target=self._snapshot_loop, daemon=True)
+        self._thread.start()
+
+    def _snapshot_loop(self) -> None:
+        while not self._stopped.wait(self.check_interval):
+            if self.wal.records_in_segment >= self.snapshot_every:
+                self.snapshot()
+
+    def close(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.wal is not None:
+            self.wal.close()
@@ -0,0 +1,471 @@
+"""
+인메모리 유저 저장소
+- FastAPI의 동기(def) 핸들러는 스레드풀에서 동시에 실행된다
+- 전역 dict + 전역 next_id를 그대로 쓰면 같은 ID가 두 번 발급될 수 있다
+  (next_id 읽기 → 저장 → += 1 사이에 다른 스레드가 끼어듦)
+- 원자적 ID 발급기 + ID 기준 락 스트라이핑으로 해결
+- 이메일 → ID 해시 인덱스로 이메일 조회를 O(1)로, 중복 이메일은 저장 시점에 차단
+- 수백만 명 규모에서는 CompactUserStore(__slots__ 레코드 + 이름 문자열 풀)로 메모리 절약
+"""
+
+import sys
+import threading
+from bisect import bisect_left, bisect_right, insort
+from contextlib import ExitStack, contextmanager, nullcontext
+from operator import attrgetter, itemgetter
+from typing import Any, Iterable, Iterator, Protocol
+
+
+class DuplicateEmailError(ValueError):
+    """이미 다른 유저가 사용 중인 이메일"""
+
+    def __init__(self, email: str) -> None:
+        super().__init__(f"이미 존재하는 이메일입니다: {email}")
+        self.email = email
+
+
+class WriteAheadLog(Protocol):
+    """변경 기록용 로그 (persistence.AppendOnlyLog가 구현)"""
+
+    def log_put(self, user: dict) -> None: ...
+
+    def log_delete(self, user_id: int) -> None: ...
+
+
+class IdAllocator:
+    """원자적 ID 발급기 - 락으로 보호되는 단조 증가 카운터"""
+
+    def __init__(self, start: int = 1) -> None:
+        self._next = start
+        self._lock = threading.Lock()
+
+    def allocate(self) -> int:
+        """다음 ID를 발급 (스레드가 몇 개든 같은 값은 두 번 나오지 않음)"""
+        with self._lock:
+            value = self._next
+            self._next += 1
+            return value
+
+    def peek(self) -> int:
+        """다음에 발급될 ID (발급하지는 않음)"""
+        return self._next
+
+    def advance_to(self, value: int) -> None:
+        """복구 시 이미 쓰인 ID를 건너뛰도록 카운터를 앞으로 당긴다"""
+        with self._lock:
+            self._next = max(self._next, value)
+
+
+class SortedIds:
+    """
+    정렬된 ID 목록 - 커서 페이지 조회용
+
+    리스트 하나에 전부 넣으면 중간 삭제마다 뒤쪽 전체를 밀어야 하므로,
+    최대 2 * load개짜리 정렬된 블록들로 나누고 블록별 최댓값(_maxes)으로 블록을 찾는다.
+    - add/discard: 블록 찾기 O(log 블록 수) + 블록 하나 안에서만 이동
+    - after: 빈 블록은 바로 지우므로 삭제된 ID를 건너뛰는 비용이 없다 → O(log n + limit)
+    - ID는 순서대로 발급되므로 add는 대부분 마지막 블록 끝에 붙는다
+
+    락은 없다. UserStore가 shard 락 안에서만 호출한다.
+    """
+
+    def __init__(self, load: int = 512) -> None:
+        self._load = load
+        self._blocks: list[list[int]] = []
+        self._maxes: list[int] = []
+
+    @classmethod
+    def from_iterable(cls, ids: Iterable[int], load: int = 512) -> "SortedIds":
+        """ID 묶음으로 한 번에 만들기 (복구용 - 거의 정렬된 입력이면 정렬이 O(n))"""
+        index = cls(load)
+        values = sorted(ids)
+        index._blocks = [values[i:i + load] for i in range(0, len(values), load)]
+        index._maxes = [block[-1] for block in index._blocks]
+        return index
+
+    def __len__(self) -> int:
+        return sum(len(block) for block in self._blocks)
+
+    def add(self, value: int) -> None:
+        blocks, maxes = self._blocks, self._maxes
+        if not blocks:
+            blocks.append([value])
+            maxes.append(value)
+            return
+
+        i = bisect_left(maxes, value)
+        if i == len(maxes):
+            i -= 1
+            blocks[i].append(value)
+            maxes[i] = value
+        else:
+            insort(blocks[i], value)
+
+        block = blocks[i]
+        if len(block) > 2 * self._load:
+            half = len(block) // 2
+            blocks[i:i + 1] = [block[:half], block[half:]]
+            maxes[i:i + 1] = [block[half - 1], block[-1]]
+
+    def discard(self, value: int) -> None:
+        blocks, maxes = self._blocks, self._maxes
+        i = bisect_left(maxes, value)
+        if i == len(maxes):
+            return
+        block = blocks[i]
+        j = bisect_left(block, value)
+        if j == len(block) or block[j] != value:
+            return
+
+        del block[j]
+        if block:
+            maxes[i] = block[-1]
+        else:
+            del blocks[i], maxes[i]
+
+    def after(self, value: int, limit: int) -> list[int]:
+        """value보다 큰 ID를 작은 것부터 최대 limit개"""
+        blocks = self._blocks
+        i = bisect_right(self._maxes, value)
+        if i == len(blocks):
+            return []
+
+        block = blocks[i]
+        start = bisect_right(block, value)
+        result = block[start:start + limit]
+        i += 1
+        while len(result) < limit and i < len(blocks):
+            result.extend(blocks[i][:limit - len(result)])
+            i += 1
+        return result
+
+
+class UserStore:
+    """
+    락 스트라이핑 기반 유저 저장소
+
+    - 데이터를 num_stripes개의 shard(dict)로 나누고, shard마다 락을 하나씩 둔다
+    - 쓰기는 해당 ID의 shard 락만 잡으므로 서로 다른 shard 쓰기는 동시에 진행된다
+    - 저장된 레코드는 불변으로 취급한다 (수정 시 새 dict로 통째로 교체)
+      → 읽기는 락 없이 dict.get 한 번으로 끝나므로 스레드 수만큼 확장된다
+
+    이메일 인덱스:
+    - 이메일 → ID 인덱스도 같은 방식으로 이메일 해시 기준 shard + 락으로 나눈다
+    - 이메일이 바뀌는 쓰기(create, 이메일 수정, delete)는
+      이메일 락을 먼저, ID 락을 나중에 잡는다 (항상 같은 순서 → 데드락 없음)
+    - 이메일 락을 쥔 채로 중복 확인 + 본 데이터 저장 + 인덱스 갱신을 하므로
+      같은 이메일로 동시에 두 명이 만들어질 수 없다
+
+    WAL(wal):
+    - 지정하면 모든 변경을 메모리에 반영하기 직전에 로그에 먼저 기록한다
+    - 기록도 같은 락 안에서 하므로 로그 순서 = 실제 반영 순서
+
+    ID 인덱스:
+    - shard마다 SortedIds를 두고 shard 락 안에서 같이 갱신한다 (커서 페이지 조회용)
+    """
+
+    def __init__(self, num_stripes: int = 16, wal: WriteAheadLog | None = None) -> None:
+        self._wal = wal
+        self._ids = IdAllocator()
+        self._locks = [threading.Lock() for _ in range(num_stripes)]
+        self._shards: list[dict[int, Any]] = [{} for _ in range(num_stripes)]
+        self._sorted_ids = [SortedIds() for _ in range(num_stripes)]
+        self._email_locks = [threading.Lock() for _ in range(num_stripes)]
+        self._email_shards: list[dict[str, int]] = [{} for _ in range(num_stripes)]
+
+    def _stripe(self, user_id: int) -> int:
+        return user_id % len(self._shards)
+
+    def _email_stripe(self, email: str) -> int:
+        return hash(email) % len(self._email_shards)
+
+    @contextmanager
+    def _lock_emails(self, *emails: str):
+        """이메일 shard 락들을 번호 순서대로 잡는다"""
+        with ExitStack() as stack:
+            for index in sorted({self._email_stripe(email) for email in emails}):
+                stack.enter_context(self._email_locks[index])
+            yield
+
+    def _owner_of(self, email: str) -> int | None:
+        return self._email_shards[self._email_stripe(email)].get(email)
+
+    # -------------------------------------------
+    # 레코드 표현 (CompactUserStore가 바꿔 끼운다)
+    # -------------------------------------------
+    def _make_record(self, user_id: int, name: str, email: str) -> Any:
+        return {"id": user_id, "name": name, "email": email}
+
+    @staticmethod
+    def _to_dict(record: Any) -> dict:
+        return dict(record)
+
+    @staticmethod
+    def _email_of(record: Any) -> str:
+        return record["email"]
+
+    _fields = staticmethod(itemgetter("id", "name", "email"))
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    @property
+    def next_id(self) -> int:
+        return self._ids.peek()
+
+    def attach_wal(self, wal: WriteAheadLog) -> None:
+        """복구가 끝난 뒤 로그 연결 (이후 변경부터 기록)"""
+        self._wal = wal
+
+    def restore(self, users: Iterable[tuple[int, str, str]], next_id: int) -> None:
+        """
+        복구용 일괄 적재 (서버 시작 시, 요청을 받기 전에만 호출)
+
+        Args:
+            users: (id, name, email) 목록. 이미 있는 ID면 덮어쓴다
+            next_id: 다음에 발급할 ID
+
+        로그를 거치지 않고 shard와 이메일 인덱스를 바로 채운다.
+        수백만 건을 도는 루프라 속성 조회를 지역 변수로 빼 둔다.
+
+        로그 재생은 ID별 최종 상태를 ID 순서와 무관하게 적용하므로, 옛 이메일 항목은
+        아직 이 ID를 가리킬 때만 지운다 (그새 다른 ID가 같은 이메일을 가져갔을 수 있다)
+        """
+        shards, email_shards = self._shards, self._email_shards
+        make_record, email_of = self._make_record, self._email_of
+        count = len(shards)
+        for user_id, name, email in users:
+            shard = shards[user_id % count]
+            previous = shard.get(user_id)
+            if previous is not None:
+                old_email = email_of(previous)
+                old_index = email_shards[hash(old_email) % count]
+                if old_index.get(old_email) == user_id:
+                    del old_index[old_email]
+            shard[user_id] = make_record(user_id, name, email)
+            email_shards[hash(email) % count][email] = user_id
+        self._ids.advance_to(next_id)
+        self._rebuild_sorted_ids()
+
+    def restore_deletes(self, user_ids: Iterable[int]) -> None:
+        """복구용 일괄 삭제 (restore와 같은 조건에서만 호출)"""
+        for user_id in user_ids:
+            record = self._shards[self._stripe(user_id)].pop(user_id, None)
+            if record is not None:
+                email = self._email_of(record)
+                index = self._email_shards[self._email_stripe(email)]
+                # 삭제 후 같은 이메일로 새로 가입한 유저가 있으면 그 항목은 남긴다
+                if index.get(email) == user_id:
+                    del index[email]
+        self._rebuild_sorted_ids()
+
+    def _rebuild_sorted_ids(self) -> None:
+        """복구 후 shard 내용으로 ID 인덱스를 다시 만든다 (건마다 add하는 것보다 빠름)"""
+        self._sorted_ids = [SortedIds.from_iterable(shard) for shard in self._shards]
+
+    def export_columns(self) -> tuple[list[int], list[str], list[str]]:
+        """
+        스냅샷용 전체 내보내기 - (ids, names, emails) 열 3개
+
+        list_all과 달리 유저마다 dict를 만들지 않는다 (수백만 명일 때 메모리 절약)
+        """
+        ids: list[int] = []
+        names: list[str] = []
+        emails: list[str] = []
+        fields = self._fields
+        for lock, shard in zip(self._locks, self._shards):
+            with lock:
+                records = list(shard.values())
+            for record in records:
+                user_id, name, email = fields(record)
+                ids.append(user_id)
+                names.append(name)
+                emails.append(email)
+        return ids, names, emails
+
+    # -------------------------------------------
+    # CRUD
+    # -------------------------------------------
+    def create(self, name: str, email: str) -> dict:
+        """새 유저 저장 후 반환 (이메일 중복이면 DuplicateEmailError)"""
+        with self._lock_emails(email):
+            if self._owner_of(email) is not None:
+                raise DuplicateEmailError(email)
+
+            user_id = self._ids.allocate()
+            record = self._make_record(user_id, name, email)
+            user = self._to_dict(record)
+
+            index = self._stripe(user_id)
+            with self._locks[index]:
+                if self._wal is not None:
+                    self._wal.log_put(user)
+                self._shards[index][user_id] = record
+                self._sorted_ids[index].add(user_id)
+            self._email_shards[self._email_stripe(email)][email] = user_id
+
+        return user
+
+    def get(self, user_id: int) -> dict | None:
+        """ID로 조회 (락 없음 - 레코드가 불변이라 반쯤 수정된 값을 볼 일이 없다)"""
+        record = self._shards[self._stripe(user_id)].get(user_id)
+        return self._to_dict(record) if record is not None else None
+
+    def get_by_email(self, email: str) -> dict | None:
+        """이메일로 조회 - 해시 인덱스 한 번 + ID 조회 한 번 (O(1))"""
+        user_id = self._owner_of(email)
+        if user_id is None:
+            return None
+        user = self.get(user_id)
+        # 이메일 변경 도중에 읽었다면 인덱스와 본 데이터가 잠깐 어긋날 수 있다
+        if user is None or user["email"] != email:
+            return None
+        return user
+
+    def list_all(self) -> list[dict]:
+        """모든 유저를 ID 순으로 반환"""
+        records: list = []
+        for lock, shard in zip(self._locks, self._shards):
+            # shard 하나를 복사하는 동안만 락을 잡는다
+            with lock:
+                records.extend(shard.values())
+        users = [self._to_dict(record) for record in records]
+        users.sort(key=itemgetter("id"))
+        return users
+
+    def list_page(self, after_id: int = 0, limit: int = 100) -> list[dict]:
+        """
+        커서 기반 페이지 조회 - after_id보다 큰 ID를 ID 순으로 최대 limit명
+
+        shard마다 SortedIds에서 after_id 다음 ID를 최대 limit개씩 꺼내 합친 뒤 작은 것부터 limit개.
+        비용은 O(shard 수 × limit)이고, 전체 유저 수나 삭제된 ID 수와 무관하다.
+        """
+        after_id = max(after_id, 0)
+        candidates: list[tuple[int, Any]] = []
+        for lock, shard, sorted_ids in zip(self._locks, self._shards, self._sorted_ids):
+            # ID와 레코드를 같은 락 안에서 읽어야 그사이 삭제된 유저가 섞이지 않는다
+            with lock:
+                candidates.extend((user_id, shard[user_id]) for user_id in sorted_ids.after(after_id, limit))
+        candidates.sort(key=itemgetter(0))
+        return [self._to_dict(record) for _, record in candidates[:limit]]
+
+    def iter_users(self, batch_size: int = 1000) -> Iterator[dict]:
+        """전체 유저를 ID 순으로 하나씩 (batch_size씩 페이지를 넘기며 - 전체 목록을 만들지 않음)"""
+        after_id = 0
+        while True:
+            page = self.list_page(after_id, batch_size)
+            yield from page
+            if len(page) < batch_size:
+                return
+            after_id = page[-1]["id"]
+
+    def update(
+        self, user_id: int, name: str | None = None, email: str | None = None
+    ) -> dict | None:
+        """전달된 값만 수정 (없는 유저면 None, 이메일 중복이면 DuplicateEmailError)"""
+        index = self._stripe(user_id)
+
+        while True:
+            current = self._shards[index].get(user_id)
+            if current is None:
+                return None
+
+            old_email = self._email_of(current)
+            changes_email = email is not None and email != old_email
+            # 이메일이 안 바뀌면 인덱스를 건드리지 않으므로 ID 락만 잡으면 된다
+            email_locks = self._lock_emails(old_email, email) if changes_email else nullcontext()
+
+            with email_locks, self._locks[index]:
+                current = self._shards[index].get(user_id)
+                if current is None:
+                    return None
+                if self._email_of(current) != old_email:
+                    # 락을 잡기 전에 다른 스레드가 이메일을 바꿨다 → 처음부터 다시
+                    continue
+                if changes_email and self._owner_of(email) is not None:
+                    raise DuplicateEmailError(email)
+
+                updated = self._to_dict(current)
+                if name is not None:
+                    updated["name"] = name
+                if email is not None:
+                    updated["email"] = email
+                if self._wal is not None:
+                    self._wal.log_put(updated)
+                self._shards[index][user_id] = self._make_record(
+                    user_id, updated["name"], updated["email"]
+                )
+
+                if changes_email:
+                    del self._email_shards[self._email_stripe(old_email)][old_email]
+                    self._email_shards[self._email_stripe(email)][email] = user_id
+
+            return updated
+
+    def delete(self, user_id: int) -> dict | None:
+        """삭제 후 삭제된 유저 반환 (없는 유저면 None)"""
+        index = self._stripe(user_id)
+
+        while True:
+            current = self._shards[index].get(user_id)
+            if current is None:
+                return None
+
+            email = self._email_of(current)
+            with self._lock_emails(email), self._locks[index]:
+                current = self._shards[index].get(user_id)
+                if current is None:
+                    return None
+                if self._email_of(current) != email:
+                    continue
+
+                if self._wal is not None:
+                    self._wal.log_delete(user_id)
+                del self._shards[index][user_id]
+                self._sorted_ids[index].discard(user_id)
+                del self._email_shards[self._email_stripe(email)][email]
+
+            return self._to_dict(current)
+
+
+class UserRecord:
+    """
+    유저 한 명 (__slots__ 레코드)
+
+    dict는 키 해시 테이블을 객체마다 따로 들고 있지만,
+    __slots__ 객체는 필드 3개짜리 고정 배열이라 훨씬 작다.
+    """
+
+    __slots__ = ("id", "name", "email")
+
+    def __init__(self, user_id: int, name: str, email: str) -> None:
+        self.id = user_id
+        self.name = name
+        self.email = email
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "name": self.name, "email": self.email}
+
+
+class CompactUserStore(UserStore):
+    """
+    메모리 절약형 유저 저장소 - UserStore와 CRUD API가 같다
+
+    - 레코드를 dict 대신 UserRecord(__slots__)로 저장
+    - 이름은 sys.intern으로 문자열 풀에 넣어 같은 이름이면 객체 하나를 공유
+      (이메일은 유저마다 달라서 풀에 넣어도 이득이 없다)
+    - API 응답용 dict는 읽을 때 만든다
+    """
+
+    def _make_record(self, user_id: int, name: str, email: str) -> UserRecord:
+        return UserRecord(user_id, sys.intern(name), email)
+
+    _to_dict = staticmethod(UserRecord.to_dict)
+    _email_of = staticmethod(attrgetter("email"))
+    _fields = staticmethod(attrgetter("id", "name", "email"))
+
+
+STORE_BACKENDS: dict[str, type[UserStore]] = {
+    "dict": UserStore,
+    "compact": CompactUserStore,
+}
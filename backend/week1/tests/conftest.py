@@ -0,0 +1,37 @@
+"""
+pytest 픽스처 설정
+
+핵심 전략:
+- 테스트마다 새 UserStore를 만들어 서로 데이터가 섞이지 않게 한다
+- 저장소 백엔드(dict, compact) 각각에 대해 같은 테스트를 한 번씩 실행
+- app.dependency_overrides로 get_store를 테스트용 저장소로 교체
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app, get_store
+from store import STORE_BACKENDS
+
+
+@pytest.fixture(params=sorted(STORE_BACKENDS))
+def store(request):
+    """빈 저장소 (백엔드별로 한 번씩)"""
+    return STORE_BACKENDS[request.param]()
+
+
+@pytest.fixture
+def client(store):
+    """get_store를 빈 저장소로 교체한 TestClient"""
+    app.dependency_overrides[get_store] = lambda: store
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def sample_user_data():
+    """테스트용 유저 데이터 (dict)"""
+    return {"name": "김철수", "email": "kim@example.com"}
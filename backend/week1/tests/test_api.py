@@ -0,0 +1,104 @@
+"""
+통합 테스트 - TestClient로 유저 CRUD API 검증
+"""
+
+import json
+
+
+class TestUserAPI:
+    """/users 엔드포인트 테스트"""
+
+    def test_create_and_get(self, client, sample_user_data):
+        response = client.post("/users", json=sample_user_data)
+
+        assert response.status_code == 201
+        user = response.json()
+        assert user == {"id": 1, **sample_user_data}
+        assert client.get(f"/users/{user['id']}").json() == user
+
+    def test_get_users(self, client, sample_user_data):
+        client.post("/users", json=sample_user_data)
+        client.post("/users", json={"name": "이영희", "email": "lee@example.com"})
+
+        response = client.get("/users")
+
+        assert response.status_code == 200
+        assert [user["id"] for user in response.json()] == [1, 2]
+
+    def test_get_users_cursor_pagination(self, client):
+        for i in range(7):
+            client.post("/users", json={"name": f"유저{i}", "email": f"user{i}@example.com"})
+
+        seen = []
+        cursor = "0"
+        while cursor is not None:
+            response = client.get(f"/users?limit=3&cursor={cursor}")
+            assert response.status_code == 200
+            seen.extend(user["id"] for user in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+
+        assert seen == list(range(1, 8))
+
+    def test_get_users_limit_validation(self, client):
+        assert client.get("/users?limit=0").status_code == 422
+        assert client.get("/users?limit=1001").status_code == 422
+
+    def test_stream_users_ndjson(self, client):
+        for i in range(3):
+            client.post("/users", json={"name": f"유저{i}", "email": f"user{i}@example.com"})
+
+        response = client.get("/users/stream")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        users = [json.loads(line) for line in response.text.splitlines()]
+        assert [user["id"] for user in users] == [1, 2, 3]
+        assert users[0] == {"id": 1, "name": "유저0", "email": "user0@example.com"}
+
+    def test_update_user(self, client, sample_user_data):
+        user_id = client.post("/users", json=sample_user_data).json()["id"]
+
+        response = client.put(f"/users/{user_id}", json={"name": "새이름"})
+
+        assert response.status_code == 200
+        assert response.json()["name"] == "새이름"
+        assert response.json()["email"] == sample_user_data["email"]
+
+    def test_delete_user(self, client, sample_user_data):
+        user_id = client.post("/users", json=sample_user_data).json()["id"]
+
+        response = client.delete(f"/users/{user_id}")
+
+        assert response.status_code == 200
+        assert response.json()["deleted"]["id"] == user_id
+        assert client.get(f"/users/{user_id}").status_code == 404
+
+    def test_create_duplicate_email(self, client, sample_user_data):
+        client.post("/users", json=sample_user_data)
+
+        response = client.post("/users", json=sample_user_data)
+
+        assert response.status_code == 400
+        assert "이미 존재하는 이메일" in response.json()["detail"]
+
+    def test_update_to_duplicate_email(self, client, sample_user_data):
+        user_id = client.post("/users", json=sample_user_data).json()["id"]
+        client.post("/users", json={"name": "이영희", "email": "lee@example.com"})
+
+        response = client.put(f"/users/{user_id}", json={"email": "lee@example.com"})
+
+        assert response.status_code == 400
+
+    def test_get_user_by_email(self, client, sample_user_data):
+        user = client.post("/users", json=sample_user_data).json()
+
+        response = client.get(f"/users/by-email/{sample_user_data['email']}")
+
+        assert response.status_code == 200
+        assert response.json() == user
+        assert client.get("/users/by-email/none@example.com").status_code == 404
+
+    def test_not_found(self, client):
+        assert client.get("/users/999").status_code == 404
+        assert client.put("/users/999", json={"name": "없음"}).status_code == 404
+        assert client.delete("/users/999").status_code == 404
@@ -0,0 +1,216 @@
+"""
+WAL + 스냅샷 영속화 테스트
+
+"재시작"은 UserPersistence를 닫고 같은 디렉토리로 새로 만들어 recover()하는 것으로 흉내낸다.
+"""
+
+import threading
+
+import pytest
+
+from persistence import AppendOnlyLog, UserPersistence, _list_segments, _segment_path
+from store import CompactUserStore, DuplicateEmailError
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    return tmp_path / "data"
+
+
+def restart(persistence: UserPersistence) -> UserPersistence:
+    """닫고 같은 디렉토리에서 다시 복구"""
+    persistence.close()
+    reopened = UserPersistence(persistence.data_dir)
+    reopened.recover()
+    return reopened
+
+
+class TestRecovery:
+    """로그/스냅샷에서 저장소 상태 복구"""
+
+    def test_empty_directory(self, data_dir):
+        persistence = UserPersistence(data_dir)
+        store = persistence.recover()
+
+        assert len(store) == 0
+        assert store.next_id == 1
+        persistence.close()
+
+    def test_replays_log(self, data_dir):
+        persistence = UserPersistence(data_dir)
+        store = persistence.recover()
+        kim = store.create("김철수", "kim@example.com")
+        lee = store.create("이영희", "lee@example.com")
+        store.update(kim["id"], name="새이름", email="new@example.com")
+        store.delete(lee["id"])
+
+        persistence = restart(persistence)
+        store = persistence.store
+
+        assert store.list_all() == [{"id": kim["id"], "name": "새이름", "email": "new@example.com"}]
+        assert store.get_by_email("new@example.com")["id"] == kim["id"]
+        assert store.get_by_email("kim@example.com") is None
+        # 삭제된 ID도 재사용하지 않는다
+        assert store.create("박민수", "park@example.com")["id"] == lee["id"] + 1
+        persistence.close()
+
+    @pytest.mark.parametrize("snapshot_first", [False, True])
+    def test_email_reused_after_delete(self, data_dir, snapshot_first):
+        """삭제 → 같은 이메일로 재가입 → 복구해도 이메일 인덱스는 새 유저를 가리킨다"""
+        persistence = UserPersistence(data_dir)
+        store = persistence.recover()
+        old = store.create("김철수", "x@example.com")
+        moved = store.create("박민수", "y@example.com")
+        if snapshot_first:
+            persistence.snapshot()
+        store.delete(old["id"])
+        new = store.create("이영희", "x@example.com")
+        # 이메일을 바꾼 뒤 원래 이메일을 다른 유저가 가져가는 경우
+        store.update(moved["id"], email="z@example.com")
+        taken = store.create("최지훈", "y@example.com")
+
+        persistence = restart(persistence)
+        store = persistence.store
+
+        assert store.get_by_email("x@example.com") == new
+        assert store.get_by_email("y@example.com") == taken
+        assert store.get_by_email("z@example.com")["id"] == moved["id"]
+        with pytest.raises(DuplicateEmailError):
+            store.create("중복", "x@example.com")
+        with pytest.raises(DuplicateEmailError):
+            store.create("중복", "y@example.com")
+        persistence.close()
+
+    def test_snapshot_plus_log_tail(self, data_dir):
+        persistence = UserPersistence(data_dir)
+        store = persistence.recover()
+        for i in range(10):
+            store.create(f"유저{i}", f"user{i}@example.com")
+
+        persistence.snapshot()
+        store.delete(1)
+        store.update(2, name="스냅샷 이후 수정")
+        store.create("새유저", "after@example.com")
+        expected = store.list_all()
+
+        persistence = restart(persistence)
+
+        assert persistence.store.list_all() == expected
+        persistence.close()
+
+    def test_compact_backend(self, data_dir):
+        persistence = UserPersistence(data_dir, store_class=CompactUserStore)
+        store = persistence.recover()
+        for i in range(5):
+            store.create("같은이름", f"user{i}@example.com")
+        persistence.snapshot()
+        store.update(3, email="changed@example.com")
+        expected = store.list_all()
+        persistence.close()
+
+        reopened = UserPersistence(data_dir, store_class=CompactUserStore)
+        store = reopened.recover()
+
+        assert isinstance(store, CompactUserStore)
+        assert store.list_all() == expected
+        assert store.get_by_email("changed@example.com")["id"] == 3
+        reopened.close()
+
+    def test_snapshot_removes_old_segments(self, data_dir):
+        persistence = UserPersistence(data_dir)
+        store = persistence.recover()
+        store.create("김철수", "kim@example.com")
+
+        persistence.snapshot()
+        persistence.snapshot()
+
+        assert _list_segments(data_dir) == [persistence.wal.segment]
+        persistence.close()
+
+    def test_torn_last_line_is_ignored(self, data_dir):
+        """쓰다 만 마지막 줄(강제 종료)은 버리고 그 전까지만 복구"""
+        persistence = UserPersistence(data_dir)
+        store = persistence.recover()
+        store.create("김철수", "kim@example.com")
+        persistence.close()
+        with open(_segment_path(data_dir, persistence.wal.segment), "a", encoding="utf-8") as f:
+            f.write('["put", 2, "이영')
+
+        reopened = UserPersistence(data_dir)
+        store = reopened.recover()
+
+        assert [user["id"] for user in store.list_all()] == [1]
+        reopened.close()
+
+    def test_concurrent_writes_during_snapshot(self, data_dir):
+        """스냅샷을 찍는 동안 쓰기가 계속 들어와도 복구 결과는 최종 상태와 같다"""
+        persistence = UserPersistence(data_dir)
+        store = persistence.recover()
+        stop = threading.Event()
+
+        def writer(thread_index: int) -> None:
+            n = 0
+            while not stop.is_set():
+                user = store.create(f"t{thread_index}", f"t{thread_index}-{n}@example.com")
+                if n % 2:
+                    store.update(user["id"], name="수정")
+                if n % 5 == 0:
+                    store.delete(user["id"])
+                n += 1
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for _ in range(3):
+            persistence.snapshot()
+        stop.set()
+        for thread in threads:
+            thread.join()
+        expected = store.list_all()
+
+        persistence = restart(persistence)
+
+        assert persistence.store.list_all() == expected
+        persistence.close()
+
+
+class TestGroupCommit:
+    """fsync 배치"""
+
+    def test_append_does_not_wait_for_fsync(self, data_dir, monkeypatch):
+        """fsync가 도는 동안에도 append는 바로 끝난다 (다음 배치에 쌓임)"""
+        import persistence as persistence_module
+
+        fsync_started = threading.Event()
+        release = threading.Event()
+        real_fsync = persistence_module.os.fsync
+
+        def slow_fsync(fd):
+            fsync_started.set()
+            release.wait(5)
+            real_fsync(fd)
+
+        data_dir.mkdir()
+        wal = AppendOnlyLog(data_dir, 1, fsync_interval=60)
+        monkeypatch.setattr(persistence_module.os, "fsync", slow_fsync)
+        wal.log_put({"id": 1, "name": "김철수", "email": "kim@example.com"})
+        sync_thread = threading.Thread(target=wal.sync)
+        sync_thread.start()
+        assert fsync_started.wait(5)
+
+        appended = threading.Event()
+        writer = threading.Thread(
+            target=lambda: (wal.log_delete(1), appended.set())
+        )
+        writer.start()
+        try:
+            assert appended.wait(1)
+        finally:
+            release.set()
+            sync_thread.join()
+            writer.join()
+            monkeypatch.undo()
+            wal.close()
+
+        lines = _segment_path(data_dir, 1).read_text(encoding="utf-8").splitlines()
+        assert lines == ['["put", 1, "김철수", "kim@example.com"]', '["del", 1]']
@@ -0,0 +1,337 @@
+"""
+UserStore 유닛 테스트 + 동시성 스트레스 테스트
+
+동시성 테스트 전략:
+- sys.setswitchinterval을 아주 작게 줄여 스레드 전환을 최대한 자주 일으킨다
+- 여러 스레드가 동시에 create/update/delete를 호출한 뒤
+  유실되거나 중복된 유저가 없는지 확인
+"""
+
+import sys
+import threading
+
+import pytest
+
+from store import CompactUserStore, DuplicateEmailError, IdAllocator, SortedIds, UserRecord
+
+THREADS = 16
+OPS_PER_THREAD = 500
+
+
+@pytest.fixture
+def fast_switching():
+    """스레드 전환 간격을 줄여 경쟁 상태가 드러나기 쉽게 만든다"""
+    original = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        yield
+    finally:
+        sys.setswitchinterval(original)
+
+
+def run_threads(target, count: int = THREADS) -> None:
+    """같은 함수를 여러 스레드에서 동시에 시작"""
+    barrier = threading.Barrier(count)
+
+    def worker(index: int) -> None:
+        barrier.wait()
+        target(index)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+# ===========================================
+# 1. 기본 CRUD
+# ===========================================
+
+
+class TestUserStore:
+    """단일 스레드에서의 CRUD 동작"""
+
+    def test_create_assigns_sequential_ids(self, store):
+        first = store.create("김철수", "kim@example.com")
+        second = store.create("이영희", "lee@example.com")
+
+        assert first == {"id": 1, "name": "김철수", "email": "kim@example.com"}
+        assert second["id"] == 2
+        assert len(store) == 2
+
+    def test_get_missing_returns_none(self, store):
+        assert store.get(999) is None
+
+    def test_update_only_given_fields(self, store):
+        user = store.create("김철수", "kim@example.com")
+
+        updated = store.update(user["id"], name="새이름")
+
+        assert updated == {"id": user["id"], "name": "새이름", "email": "kim@example.com"}
+        assert store.get(user["id"]) == updated
+
+    def test_returned_dict_does_not_leak_internal_state(self, store):
+        """반환값을 수정해도 저장소 내용은 바뀌지 않는다"""
+        user = store.create("김철수", "kim@example.com")
+        user["name"] = "변조"
+
+        assert store.get(user["id"])["name"] == "김철수"
+
+    def test_delete(self, store):
+        user = store.create("김철수", "kim@example.com")
+
+        assert store.delete(user["id"]) == user
+        assert store.get(user["id"]) is None
+        assert store.delete(user["id"]) is None
+
+    def test_list_all_sorted_by_id(self, store):
+        for i in range(40):
+            store.create(f"유저{i}", f"user{i}@example.com")
+
+        ids = [user["id"] for user in store.list_all()]
+        assert ids == list(range(1, 41))
+
+
+class TestPagination:
+    """커서 기반 페이지 조회"""
+
+    def test_list_page_walks_all_users(self, store):
+        for i in range(25):
+            store.create(f"유저{i}", f"user{i}@example.com")
+
+        first = store.list_page(after_id=0, limit=10)
+        second = store.list_page(after_id=first[-1]["id"], limit=10)
+        third = store.list_page(after_id=second[-1]["id"], limit=10)
+
+        assert [user["id"] for user in first + second + third] == list(range(1, 26))
+        assert len(third) == 5
+
+    def test_list_page_skips_deleted(self, store):
+        for i in range(10):
+            store.create(f"유저{i}", f"user{i}@example.com")
+        for user_id in (2, 3, 4, 7):
+            store.delete(user_id)
+
+        page = store.list_page(after_id=0, limit=3)
+
+        assert [user["id"] for user in page] == [1, 5, 6]
+
+    def test_list_page_over_sparse_ids(self, store):
+        """대부분 삭제된 구간도 남은 유저만 보고 건너뛴다"""
+        for i in range(3000):
+            store.create(f"유저{i}", f"user{i}@example.com")
+        survivors = [1, 1500, 2999, 3000]
+        for user_id in range(1, 3001):
+            if user_id not in survivors:
+                store.delete(user_id)
+
+        first = store.list_page(after_id=0, limit=2)
+        second = store.list_page(after_id=first[-1]["id"], limit=2)
+
+        assert [user["id"] for user in first + second] == survivors
+        assert store.list_page(after_id=3000, limit=2) == []
+
+    def test_sorted_ids_splits_and_drops_empty_blocks(self):
+        index = SortedIds(load=4)
+        for value in [5, 1, 9, 3, 7, 2, 8, 4, 6, 10, 11, 12]:
+            index.add(value)
+        for value in [2, 3, 4, 5, 6, 7, 99]:
+            index.discard(value)
+
+        assert len(index) == 6
+        assert index.after(0, 10) == [1, 8, 9, 10, 11, 12]
+        assert index.after(1, 2) == [8, 9]
+        assert index.after(12, 2) == []
+        assert all(index._blocks)
+        assert SortedIds.from_iterable([3, 1, 2], load=2).after(0, 5) == [1, 2, 3]
+
+    def test_list_page_after_recovery_restore(self, store):
+        store.restore([(3, "c", "c@example.com"), (1, "a", "a@example.com"), (7, "g", "g@example.com")], next_id=8)
+        store.restore_deletes([3])
+
+        assert [user["id"] for user in store.list_page(after_id=0, limit=10)] == [1, 7]
+        assert store.create("h", "h@example.com")["id"] == 8
+        assert [user["id"] for user in store.list_page(after_id=1, limit=10)] == [7, 8]
+
+    def test_iter_users_matches_list_all(self, store):
+        for i in range(55):
+            store.create(f"유저{i}", f"user{i}@example.com")
+        store.delete(20)
+
+        assert list(store.iter_users(batch_size=10)) == store.list_all()
+
+
+class TestCompactUserStore:
+    """__slots__ 레코드 + 이름 문자열 풀"""
+
+    def test_records_are_slots_with_shared_names(self):
+        store = CompactUserStore()
+        # 같은 내용이지만 서로 다른 문자열 객체
+        first = store.create("".join(["김", "철수"]), "a@example.com")
+        second = store.create("".join(["김철", "수"]), "b@example.com")
+
+        records = [store._shards[store._stripe(user["id"])][user["id"]] for user in (first, second)]
+        assert all(isinstance(record, UserRecord) for record in records)
+        assert records[0].name is records[1].name
+
+    def test_returns_plain_dicts(self):
+        store = CompactUserStore()
+        user = store.create("김철수", "kim@example.com")
+
+        assert user == {"id": 1, "name": "김철수", "email": "kim@example.com"}
+        assert store.update(1, name="새이름") == {"id": 1, "name": "새이름", "email": "kim@example.com"}
+        assert store.list_all() == [store.get(1)]
+
+
+# ===========================================
+# 2. 이메일 인덱스
+# ===========================================
+
+
+class TestEmailIndex:
+    """이메일 → ID 인덱스가 create/update/delete에 맞춰 유지되는지 확인"""
+
+    def test_get_by_email(self, store):
+        user = store.create("김철수", "kim@example.com")
+
+        assert store.get_by_email("kim@example.com") == user
+        assert store.get_by_email("none@example.com") is None
+
+    def test_create_duplicate_email_rejected(self, store):
+        store.create("김철수", "kim@example.com")
+
+        with pytest.raises(DuplicateEmailError):
+            store.create("김철수2", "kim@example.com")
+        assert len(store) == 1
+
+    def test_update_email_moves_index(self, store):
+        user = store.create("김철수", "kim@example.com")
+
+        store.update(user["id"], email="new@example.com")
+
+        assert store.get_by_email("kim@example.com") is None
+        assert store.get_by_email("new@example.com")["id"] == user["id"]
+        # 예전 이메일은 다시 쓸 수 있어야 한다
+        assert store.create("이영희", "kim@example.com")["id"] != user["id"]
+
+    def test_update_to_taken_email_rejected(self, store):
+        kim = store.create("김철수", "kim@example.com")
+        store.create("이영희", "lee@example.com")
+
+        with pytest.raises(DuplicateEmailError):
+            store.update(kim["id"], name="바뀌면안됨", email="lee@example.com")
+        assert store.get(kim["id"]) == kim
+
+    def test_update_own_email_allowed(self, store):
+        user = store.create("김철수", "kim@example.com")
+
+        updated = store.update(user["id"], name="새이름", email="kim@example.com")
+
+        assert updated["name"] == "새이름"
+        assert store.get_by_email("kim@example.com")["name"] == "새이름"
+
+    def test_delete_frees_email(self, store):
+        user = store.create("김철수", "kim@example.com")
+
+        store.delete(user["id"])
+
+        assert store.get_by_email("kim@example.com") is None
+        store.create("김철수", "kim@example.com")
+
+
+# ===========================================
+# 3. 동시성 스트레스 테스트
+# ===========================================
+
+
+@pytest.mark.usefixtures("fast_switching")
+class TestConcurrency:
+    """여러 스레드가 동시에 접근해도 유실/중복이 없어야 한다"""
+
+    def test_id_allocator_never_repeats(self):
+        allocator = IdAllocator()
+        results: list[list[int]] = [[] for _ in range(THREADS)]
+
+        run_threads(lambda i: results[i].extend(allocator.allocate() for _ in range(OPS_PER_THREAD)))
+
+        allocated = [value for chunk in results for value in chunk]
+        assert len(allocated) == len(set(allocated)) == THREADS * OPS_PER_THREAD
+        assert allocator.peek() == THREADS * OPS_PER_THREAD + 1
+
+    def test_concurrent_creates_no_lost_or_duplicated_users(self, store):
+        def create_many(thread_index: int) -> None:
+            for n in range(OPS_PER_THREAD):
+                store.create(f"t{thread_index}", f"t{thread_index}-{n}@example.com")
+
+        run_threads(create_many)
+
+        users = store.list_all()
+        total = THREADS * OPS_PER_THREAD
+        assert len(store) == len(users) == total
+        assert [user["id"] for user in users] == list(range(1, total + 1))
+        assert len({user["email"] for user in users}) == total
+
+    def test_concurrent_mixed_operations(self, store):
+        """생성/수정/삭제/조회가 섞여도 최종 상태가 각 스레드의 기록과 일치"""
+        kept: list[set[int]] = [set() for _ in range(THREADS)]
+
+        def mixed(thread_index: int) -> None:
+            for n in range(OPS_PER_THREAD):
+                user = store.create("원본", f"t{thread_index}-{n}@example.com")
+                assert store.get(user["id"])["email"] == user["email"]
+                if n % 3 == 0:
+                    assert store.delete(user["id"]) is not None
+                else:
+                    store.update(user["id"], name=f"수정-{thread_index}")
+                    kept[thread_index].add(user["id"])
+                if n % 100 == 0:
+                    store.list_all()
+
+        run_threads(mixed)
+
+        expected_ids = set().union(*kept)
+        users = store.list_all()
+        assert {user["id"] for user in users} == expected_ids
+        assert len(users) == len(expected_ids)
+        assert all(user["name"].startswith("수정-") for user in users)
+
+    def test_concurrent_same_email_only_one_wins(self, store):
+        """같은 이메일로 동시에 생성하면 정확히 한 명만 성공"""
+        created: list[dict] = []
+        rejected: list[int] = []
+
+        def create_same(thread_index: int) -> None:
+            for n in range(50):
+                try:
+                    created.append(store.create(f"t{thread_index}", f"same-{n}@example.com"))
+                except DuplicateEmailError:
+                    rejected.append(thread_index)
+
+        run_threads(create_same)
+
+        assert len(created) == len(store) == 50
+        assert len(rejected) == THREADS * 50 - 50
+        for user in created:
+            assert store.get_by_email(user["email"]) == user
+
+    def test_concurrent_email_swaps_keep_index_consistent(self, store):
+        """이메일 수정이 경쟁해도 인덱스와 본 데이터가 일치하고 중복이 없다"""
+        users = [store.create(f"u{i}", f"u{i}@example.com") for i in range(THREADS)]
+        pool = [f"pool-{n}@example.com" for n in range(THREADS // 2)]
+
+        def swap(thread_index: int) -> None:
+            user_id = users[thread_index]["id"]
+            for n in range(OPS_PER_THREAD):
+                try:
+                    store.update(user_id, email=pool[(thread_index + n) % len(pool)])
+                except DuplicateEmailError:
+                    pass
+
+        run_threads(swap)
+
+        final = store.list_all()
+        emails = [user["email"] for user in final]
+        assert len(emails) == len(set(emails)) == THREADS
+        for user in final:
+            assert store.get_by_email(user["email"]) == user
@@ -5,22 +5,47 @@
 - SQLAlchemy ORM 사용
 """
 
-from fastapi import FastAPI, Depends, HTTPException
+import io
+import tempfile
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from typing import List
 
-from database import engine, get_db, Base
-from models import User
+from bulk_import import CSV_TYPES, NDJSON_TYPES, import_users
+from database import engine, get_db, get_read_db, db_monitor, replica_router, Base
+from models import create_missing_indexes
+from queries import DELETE_USER, INSERT_USER, SELECT_USER, SELECT_USERS, update_user_stmt
+from search import SearchError, build_user_search
+from stats import UserCountProvider, get_count_provider
 
 # 앱 시작 시 테이블 생성
 # (실제 운영에서는 Alembic 같은 마이그레이션 도구 사용)
 Base.metadata.create_all(bind=engine)
+# 이미 있던 테이블에는 새로 추가된 인덱스만 생성 (복제본에는 복제로 전달됨)
+with engine.begin() as connection:
+    create_missing_indexes(connection)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """DB 상태 확인 스레드 시작/종료 (복제본 확인은 REPLICA_URLS가 없으면 아무것도 안 함)"""
+    db_monitor.start()
+    replica_router.start()
+    yield
+    replica_router.stop()
+    db_monitor.stop()
+
 
 app = FastAPI(
     title="2주차 - DB 연동 CRUD",
     description="PostgreSQL + SQLAlchemy + FastAPI",
     version="0.2.0",
+    lifespan=lifespan,
 )
 
 
@@ -71,6 +96,37 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+class ImportReject(BaseModel):
+    """대량 등록에서 거부된 행"""
+
+    row: int
+    email: str | None
+    reason: str
+
+
+class UserImportResult(BaseModel):
+    """대량 등록 결과 (rejects는 앞에서부터 최대 1000개)"""
+
+    inserted: int
+    rejected: int
+    rejects: List[ImportReject]
+
+
+# ===========================================
+# 이메일 중복 처리
+# ===========================================
+
+def is_duplicate_email(error: IntegrityError) -> bool:
+    """
+    IntegrityError가 users.email 유니크 제약 위반인지 확인
+
+    - PostgreSQL: duplicate key value violates unique constraint "ix_users_email"
+    - SQLite: UNIQUE constraint failed: users.email
+    """
+    message = str(error.orig)
+    return "ix_users_email" in message or "users.email" in message
+
+
 # ===========================================
 # 헬스체크
 # ===========================================
@@ -83,14 +139,17 @@ def root():
 
 
 @app.get("/health")
-def health_check(db: Session = Depends(get_db)):
-    """헬스체크 - DB 연결 확인"""
-    try:
-        # DB 쿼리 테스트
-        db.execute("SELECT 1")
-        return {"status": "ok", "database": "connected"}
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Database error: {str(e)}")
+def health_check():
+    """
+    헬스체크 - DB 연결 상태 (DB에 쿼리하지 않음)
+
+    백그라운드 확인 스레드가 DB_CHECK_INTERVAL초마다 갱신한 값을 그대로 응답한다.
+    probe가 아무리 자주 와도 DB 부하는 없고, DB가 멈춰도 바로 응답한다.
+    """
+    status = db_monitor.status()
+    if status["database"] != "connected":
+        raise HTTPException(status_code=503, detail=status)
+    return {"status": "ok", **status}
 
 
 # ===========================================
@@ -105,42 +164,108 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
 
     - **name**: 유저 이름
     - **email**: 이메일 (중복 불가)
+
+    SELECT로 중복 체크 → INSERT → refresh 하면 DB 왕복이 3번이고,
+    체크와 INSERT 사이에 같은 이메일이 끼어들 수도 있다.
+    → INSERT ... RETURNING 한 번으로 처리하고, 중복은 DB 유니크 제약에 맡긴다.
+    (문장은 queries.py에 미리 만들어 둔 것 - 요청마다 값만 넘김)
     """
-    # 이메일 중복 체크
-    existing = db.query(User).filter(User.email == user.email).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="이미 존재하는 이메일입니다")
+    try:
+        created = db.execute(INSERT_USER, {"name": user.name, "email": user.email}).one()
+        db.commit()
+    except IntegrityError as e:
+        # 유니크 제약 위반 → 트랜잭션 롤백 후 400
+        db.rollback()
+        if is_duplicate_email(e):
+            raise HTTPException(status_code=400, detail="이미 존재하는 이메일입니다")
+        raise
 
-    # 새 유저 생성
-    db_user = User(name=user.name, email=user.email)
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)  # DB에서 생성된 ID 등을 다시 로드
+    return created
+
+
+# 업로드 Body를 이 크기까지는 메모리에, 넘으면 임시 파일에 받아둔다
+IMPORT_SPOOL_SIZE = 8 * 1024 * 1024
 
-    return db_user
+
+@app.post("/users/import", response_model=UserImportResult)
+async def import_users_file(request: Request, db: Session = Depends(get_db)):
+    """
+    유저 대량 등록
+
+    - **text/csv**: 첫 줄은 name,email 헤더
+    - **application/x-ndjson**: 한 줄에 {"name": ..., "email": ...} 하나
+
+    POST /users를 행마다 호출하지 않고 COPY ... FROM STDIN 스트림 한 번으로 적재한다.
+    잘못된 행 / 파일 안 중복 / 이미 있는 이메일은 건너뛰고 rejects로 보고 (나머지는 등록)
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in CSV_TYPES | NDJSON_TYPES:
+        raise HTTPException(
+            status_code=415, detail="text/csv 또는 application/x-ndjson만 지원합니다"
+        )
+
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+
+        stream = io.TextIOWrapper(body, encoding="utf-8-sig", newline="")
+        try:
+            # DB 작업은 동기라 스레드풀에서 (이벤트 루프를 막지 않도록)
+            return await run_in_threadpool(import_users, db, stream, content_type)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="UTF-8 인코딩만 지원합니다")
+        finally:
+            stream.detach()
 
 
 @app.get("/users", response_model=List[UserResponse])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
     """
     모든 유저 조회
 
     - **skip**: 건너뛸 개수 (페이지네이션)
     - **limit**: 최대 조회 개수 (기본 100)
     """
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    return db.execute(SELECT_USERS, {"skip": skip, "limit": limit}).all()
+
+
+@app.get("/users/search", response_model=List[UserResponse])
+def search_users(
+    name_prefix: str | None = None,
+    email: str | None = None,
+    name_contains: str | None = None,
+    limit: int = 20,
+    db: Session = Depends(get_read_db),
+):
+    """
+    유저 검색 (대소문자 무시, 조건은 AND)
+
+    - **name_prefix**: 이름 접두사 (B-tree 인덱스 범위 조회)
+    - **email**: 이메일 일치 (lower(email) 인덱스)
+    - **name_contains**: 이름 부분 일치, 3글자 이상 (pg_trgm 인덱스, PostgreSQL 전용)
+    - **limit**: 최대 조회 개수 (기본 20, 최대 100)
+
+    `/users/{user_id}`보다 먼저 선언해야 "search"가 user_id로 해석되지 않는다.
+    """
+    try:
+        stmt = build_user_search(
+            db.get_bind().dialect.name, name_prefix, email, name_contains, limit
+        )
+    except SearchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return db.execute(stmt).all()
 
 
 @app.get("/users/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+def get_user(user_id: int, db: Session = Depends(get_read_db)):
     """
     특정 유저 조회
 
     - **user_id**: 조회할 유저의 ID
     """
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    user = db.execute(SELECT_USER, {"user_id": user_id}).first()
+    if user is None:
         raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
 
     return user
@@ -154,28 +279,32 @@ def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
     - **user_id**: 수정할 유저의 ID
     - **name**: 새 이름 (선택적)
     - **email**: 새 이메일 (선택적)
-    """
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if not db_user:
-        raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
 
+    UPDATE ... RETURNING 한 번으로 수정 + 결과 조회.
+    수정된 행이 없으면 404, 이메일 중복이면 유니크 제약 위반 → 400
+    """
     # 전달된 값만 업데이트
-    if user.name is not None:
-        db_user.name = user.name
-    if user.email is not None:
-        # 이메일 중복 체크 (자기 자신 제외)
-        existing = (
-            db.query(User)
-            .filter(User.email == user.email, User.id != user_id)
-            .first()
-        )
-        if existing:
+    values = user.model_dump(exclude_none=True)
+    if not values:
+        # 바꿀 값이 없으면 조회만
+        current = db.execute(SELECT_USER, {"user_id": user_id}).first()
+        if current is None:
+            raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
+        return current
+
+    stmt, params = update_user_stmt(values)
+    try:
+        updated = db.execute(stmt, {"user_id": user_id, **params}).first()
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if is_duplicate_email(e):
             raise HTTPException(status_code=400, detail="이미 존재하는 이메일입니다")
-        db_user.email = user.email
+        raise
 
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    if updated is None:
+        raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
+    return updated
 
 
 @app.delete("/users/{user_id}")
@@ -184,12 +313,12 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     유저 삭제
 
     - **user_id**: 삭제할 유저의 ID
+
+    조회 후 삭제(쿼리 2번) 대신 DELETE ... RETURNING 한 번 - 삭제된 행이 없으면 404
     """
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if not db_user:
+    deleted = db.execute(DELETE_USER, {"user_id": user_id}).first()
+    if deleted is None:
         raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
-
-    db.delete(db_user)
     db.commit()
 
     return {"message": "삭제 완료", "deleted_id": user_id}
@@ -201,7 +330,16 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
 
 
 @app.get("/stats")
-def get_stats(db: Session = Depends(get_db)):
-    """전체 유저 수 조회"""
-    total_users = db.query(User).count()
-    return {"total_users": total_users}
+def get_stats(
+    db: Session = Depends(get_read_db),
+    counter: UserCountProvider = Depends(get_count_provider),
+):
+    """
+    전체 유저 수 조회
+
+    db.query(User).count()는 요청마다 users 전체를 스캔한다.
+    → 트리거가 유지하는 카운터(exact) 또는 PostgreSQL 통계 추정치(estimate)를
+      STATS_CACHE_TTL초 동안 캐시해서 응답 (count_mode로 어느 쪽인지 알려줌)
+    """
+    total_users, count_mode = counter.get(db)
+    return {"total_users": total_users, "count_mode": count_mode}
@@ -4,7 +4,7 @@ SQLAlchemy 모델 정의
 - ORM을 통해 객체로 DB를 다룸
 """
 
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import BigInteger, Column, DDL, Index, Integer, String, DateTime, event, text
 from sqlalchemy.sql import func
 from database import Base
 
@@ -39,3 +39,121 @@ class User(Base):
     def __repr__(self):
         """객체를 문자열로 표현 (디버깅용)"""
         return f"<User(id={self.id}, name='{self.name}', email='{self.email}')>"
+
+
+# ===========================================
+# 검색용 인덱스 (GET /users/search, search.py)
+# ===========================================
+
+# 이메일 대소문자 무시 조회: WHERE lower(email) = lower(:email)
+Index("ix_users_email_lower", func.lower(User.email))
+
+# 이름 접두사 검색: lower(name) 범위 조건 (>= :prefix AND < :prefix || U+10FFFF)
+# - PostgreSQL: 기본 collation(en_US 등)은 문자열 순서가 바이트 순서와 달라 범위 = 접두사가
+#   아니므로 COLLATE "C"로 인덱싱 (text_pattern_ops와 같은 순서, 바인드 파라미터로도 사용 가능)
+# - SQLite: lower(name) 그대로 (BINARY 비교)
+Index(
+    "ix_users_name_prefix", func.lower(User.name).collate("C").label("name_lower")
+).ddl_if(dialect="postgresql")
+Index("ix_users_name_lower", func.lower(User.name)).ddl_if(dialect="sqlite")
+
+# 이름 부분 일치 검색 (PostgreSQL 전용): lower(name) LIKE '%...%' → pg_trgm GIN 인덱스
+ix_users_name_trgm = Index(
+    "ix_users_name_trgm",
+    func.lower(User.name).label("name_lower"),
+    postgresql_using="gin",
+    postgresql_ops={"name_lower": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+event.listen(
+    ix_users_name_trgm,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+# 인덱스 이름 조회 (SQLite의 표현식 인덱스는 SQLAlchemy 리플렉션이 건너뛰므로 카탈로그에서 직접)
+INDEX_NAMES_SQL = {
+    "sqlite": "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'users'",
+    "postgresql": "SELECT indexname FROM pg_indexes WHERE tablename = 'users'",
+}
+
+
+def create_missing_indexes(connection) -> None:
+    """
+    이미 있는 users 테이블에 나중에 추가된 인덱스 생성
+
+    create_all은 테이블을 새로 만들 때만 인덱스도 만든다 → 기존 DB는 이 함수로 보충
+    (DB 종류에 맞지 않는 인덱스는 ddl_if 조건으로 건너뜀)
+    """
+    sql = INDEX_NAMES_SQL.get(connection.dialect.name)
+    if sql is None:
+        return
+    existing = set(connection.execute(text(sql)).scalars())
+    for index in User.__table__.indexes:
+        if index.name not in existing:
+            index.create(connection)
+
+
+class UserCount(Base):
+    """
+    users_count 테이블 - 유저 수 카운터 (트리거가 유지)
+
+    COUNT(*)는 매번 테이블 전체를 읽으므로, INSERT/DELETE 때마다 트리거가 이 값을 고친다.
+    - PostgreSQL: 동시 INSERT가 한 행을 두고 줄 서지 않도록 COUNT_SLOTS개 행에 나눠 더함
+      (연결(backend pid)마다 다른 행) → 전체 수 = SUM(count)
+    - SQLite: 쓰기가 어차피 직렬화되므로 slot 0 하나만 사용
+    """
+
+    __tablename__ = "users_count"
+
+    slot = Column(Integer, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+
+COUNT_SLOTS = 16
+
+# users가 먼저 만들어져야 아래 트리거/초기값을 넣을 수 있다
+UserCount.__table__.add_is_dependent_on(User.__table__)
+
+# SQLite: 행 단위 트리거
+for _ddl in (
+    "CREATE TRIGGER IF NOT EXISTS users_count_insert AFTER INSERT ON users "
+    "BEGIN UPDATE users_count SET count = count + 1 WHERE slot = 0; END",
+    "CREATE TRIGGER IF NOT EXISTS users_count_delete AFTER DELETE ON users "
+    "BEGIN UPDATE users_count SET count = count - 1 WHERE slot = 0; END",
+    "INSERT INTO users_count (slot, count) SELECT 0, COUNT(*) FROM users",
+):
+    event.listen(UserCount.__table__, "after_create", DDL(_ddl).execute_if(dialect="sqlite"))
+
+# PostgreSQL: 문장 단위 트리거 (대량 INSERT도 카운터 UPDATE는 한 번)
+# CREATE TRIGGER가 users를 잠그므로 초기값 계산 중에 끼어드는 INSERT는 없다
+for _ddl in (
+    f"""
+    CREATE OR REPLACE FUNCTION users_count_changed() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        delta bigint;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            SELECT COUNT(*) INTO delta FROM new_rows;
+        ELSE
+            SELECT -COUNT(*) INTO delta FROM old_rows;
+        END IF;
+        IF delta <> 0 THEN
+            UPDATE users_count SET count = count + delta
+            WHERE slot = mod(pg_backend_pid(), {COUNT_SLOTS});
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+    "DROP TRIGGER IF EXISTS users_count_insert ON users",
+    "DROP TRIGGER IF EXISTS users_count_delete ON users",
+    "CREATE TRIGGER users_count_insert AFTER INSERT ON users "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION users_count_changed()",
+    "CREATE TRIGGER users_count_delete AFTER DELETE ON users "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION users_count_changed()",
+    "INSERT INTO users_count (slot, count) "
+    "SELECT s, CASE WHEN s = 0 THEN (SELECT COUNT(*) FROM users) ELSE 0 END "
+    f"FROM generate_series(0, {COUNT_SLOTS - 1}) AS s",
+):
+    event.listen(UserCount.__table__, "after_create", DDL(_ddl).execute_if(dialect="postgresql"))
@@ -0,0 +1,75 @@
+"""
+자주 실행하는 유저 쿼리 (미리 만들어 둔 문장)
+
+select(...).where(User.id == user_id)를 요청마다 새로 만들면 매번
+1. 문장 객체 생성 (select → where → 컬럼/비교식 객체들)
+2. 캐시 키 계산 (문장 트리 전체 순회 - 컴파일된 SQL 캐시를 찾는 데 필요)
+이 일어난다. 컴파일 결과는 엔진이 캐시하지만, 이 두 단계는 캐시되지 않는다.
+
+값이 들어갈 자리를 bindparam으로 비워 둔 문장을 모듈 로드 시 한 번만 만들어 두면
+캐시 키도 문장 객체에 저장(메모이즈)되므로 요청마다 값만 넘기면 된다.
+
+    db.execute(SELECT_USER, {"user_id": 1})
+
+UPDATE는 바꾸는 컬럼 조합(쿼리 모양)마다 문장이 달라서 조합별로 캐시한다.
+"""
+
+from functools import lru_cache
+
+from sqlalchemy import Update, bindparam, delete, insert, select, update
+
+from models import User
+
+# INSERT/UPDATE ... RETURNING, SELECT로 돌려받을 컬럼 (UserResponse 필드와 동일)
+USER_COLUMNS = (User.id, User.name, User.email)
+
+# GET /users/{user_id}
+SELECT_USER = select(*USER_COLUMNS).where(User.id == bindparam("user_id"))
+
+# GET /users?skip=&limit=
+SELECT_USERS = (
+    select(*USER_COLUMNS).offset(bindparam("skip")).limit(bindparam("limit"))
+)
+
+# POST /users - 값은 컬럼 이름 그대로 {"name": ..., "email": ...}
+INSERT_USER = insert(User).returning(*USER_COLUMNS)
+
+# DELETE /users/{user_id} - 삭제된 행이 없으면 결과가 비어 있음 → 404
+# synchronize_session="fetch": 세션에 이미 올라온 User 객체도 삭제 상태로 맞춘다
+# (기본값 "evaluate"는 bindparam 조건을 파이썬에서 평가하지 못해 그냥 넘어감,
+#  RETURNING을 지원하는 DB에서는 추가 SELECT 없음)
+DELETE_USER = (
+    delete(User)
+    .where(User.id == bindparam("user_id"))
+    .returning(User.id)
+    .execution_options(synchronize_session="fetch")
+)
+
+UPDATABLE_FIELDS = ("name", "email")
+
+
+@lru_cache(maxsize=None)
+def _update_user_stmt(fields: tuple[str, ...]) -> Update:
+    # SET 절의 bindparam 이름은 컬럼 이름과 겹치면 안 된다 (SQLAlchemy가 예약)
+    return (
+        update(User)
+        .where(User.id == bindparam("user_id"))
+        .values({field: bindparam(f"new_{field}") for field in fields})
+        .returning(*USER_COLUMNS)
+        .execution_options(synchronize_session="fetch")
+    )
+
+
+def update_user_stmt(values: dict) -> tuple[Update, dict]:
+    """
+    PUT /users/{user_id}용 (문장, 파라미터) - 바꾸는 컬럼 조합별로 캐시된 문장 사용
+
+    Args:
+        values: 바꿀 값 {"name": ..., "email": ...} (UPDATABLE_FIELDS 중 일부)
+
+    Returns:
+        (UPDATE ... RETURNING 문장, user_id를 뺀 파라미터)
+    """
+    fields = tuple(field for field in UPDATABLE_FIELDS if field in values)
+    params = {f"new_{field}": values[field] for field in fields}
+    return _update_user_stmt(fields), params
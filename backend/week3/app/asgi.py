@@ -0,0 +1,20 @@
+"""
+실행할 앱 선택 (APP_MODE 환경 변수)
+- sync (기본): app/main.py - 동기 핸들러 + 스레드풀
+- async: app/async_main.py - async 핸들러 + aiosqlite/asyncpg
+
+    APP_MODE=async uvicorn app.asgi:app
+"""
+
+import os
+
+APP_MODE = os.getenv("APP_MODE", "sync")
+
+if APP_MODE == "async":
+    from .async_main import app
+elif APP_MODE == "sync":
+    from .main import app
+else:
+    raise RuntimeError(f"지원하지 않는 APP_MODE: {APP_MODE} (sync 또는 async)")
+
+__all__ = ["app"]
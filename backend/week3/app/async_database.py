@@ -0,0 +1,47 @@
+"""
+비동기 데이터베이스 연결 설정 (async_main.py용)
+- database.py와 같은 DATABASE_URL을 비동기 드라이버로 바꿔서 사용
+  - sqlite://     → sqlite+aiosqlite://
+  - postgresql:// → postgresql+asyncpg://
+- 모델(Base, User)은 database.py / models.py의 것을 그대로 공유
+"""
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from .database import DATABASE_URL
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """동기 드라이버 URL을 비동기 드라이버 URL로 변환 (이미 비동기면 그대로)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.get_driver_name() in ("aiosqlite", "asyncpg") or backend not in ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+
+# 비동기 엔진 (연결 대기도 이벤트 루프에서 await → 스레드를 차지하지 않음)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
+
+# 세션 팩토리
+# expire_on_commit=False: 커밋 후 속성에 접근할 때 다시 조회(= 동기 I/O)하지 않도록
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+async def get_async_db():
+    """
+    FastAPI 의존성 주입용 함수 (비동기 세션)
+    요청마다 세션을 생성하고, 요청 종료 시 자동으로 닫음
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
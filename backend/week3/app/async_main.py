@@ -0,0 +1,205 @@
+"""
+3주차: FastAPI User CRUD - 비동기 버전
+- main.py와 같은 라우트/스키마를 async def + AsyncSession으로 구현
+- 동기 버전은 요청마다 스레드풀(기본 40개)에서 실행되고 DB를 기다리는 동안 스레드를 차지한다
+  → 비동기 버전은 DB 응답을 await 하는 동안 이벤트 루프가 다른 요청을 처리
+- 선택: APP_MODE=async uvicorn app.asgi:app (app/asgi.py 참고)
+"""
+
+import io
+import tempfile
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Depends, HTTPException, Request
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .async_database import async_engine, get_async_db
+from .bulk_import import CSV_TYPES, NDJSON_TYPES, import_users
+from .database import Base
+from .limits import ROUTE_LIMITS
+from .models import create_missing_indexes, is_duplicate_email
+from .queries import DELETE_USER, INSERT_USER, SELECT_USER, SELECT_USERS, update_user_stmt
+from .ratelimit import add_rate_limit
+from .schemas import UserCreate, UserImportResult, UserResponse, UserUpdate
+from .search import SearchError, build_user_search
+from .stats import UserCountProvider, get_count_provider
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """앱 시작 시 테이블/인덱스 생성 (create_all은 동기 API라 run_sync로 실행), 종료 시 연결 풀 정리"""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_missing_indexes)
+    yield
+    await async_engine.dispose()
+
+
+app = FastAPI(
+    title="3주차 - 테스트 대상 CRUD API (async)",
+    description="pytest + Locust 테스트를 위한 User CRUD - 비동기 버전",
+    version="0.3.0",
+    lifespan=lifespan,
+)
+# 클라이언트별 요청 제한 (RATE_LIMIT_RPS가 설정된 경우만, ratelimit.py 참고)
+add_rate_limit(app, ROUTE_LIMITS)
+
+
+# ===========================================
+# 헬스체크
+# ===========================================
+
+
+@app.get("/")
+async def root():
+    """루트 경로 - 서버 상태 확인"""
+    return {"message": "Week3 - Testing CRUD API (async)", "status": "running"}
+
+
+@app.get("/health")
+async def health_check(db: AsyncSession = Depends(get_async_db)):
+    """헬스체크 - DB 연결 확인"""
+    try:
+        await db.execute(text("SELECT 1"))
+        return {"status": "ok", "database": "connected"}
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Database error: {str(e)}")
+
+
+# ===========================================
+# CRUD API
+# ===========================================
+
+
+@app.post("/users", response_model=UserResponse, status_code=201)
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """새 유저 생성 (INSERT ... RETURNING 한 번, 중복 이메일은 유니크 제약 → 400)"""
+    params = {"name": user.name, "email": user.email}
+    try:
+        created = (await db.execute(INSERT_USER, params)).one()
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if is_duplicate_email(e):
+            raise HTTPException(status_code=400, detail="이미 존재하는 이메일입니다")
+        raise
+
+    return created
+
+
+# 업로드 Body를 이 크기까지는 메모리에, 넘으면 임시 파일에 받아둔다
+IMPORT_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+@app.post("/users/import", response_model=UserImportResult)
+async def import_users_file(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    CSV(text/csv, name,email 헤더) 또는 NDJSON(application/x-ndjson) Body로 유저 대량 등록
+
+    bulk_import.py의 동기 코드를 run_sync로 그대로 재사용한다.
+    (asyncpg에는 psycopg2의 copy_expert가 없으므로 PostgreSQL에서도 executemany 경로)
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in CSV_TYPES | NDJSON_TYPES:
+        raise HTTPException(
+            status_code=415, detail="text/csv 또는 application/x-ndjson만 지원합니다"
+        )
+
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+
+        stream = io.TextIOWrapper(body, encoding="utf-8-sig", newline="")
+        try:
+            return await db.run_sync(import_users, stream, content_type)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="UTF-8 인코딩만 지원합니다")
+        finally:
+            stream.detach()
+
+
+@app.get("/users", response_model=list[UserResponse])
+async def get_users(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    """모든 유저 조회 (페이지네이션)"""
+    result = await db.execute(SELECT_USERS, {"skip": skip, "limit": limit})
+    return result.all()
+
+
+@app.get("/users/search", response_model=list[UserResponse])
+async def search_users(
+    name_prefix: str | None = None,
+    email: str | None = None,
+    name_contains: str | None = None,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """유저 검색 (대소문자 무시, 조건은 AND - search.py 참고)"""
+    try:
+        stmt = build_user_search(
+            db.get_bind().dialect.name, name_prefix, email, name_contains, limit
+        )
+    except SearchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return (await db.execute(stmt)).all()
+
+
+@app.get("/users/{user_id}", response_model=UserResponse)
+async def get_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    """특정 유저 조회"""
+    user = (await db.execute(SELECT_USER, {"user_id": user_id})).first()
+    if user is None:
+        raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
+
+    return user
+
+
+@app.put("/users/{user_id}", response_model=UserResponse)
+async def update_user(user_id: int, user: UserUpdate, db: AsyncSession = Depends(get_async_db)):
+    """유저 정보 수정 (부분 업데이트, UPDATE ... RETURNING 한 번)"""
+    values = user.model_dump(exclude_none=True)
+    if not values:
+        # 바꿀 값이 없으면 조회만
+        return await get_user(user_id, db)
+
+    stmt, params = update_user_stmt(values)
+    try:
+        updated = (await db.execute(stmt, {"user_id": user_id, **params})).first()
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if is_duplicate_email(e):
+            raise HTTPException(status_code=400, detail="이미 존재하는 이메일입니다")
+        raise
+
+    if updated is None:
+        raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
+    return updated
+
+
+@app.delete("/users/{user_id}")
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    """유저 삭제 (DELETE ... RETURNING으로 삭제 여부 확인)"""
+    deleted = await db.execute(DELETE_USER, {"user_id": user_id})
+    if deleted.first() is None:
+        raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
+    await db.commit()
+
+    return {"message": "삭제 완료", "deleted_id": user_id}
+
+
+# ===========================================
+# 통계 API
+# ===========================================
+
+
+@app.get("/stats")
+async def get_stats(
+    db: AsyncSession = Depends(get_async_db),
+    counter: UserCountProvider = Depends(get_count_provider),
+):
+    """전체 유저 수 조회 (카운터/통계 값 캐시, count_mode: exact 또는 estimate)"""
+    total_users, count_mode = await counter.aget(db)
+    return {"total_users": total_users, "count_mode": count_mode}
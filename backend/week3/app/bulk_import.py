@@ -0,0 +1,252 @@
+"""
+유저 대량 등록 (CSV / NDJSON)
+
+POST /users를 수십만 번 호출하는 대신 파일 하나를 받아 한 트랜잭션으로 넣는다.
+
+흐름:
+1. 요청 Body를 한 줄씩 읽으며 검증 (잘못된 행은 reject로 기록하고 건너뜀)
+2. 임시 스테이징 테이블(users_import)에 적재
+   - PostgreSQL(psycopg2): COPY ... FROM STDIN 으로 스트리밍
+   - 그 외(SQLite 등): executemany로 1000행씩
+3. 파일 안에서 중복된 이메일은 첫 행만 남기고 reject
+4. users에 INSERT ... ON CONFLICT (email) DO NOTHING
+   → 이미 있는 이메일은 유니크 인덱스가 걸러주고, 그 행들을 reject로 보고
+"""
+
+import csv
+import io
+import json
+from typing import IO, Iterator
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+CSV_TYPES = {"text/csv", "application/csv"}
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+NAME_MAX_LENGTH = 100
+EMAIL_MAX_LENGTH = 255
+BATCH_SIZE = 1000
+# 응답에 담는 reject 상세는 앞에서부터 이만큼만 (개수는 전부 센다)
+MAX_REPORTED_REJECTS = 1000
+
+
+class ImportReport:
+    """등록 결과 (성공 수, reject 수, reject 상세 일부)"""
+
+    def __init__(self) -> None:
+        self.inserted = 0
+        self.rejected = 0
+        self.rejects: list[dict] = []
+
+    def reject(self, row: int, email: str | None, reason: str) -> None:
+        self.rejected += 1
+        if len(self.rejects) < MAX_REPORTED_REJECTS:
+            self.rejects.append({"row": row, "email": email, "reason": reason})
+
+    def to_dict(self) -> dict:
+        self.rejects.sort(key=lambda reject: reject["row"])
+        return {
+            "inserted": self.inserted,
+            "rejected": self.rejected,
+            "rejects": self.rejects,
+        }
+
+
+# ===========================================
+# 1. 파싱 + 검증
+# ===========================================
+
+
+def _read_records(stream: IO[str], content_type: str) -> Iterator[dict | str]:
+    """한 행씩 dict로 (파싱 자체가 실패한 행은 에러 메시지 문자열로)"""
+    if content_type in CSV_TYPES:
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield f"invalid_json: {e.msg}"
+                continue
+            yield record if isinstance(record, dict) else "invalid_json: object expected"
+
+
+def iter_valid_rows(
+    stream: IO[str], content_type: str, report: ImportReport
+) -> Iterator[tuple[int, str, str]]:
+    """(행 번호, name, email) - 잘못된 행은 report에 기록하고 건너뜀"""
+    for row, record in enumerate(_read_records(stream, content_type), start=1):
+        if isinstance(record, str):
+            report.reject(row, None, record)
+            continue
+
+        name, email = record.get("name"), record.get("email")
+        if not isinstance(name, str) or not name or len(name) > NAME_MAX_LENGTH:
+            report.reject(row, email if isinstance(email, str) else None, "invalid_name")
+        elif not isinstance(email, str) or not email or len(email) > EMAIL_MAX_LENGTH:
+            report.reject(row, None, "invalid_email")
+        else:
+            yield row, name, email
+
+
+# ===========================================
+# 2. 스테이징 테이블 적재
+# ===========================================
+
+
+class _CopyStream(io.RawIOBase):
+    """행 제너레이터를 COPY가 읽을 수 있는 파일 객체로 (전체를 메모리에 만들지 않음)"""
+
+    def __init__(self, rows: Iterator[tuple[int, str, str]]) -> None:
+        self._lines = self._encode(rows)
+        self._buffer = b""
+
+    @staticmethod
+    def _encode(rows: Iterator[tuple[int, str, str]]) -> Iterator[bytes]:
+        out = io.StringIO()
+        writer = csv.writer(out)
+        for row in rows:
+            writer.writerow(row)
+            yield out.getvalue().encode("utf-8")
+            out.seek(0)
+            out.truncate()
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._lines, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _stage_with_copy(db: Session, rows: Iterator[tuple[int, str, str]]) -> None:
+    """PostgreSQL: COPY FROM STDIN (행마다 INSERT를 보내지 않고 한 스트림으로)"""
+    raw_connection = db.connection().connection
+    with raw_connection.cursor() as cursor:
+        cursor.copy_expert(
+            "COPY users_import (line_no, name, email) FROM STDIN WITH (FORMAT csv)",
+            _CopyStream(rows),
+        )
+
+
+def _stage_with_executemany(db: Session, rows: Iterator[tuple[int, str, str]]) -> None:
+    """SQLite 등: BATCH_SIZE행씩 executemany"""
+    stmt = text("INSERT INTO users_import (line_no, name, email) VALUES (:row, :name, :email)")
+    batch: list[dict] = []
+    for row, name, email in rows:
+        batch.append({"row": row, "name": name, "email": email})
+        if len(batch) >= BATCH_SIZE:
+            db.execute(stmt, batch)
+            batch = []
+    if batch:
+        db.execute(stmt, batch)
+
+
+# ===========================================
+# 3~4. 중복 제거 + 본 테이블 반영
+# ===========================================
+
+
+def import_users(db: Session, stream: IO[str], content_type: str) -> dict:
+    """
+    CSV/NDJSON 스트림에서 유저를 한 트랜잭션으로 등록
+
+    Args:
+        db: DB 세션
+        stream: 텍스트 스트림 (CSV는 name,email 헤더 필요 / NDJSON은 한 줄에 객체 하나)
+        content_type: CSV_TYPES 또는 NDJSON_TYPES 중 하나
+
+    Returns:
+        {"inserted": 성공 수, "rejected": 실패 수, "rejects": [{"row", "email", "reason"}, ...]}
+    """
+    report = ImportReport()
+    is_postgres = db.get_bind().dialect.name == "postgresql"
+    use_copy = is_postgres and db.get_bind().dialect.driver == "psycopg2"
+
+    try:
+        db.execute(text(
+            "CREATE TEMPORARY TABLE users_import "
+            "(line_no INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, email VARCHAR(255) NOT NULL)"
+        ))
+
+        rows = iter_valid_rows(stream, content_type, report)
+        if use_copy:
+            _stage_with_copy(db, rows)
+        else:
+            _stage_with_executemany(db, rows)
+
+        # 파일 안 중복: 같은 이메일 중 첫 행만 남긴다
+        duplicates = db.execute(text(
+            "DELETE FROM users_import WHERE line_no IN ("
+            "  SELECT line_no FROM ("
+            "    SELECT line_no, ROW_NUMBER() OVER (PARTITION BY email ORDER BY line_no) AS n"
+            "    FROM users_import"
+            "  ) ranked WHERE n > 1"
+            ") RETURNING line_no, email"
+        ))
+        for row, email in duplicates:
+            report.reject(row, email, "duplicate_in_file")
+
+        if is_postgres:
+            # 다른 요청이 동시에 넣은 이메일까지 ON CONFLICT가 걸러준다
+            existing = db.execute(text(
+                "WITH inserted AS ("
+                "  INSERT INTO users (name, email)"
+                "  SELECT name, email FROM users_import ORDER BY line_no"
+                "  ON CONFLICT (email) DO NOTHING"
+                "  RETURNING email"
+                ") "
+                "SELECT s.line_no, s.email FROM users_import s "
+                "WHERE NOT EXISTS (SELECT 1 FROM inserted i WHERE i.email = s.email)"
+            )).all()
+        else:
+            # SQLite는 INSERT를 CTE 안에 쓸 수 없다 → 먼저 충돌 행을 찾고 넣는다
+            # (SQLite는 쓰기가 직렬화되므로 그 사이에 끼어드는 INSERT가 없다)
+            existing = db.execute(text(
+                "SELECT s.line_no, s.email FROM users_import s JOIN users u ON u.email = s.email"
+            )).all()
+            db.execute(text(
+                "INSERT INTO users (name, email) "
+                "SELECT name, email FROM users_import WHERE true ORDER BY line_no "
+                "ON CONFLICT (email) DO NOTHING"
+            ))
+        for row, email in existing:
+            report.reject(row, email, "email_exists")
+
+        staged = db.execute(text("SELECT COUNT(*) FROM users_import")).scalar_one()
+        report.inserted = staged - len(existing)
+
+        db.execute(text("DROP TABLE users_import"))
+        db.commit()
+    except Exception:
+        db.rollback()
+        _drop_staging_table(db)
+        raise
+
+    return report.to_dict()
+
+
+def _drop_staging_table(db: Session) -> None:
+    """
+    실패한 등록의 임시 테이블 정리
+
+    SQLite(pysqlite)는 CREATE TABLE을 트랜잭션 밖에서 실행해서 rollback으로 지워지지 않는다.
+    남겨 두면 같은 풀 연결을 받은 다음 등록이 "table users_import already exists"로 실패한다.
+    PostgreSQL은 rollback으로 이미 사라졌으므로 IF EXISTS라 아무 일도 하지 않는다.
+    """
+    try:
+        db.execute(text("DROP TABLE IF EXISTS users_import"))
+        db.commit()
+    except Exception:
+        # 연결이 끊긴 경우 등 - 원래 예외를 가리지 않는다 (연결은 풀이 버림)
+        db.rollback()
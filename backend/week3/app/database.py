@@ -10,8 +10,8 @@ Week2에서 가져온 코드를 테스트 환경에 맞게 수정:
 """
 
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 
 # 데이터베이스 URL (환경 변수 또는 기본값)
 # 테스트 시에는 conftest.py에서 SQLite로 오버라이드됨
@@ -23,11 +23,104 @@ DATABASE_URL = os.getenv(
 # SQLite는 check_same_thread=False 필요 (FastAPI가 멀티스레드로 동작하므로)
 connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
 
-# 엔진 생성 (DB와의 연결 풀 관리)
-engine = create_engine(DATABASE_URL, connect_args=connect_args, echo=False)
+# ===========================================
+# SQLite 운영 모드 (SQLITE_TUNED=1)
+# ===========================================
+# 기본 설정(rollback journal)에서는 쓰기 중에 읽기가 막히고,
+# 여러 요청이 동시에 쓰면 "database is locked" 에러가 난다.
+#
+# 운영 모드:
+# - WAL 저널: 읽기와 쓰기가 서로를 막지 않음
+# - synchronous=NORMAL: 커밋마다가 아니라 체크포인트 때만 fsync (WAL에서는 DB가 깨지지 않음)
+# - mmap_size / cache_size: 페이지를 메모리에서 바로 읽도록 크게
+# - 쓰기 엔진은 연결 1개 (pool_size=1) → 쓰기 요청은 풀의 대기열에서 차례를 기다림
+#   (SQLite 파일 락을 두고 경쟁하다 실패하는 대신 줄을 선다)
+# - 읽기 엔진은 연결 SQLITE_READ_POOL_SIZE개, 최대 SQLITE_READ_MAX_CONNECTIONS개 (query_only로 쓰기 금지)
+SQLITE_TUNED = (
+    os.getenv("SQLITE_TUNED", "0") == "1"
+    and DATABASE_URL.startswith("sqlite")
+    and ":memory:" not in DATABASE_URL
+)
+# 읽기 풀은 평소 SQLITE_READ_POOL_SIZE개를 유지하고, 모자라면 SQLITE_READ_MAX_CONNECTIONS개까지 연다.
+# 연결마다 cache_size만큼 메모리를 쓰므로 상한 없이 열면 동시 요청 수에 비례해 메모리가 는다.
+# 상한은 FastAPI 스레드풀 크기(40)와 같게 둔다:
+# 읽기 세션(ReadSession)은 쿼리 결과를 다 읽자마자 핸들러 스레드 안에서 연결을 반납하므로
+# 연결을 쥔 요청 = 스레드에서 실행 중인 핸들러 → 스레드 수보다 많은 연결은 필요 없다.
+# (세션을 닫을 때까지 연결을 쥐고 있으면, 응답 직렬화가 스레드풀에서 빈 스레드를 기다리는 동안
+#  연결을 기다리는 스레드가 스레드풀을 다 차지해 pool_timeout까지 서로 멈춘다)
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+SQLITE_READ_MAX_CONNECTIONS = int(os.getenv("SQLITE_READ_MAX_CONNECTIONS", "40"))
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,  # 256MB
+    "cache_size": -16 * 1024,  # 음수 = KB 단위 → 연결당 16MB (읽기는 주로 mmap으로)
+    "busy_timeout": 5000,  # 체크포인트 등으로 잠깐 잠겨 있으면 5초까지 기다림
+    "temp_store": "MEMORY",
+}
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record, query_only: bool = False):
+    """새 연결마다 PRAGMA 적용 (SQLite PRAGMA는 대부분 연결 단위 설정)"""
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    if query_only:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+if SQLITE_TUNED:
+    # 쓰기 전용 연결 1개 (pool_timeout 동안 차례를 기다림)
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args=connect_args,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=30,
+    )
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+
+    read_engine = create_engine(
+        DATABASE_URL,
+        connect_args=connect_args,
+        pool_size=SQLITE_READ_POOL_SIZE,
+        max_overflow=max(SQLITE_READ_MAX_CONNECTIONS - SQLITE_READ_POOL_SIZE, 0),
+        pool_timeout=30,
+    )
+    event.listen(
+        read_engine,
+        "connect",
+        lambda conn, record: apply_sqlite_pragmas(conn, record, query_only=True),
+    )
+else:
+    # 엔진 생성 (DB와의 연결 풀 관리)
+    engine = create_engine(DATABASE_URL, connect_args=connect_args, echo=False)
+    read_engine = engine
+
+
+class ReadSession(Session):
+    """
+    조회 전용 세션 - execute 결과를 메모리에 다 읽은 뒤 바로 연결을 풀에 반납
+
+    조회는 커밋하지 않으므로 보통 세션은 요청이 끝나 close될 때까지(응답 직렬화 후) 연결을 쥐고 있다.
+    여기서는 쿼리마다 close()해서 연결을 쥐는 시간을 쿼리 실행 시간으로 줄인다.
+    - 쿼리 하나가 트랜잭션 하나 (조회 API는 쿼리가 하나라 차이 없음)
+    - close()는 ORM 객체를 세션에서 떼어낼 뿐 값은 그대로 (지연 로딩은 안 됨 - 조회 API는 Row만 씀)
+    """
+
+    def execute(self, statement, params=None, **kwargs):
+        result = super().execute(statement, params, **kwargs)
+        try:
+            return result.freeze()()
+        finally:
+            self.close()
+
 
 # 세션 팩토리 (DB 작업 단위)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine, class_=ReadSession)
 
 # 모델 베이스 클래스 (모든 모델이 상속받음)
 Base = declarative_base()
@@ -43,3 +136,17 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """
+    조회 전용 API용 세션 (SQLITE_TUNED=1이면 읽기 연결 풀, 아니면 get_db와 같음)
+
+    WAL 모드에서는 커밋된 쓰기가 다른 연결에서도 바로 보이므로
+    방금 쓴 값을 읽지 못하는 문제는 없다.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
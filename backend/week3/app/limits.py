@@ -0,0 +1,14 @@
+"""
+라우트별 요청 제한 (main.py / async_main.py 공용, 구현은 ratelimit.py)
+
+기본 제한(RATE_LIMIT_RPS) 대신 적용하고, 버킷도 따로 센다.
+"""
+
+from .ratelimit import RateLimit
+
+ROUTE_LIMITS: dict[tuple[str, str], RateLimit] = {
+    # 대량 등록은 요청 하나가 수천 행이라 훨씬 적게
+    ("POST", "/users/import"): RateLimit(rate=0.2, burst=2),
+    # 검색은 인덱스만 타지만 목록보다 비싸므로 기본보다 낮게
+    ("GET", "/users/search"): RateLimit(rate=10, burst=20),
+}
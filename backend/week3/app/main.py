@@ -4,68 +4,37 @@
 - SQLAlchemy 2.x 호환 (text() 사용)
 """
 
-from fastapi import FastAPI, Depends, HTTPException
+import io
+import tempfile
+
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
-
-from .database import engine, get_db, Base
-from .models import User
 
-# 앱 시작 시 테이블 생성
+from .bulk_import import CSV_TYPES, NDJSON_TYPES, import_users
+from .database import engine, get_db, get_read_db, Base
+from .limits import ROUTE_LIMITS
+from .models import create_missing_indexes, is_duplicate_email
+from .queries import DELETE_USER, INSERT_USER, SELECT_USER, SELECT_USERS, update_user_stmt
+from .ratelimit import add_rate_limit
+from .schemas import UserCreate, UserImportResult, UserResponse, UserUpdate
+from .search import SearchError, build_user_search
+from .stats import UserCountProvider, get_count_provider
+
+# 앱 시작 시 테이블 생성 (기존 DB에는 새 인덱스만 추가)
 Base.metadata.create_all(bind=engine)
+with engine.begin() as connection:
+    create_missing_indexes(connection)
 
 app = FastAPI(
     title="3주차 - 테스트 대상 CRUD API",
     description="pytest + Locust 테스트를 위한 User CRUD",
     version="0.3.0",
 )
-
-
-# ===========================================
-# Pydantic 스키마
-# ===========================================
-
-
-class UserCreate(BaseModel):
-    """유저 생성 요청 스키마"""
-
-    name: str
-    email: str
-
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "name": "김철수",
-                "email": "kim@example.com",
-            }
-        }
-
-
-class UserUpdate(BaseModel):
-    """유저 수정 요청 스키마 (모두 선택적)"""
-
-    name: str | None = None
-    email: str | None = None
-
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "name": "김영희",
-                "email": "kim.new@example.com",
-            }
-        }
-
-
-class UserResponse(BaseModel):
-    """유저 응답 스키마"""
-
-    id: int
-    name: str
-    email: str
-
-    class Config:
-        from_attributes = True
+# 클라이언트별 요청 제한 (RATE_LIMIT_RPS가 설정된 경우만, ratelimit.py 참고)
+add_rate_limit(app, ROUTE_LIMITS)
 
 
 # ===========================================
@@ -96,31 +65,92 @@ def health_check(db: Session = Depends(get_db)):
 
 @app.post("/users", response_model=UserResponse, status_code=201)
 def create_user(user: UserCreate, db: Session = Depends(get_db)):
-    """새 유저 생성"""
-    existing = db.query(User).filter(User.email == user.email).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="이미 존재하는 이메일입니다")
+    """
+    새 유저 생성
 
-    db_user = User(name=user.name, email=user.email)
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    SELECT로 중복을 먼저 확인하지 않고 바로 INSERT ... RETURNING 한 번으로 처리.
+    중복 이메일은 DB의 유니크 제약이 막아주므로 동시 요청에도 안전하다.
+    (문장은 queries.py에 미리 만들어 둔 것 - 요청마다 값만 넘김)
+    """
+    try:
+        created = db.execute(INSERT_USER, {"name": user.name, "email": user.email}).one()
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if is_duplicate_email(e):
+            raise HTTPException(status_code=400, detail="이미 존재하는 이메일입니다")
+        raise
+
+    return created
+
+
+# 업로드 Body를 이 크기까지는 메모리에, 넘으면 임시 파일에 받아둔다
+IMPORT_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+@app.post("/users/import", response_model=UserImportResult)
+async def import_users_file(request: Request, db: Session = Depends(get_db)):
+    """
+    CSV(text/csv, name,email 헤더) 또는 NDJSON(application/x-ndjson) Body로 유저 대량 등록
+
+    - 잘못된 행 / 파일 안 중복 / 이미 있는 이메일은 건너뛰고 rejects로 보고
+    - 나머지는 한 트랜잭션으로 등록 (PostgreSQL은 COPY, SQLite는 executemany)
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in CSV_TYPES | NDJSON_TYPES:
+        raise HTTPException(
+            status_code=415, detail="text/csv 또는 application/x-ndjson만 지원합니다"
+        )
+
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
 
-    return db_user
+        stream = io.TextIOWrapper(body, encoding="utf-8-sig", newline="")
+        try:
+            # DB 작업은 동기라 스레드풀에서 (이벤트 루프를 막지 않도록)
+            return await run_in_threadpool(import_users, db, stream, content_type)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="UTF-8 인코딩만 지원합니다")
+        finally:
+            stream.detach()
 
 
 @app.get("/users", response_model=list[UserResponse])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
     """모든 유저 조회 (페이지네이션)"""
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    return db.execute(SELECT_USERS, {"skip": skip, "limit": limit}).all()
+
+
+@app.get("/users/search", response_model=list[UserResponse])
+def search_users(
+    name_prefix: str | None = None,
+    email: str | None = None,
+    name_contains: str | None = None,
+    limit: int = 20,
+    db: Session = Depends(get_read_db),
+):
+    """
+    유저 검색 (대소문자 무시, 조건은 AND, 최대 limit개)
+
+    - name_prefix: 이름 접두사 / email: 이메일 일치 / name_contains: 이름 부분 일치 (PostgreSQL 전용)
+    - 인덱스로 처리할 수 없는 조건(조건 없음, 짧은 부분 일치 등)은 400 (search.py 참고)
+    """
+    try:
+        stmt = build_user_search(
+            db.get_bind().dialect.name, name_prefix, email, name_contains, limit
+        )
+    except SearchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return db.execute(stmt).all()
 
 
 @app.get("/users/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+def get_user(user_id: int, db: Session = Depends(get_read_db)):
     """특정 유저 조회"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    user = db.execute(SELECT_USER, {"user_id": user_id}).first()
+    if user is None:
         raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
 
     return user
@@ -128,36 +158,41 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
 
 @app.put("/users/{user_id}", response_model=UserResponse)
 def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
-    """유저 정보 수정 (부분 업데이트)"""
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if not db_user:
-        raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
-
-    if user.name is not None:
-        db_user.name = user.name
-    if user.email is not None:
-        existing = (
-            db.query(User)
-            .filter(User.email == user.email, User.id != user_id)
-            .first()
-        )
-        if existing:
+    """
+    유저 정보 수정 (부분 업데이트)
+
+    UPDATE ... RETURNING 한 번으로 수정 + 결과 조회.
+    수정된 행이 없으면 404, 이메일 중복이면 유니크 제약 위반 → 400
+    """
+    values = user.model_dump(exclude_none=True)
+    if not values:
+        # 바꿀 값이 없으면 조회만
+        current = db.execute(SELECT_USER, {"user_id": user_id}).first()
+        if current is None:
+            raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
+        return current
+
+    stmt, params = update_user_stmt(values)
+    try:
+        updated = db.execute(stmt, {"user_id": user_id, **params}).first()
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if is_duplicate_email(e):
             raise HTTPException(status_code=400, detail="이미 존재하는 이메일입니다")
-        db_user.email = user.email
+        raise
 
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    if updated is None:
+        raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
+    return updated
 
 
 @app.delete("/users/{user_id}")
 def delete_user(user_id: int, db: Session = Depends(get_db)):
-    """유저 삭제"""
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if not db_user:
+    """유저 삭제 (조회 후 삭제 두 번 대신 DELETE ... RETURNING 한 번으로 삭제 여부 확인)"""
+    deleted = db.execute(DELETE_USER, {"user_id": user_id}).first()
+    if deleted is None:
         raise HTTPException(status_code=404, detail="유저를 찾을 수 없습니다")
-
-    db.delete(db_user)
     db.commit()
 
     return {"message": "삭제 완료", "deleted_id": user_id}
@@ -169,7 +204,15 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
 
 
 @app.get("/stats")
-def get_stats(db: Session = Depends(get_db)):
-    """전체 유저 수 조회"""
-    total_users = db.query(User).count()
-    return {"total_users": total_users}
+def get_stats(
+    db: Session = Depends(get_read_db),
+    counter: UserCountProvider = Depends(get_count_provider),
+):
+    """
+    전체 유저 수 조회
+
+    COUNT(*) 대신 카운터/통계 값을 캐시해서 응답 (최대 STATS_CACHE_TTL초 전 값)
+    count_mode: exact(카운터) 또는 estimate(PostgreSQL 통계 추정치)
+    """
+    total_users, count_mode = counter.get(db)
+    return {"total_users": total_users, "count_mode": count_mode}
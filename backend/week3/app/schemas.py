@@ -0,0 +1,63 @@
+"""
+Pydantic 스키마 (요청/응답 형식)
+- 동기 앱(main.py)과 비동기 앱(async_main.py)이 함께 사용
+"""
+
+from pydantic import BaseModel
+
+
+class UserCreate(BaseModel):
+    """유저 생성 요청 스키마"""
+
+    name: str
+    email: str
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "name": "김철수",
+                "email": "kim@example.com",
+            }
+        }
+
+
+class UserUpdate(BaseModel):
+    """유저 수정 요청 스키마 (모두 선택적)"""
+
+    name: str | None = None
+    email: str | None = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "name": "김영희",
+                "email": "kim.new@example.com",
+            }
+        }
+
+
+class UserResponse(BaseModel):
+    """유저 응답 스키마"""
+
+    id: int
+    name: str
+    email: str
+
+    class Config:
+        from_attributes = True
+
+
+class ImportReject(BaseModel):
+    """대량 등록에서 거부된 행"""
+
+    row: int
+    email: str | None
+    reason: str
+
+
+class UserImportResult(BaseModel):
+    """대량 등록 결과 (rejects는 앞에서부터 최대 1000개)"""
+
+    inserted: int
+    rejected: int
+    rejects: list[ImportReject]
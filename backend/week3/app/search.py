@@ -0,0 +1,88 @@
+"""
+유저 검색 (GET /users/search)
+
+모든 검색 조건은 인덱스로 찾을 수 있는 형태로만 만든다 (테이블 전체 스캔 없음).
+
+- email: 대소문자 무시 일치 → lower(email) = lower(:email)           (ix_users_email_lower)
+- name_prefix: 대소문자 무시 접두사 → lower(name) 범위 조건           (ix_users_name_prefix / ix_users_name_lower)
+  LIKE 'abc%'는 SQLite에서 인덱스를 못 타고(기본이 대소문자 무시 LIKE),
+  PostgreSQL도 파라미터 바인딩된 준비문(asyncpg)에서는 범위로 바꾸지 못하므로 범위로 직접 쓴다.
+- name_contains: 부분 일치 → lower(name) LIKE '%...%'               (ix_users_name_trgm, PostgreSQL 전용)
+  트라이그램 인덱스가 없는 DB에서는 전체 스캔이 되므로 SearchError
+
+조건이 하나도 없으면 전체 목록이 되므로 SearchError (목록은 GET /users).
+"""
+
+from sqlalchemy import Select, func, literal, select
+
+from .models import USER_COLUMNS, User
+
+SEARCH_MAX_LIMIT = 100
+# 트라이그램은 3글자 단위 → 더 짧은 검색어는 인덱스로 후보를 줄이지 못한다
+CONTAINS_MIN_LENGTH = 3
+# 범위 조건의 상한: 접두사 뒤에 붙일 수 있는 가장 큰 문자 (UTF-8 바이트 순서로도 최대)
+MAX_CHAR = "\U0010ffff"
+
+
+class SearchError(ValueError):
+    """인덱스로 처리할 수 없는 검색 조건 (→ 400)"""
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def build_user_search(
+    dialect_name: str,
+    name_prefix: str | None = None,
+    email: str | None = None,
+    name_contains: str | None = None,
+    limit: int = 20,
+) -> Select:
+    """
+    검색 SELECT 생성 (조건은 AND로 결합)
+
+    Args:
+        dialect_name: "postgresql" / "sqlite" (인덱스 표현식이 DB마다 다름)
+        name_prefix: 이름 접두사 (대소문자 무시)
+        email: 이메일 (대소문자 무시 일치)
+        name_contains: 이름 부분 문자열 (대소문자 무시, PostgreSQL 전용)
+        limit: 최대 개수 (1 ~ SEARCH_MAX_LIMIT)
+
+    Raises:
+        SearchError: 조건이 없거나 인덱스로 처리할 수 없는 조건
+    """
+    if not (name_prefix or email or name_contains):
+        raise SearchError("name_prefix, email, name_contains 중 하나 이상 필요합니다")
+    if not 1 <= limit <= SEARCH_MAX_LIMIT:
+        raise SearchError(f"limit은 1 ~ {SEARCH_MAX_LIMIT} 사이여야 합니다")
+
+    is_postgres = dialect_name == "postgresql"
+    name_lower = func.lower(User.name)
+    if is_postgres:
+        # ix_users_name_prefix와 같은 표현식이어야 인덱스를 탄다
+        name_lower = name_lower.collate("C")
+
+    stmt = select(*USER_COLUMNS)
+
+    if email:
+        stmt = stmt.where(func.lower(User.email) == func.lower(literal(email)))
+
+    if name_prefix:
+        prefix = func.lower(literal(name_prefix))
+        stmt = stmt.where(name_lower >= prefix, name_lower < prefix.concat(MAX_CHAR))
+
+    if name_contains:
+        if not is_postgres:
+            raise SearchError("name_contains는 PostgreSQL(pg_trgm)에서만 지원합니다")
+        if len(name_contains) < CONTAINS_MIN_LENGTH:
+            raise SearchError(f"name_contains는 {CONTAINS_MIN_LENGTH}글자 이상이어야 합니다")
+        pattern = "%" + _escape_like(name_contains.lower()) + "%"
+        stmt = stmt.where(func.lower(User.name).like(pattern, escape="\\"))
+
+    # 접두사 검색은 인덱스 순서 그대로 읽고 limit에서 멈춘다
+    if name_prefix:
+        stmt = stmt.order_by(name_lower, User.id)
+    else:
+        stmt = stmt.order_by(User.id)
+    return stmt.limit(limit)
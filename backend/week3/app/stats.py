@@ -0,0 +1,105 @@
+"""
+유저 수 조회 (GET /stats)
+
+SELECT COUNT(*) FROM users는 요청마다 테이블 전체를 읽는다 (유저가 많을수록 느려짐).
+대신 두 가지 값 중 하나를 쓰고, 그 값도 ttl초 동안 메모리에 캐시한다.
+
+- exact: 트리거가 유지하는 users_count 카운터 합계 (정확, 행 16개만 읽음)
+- estimate: PostgreSQL 통계(pg_class.reltuples) - ANALYZE/autovacuum 시점 기준 추정치
+  (PostgreSQL이 아니거나 아직 통계가 없으면 exact로 대신)
+
+캐시가 만료된 순간 요청이 몰려도 DB 조회는 한 요청만 한다 (single-flight).
+나머지 요청은 갱신을 기다리지 않고 직전 값을 그대로 돌려준다.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .models import UserCount
+
+COUNT_MODES = ("exact", "estimate")
+
+
+class UserCountProvider:
+    """
+    유저 수 캐시
+
+    사용법:
+        provider = UserCountProvider(mode="estimate", ttl=5.0)
+        total, mode = provider.get(db)   # mode: 실제로 사용한 방식
+    """
+
+    def __init__(self, mode: str = "exact", ttl: float = 1.0) -> None:
+        if mode not in COUNT_MODES:
+            raise ValueError(f"지원하지 않는 mode: {mode} (exact 또는 estimate)")
+        self.mode = mode
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._async_lock = asyncio.Lock()
+        self._cached: tuple[int, str] | None = None
+        self._expires_at = 0.0
+
+    def get(self, db: Session) -> tuple[int, str]:
+        """(유저 수, 사용한 방식) 반환"""
+        cached = self._cached
+        if cached is not None and time.monotonic() < self._expires_at:
+            return cached
+
+        # 이미 다른 요청이 갱신 중이면 직전 값으로 바로 응답
+        if not self._lock.acquire(blocking=cached is None):
+            return cached
+        try:
+            # 락을 기다리는 동안 다른 요청이 갱신했을 수 있음
+            if self._cached is not None and time.monotonic() < self._expires_at:
+                return self._cached
+            self._cached = self._load(db)
+            self._expires_at = time.monotonic() + self.ttl
+            return self._cached
+        finally:
+            self._lock.release()
+
+    async def aget(self, db: AsyncSession) -> tuple[int, str]:
+        """get()의 비동기 버전 (async_main.py용, 이벤트 루프를 막지 않도록 asyncio.Lock 사용)"""
+        cached = self._cached
+        if cached is not None and time.monotonic() < self._expires_at:
+            return cached
+        if cached is not None and self._async_lock.locked():
+            return cached
+
+        async with self._async_lock:
+            if self._cached is not None and time.monotonic() < self._expires_at:
+                return self._cached
+            self._cached = await db.run_sync(self._load)
+            self._expires_at = time.monotonic() + self.ttl
+            return self._cached
+
+    def _load(self, db: Session) -> tuple[int, str]:
+        if self.mode == "estimate" and db.get_bind().dialect.name == "postgresql":
+            estimate = db.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'users'::regclass")
+            ).scalar()
+            # 한 번도 ANALYZE되지 않은 테이블은 -1 (PostgreSQL 14+) 또는 0
+            if estimate is not None and estimate > 0:
+                return estimate, "estimate"
+
+        total = db.execute(select(func.coalesce(func.sum(UserCount.count), 0))).scalar_one()
+        return total, "exact"
+
+
+# 환경 변수로 방식/캐시 시간 설정
+count_provider = UserCountProvider(
+    mode=os.getenv("STATS_COUNT_MODE", "exact"),
+    ttl=float(os.getenv("STATS_CACHE_TTL", "1.0")),
+)
+
+
+def get_count_provider() -> UserCountProvider:
+    """FastAPI 의존성 주입용 (테스트에서 캐시 없는 provider로 교체)"""
+    return count_provider
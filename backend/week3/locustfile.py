@@ -23,9 +23,15 @@ Locust란?
    - Start!
 """
 
+import math
+import os
 import random
 import uuid
-from locust import HttpUser, task, between
+from locust import HttpUser, LoadTestShape, task, between, constant_throughput
+
+# 부하 모양 선택 (아래 "부하 모양" 섹션): load / stress / spike / arrival
+# 지정하지 않으면 shape 없이 -u / -r / -t 옵션 그대로 실행
+LOAD_SHAPE = os.getenv("LOAD_SHAPE", "")
 
 
 class UserCRUDUser(HttpUser):
@@ -224,7 +230,7 @@ class UserCRUDUser(HttpUser):
 
 class MixedWorkloadUser(HttpUser):
     """
-    TODO: 복합 워크플로우 시나리오
+    복합 워크플로우 시나리오
 
     실제 사용자의 행동 패턴을 시뮬레이션:
     1. 유저 생성
@@ -232,24 +238,66 @@ class MixedWorkloadUser(HttpUser):
     3. 유저 정보 수정
     4. 유저 삭제
 
-    하나의 @task에서 순차적으로 실행
+    하나의 @task에서 순차적으로 실행 (앞 단계가 실패하면 뒤 단계는 건너뜀)
     """
 
     wait_time = between(2, 5)
 
     @task
     def complete_workflow(self):
-        """
-        TODO: 전체 워크플로우를 하나의 태스크로 작성
+        """생성 → 조회 → 수정 → 삭제 (단계별로 Locust 통계에 따로 기록)"""
+        # uuid 전체를 써서 동시 유저가 많아도 이메일이 겹치지 않게
+        unique_id = uuid.uuid4().hex
+        email = f"workflow_{unique_id}@loadtest.com"
 
-        힌트:
-        1. POST /users 로 유저 생성, ID 저장
-        2. GET /users/{id} 로 생성 확인
-        3. PUT /users/{id} 로 이름 수정
-        4. DELETE /users/{id} 로 삭제
-        5. 각 단계에서 status_code 확인
-        """
-        pass
+        # 1. 생성
+        with self.client.post(
+            "/users",
+            json={"name": f"워크플로우_{unique_id[:8]}", "email": email},
+            name="/users [WF 1 POST - Create]",
+            catch_response=True,
+        ) as response:
+            if response.status_code != 201:
+                response.failure(f"유저 생성 실패: {response.status_code}")
+                return
+            user_id = response.json()["id"]
+
+        # 2. 생성 확인
+        with self.client.get(
+            f"/users/{user_id}",
+            name="/users/{id} [WF 2 GET - Verify]",
+            catch_response=True,
+        ) as response:
+            if response.status_code != 200:
+                response.failure(f"생성한 유저 조회 실패: {response.status_code}")
+                return
+            if response.json().get("email") != email:
+                response.failure("조회한 이메일이 생성한 값과 다름")
+                return
+
+        # 3. 이름 수정
+        new_name = f"수정된유저_{unique_id[:6]}"
+        with self.client.put(
+            f"/users/{user_id}",
+            json={"name": new_name},
+            name="/users/{id} [WF 3 PUT - Update]",
+            catch_response=True,
+        ) as response:
+            if response.status_code != 200:
+                response.failure(f"유저 수정 실패: {response.status_code}")
+                return
+            if response.json().get("name") != new_name:
+                response.failure("수정한 이름이 반영되지 않음")
+                return
+
+        # 4. 삭제
+        with self.client.delete(
+            f"/users/{user_id}",
+            name="/users/{id} [WF 4 DELETE]",
+            catch_response=True,
+        ) as response:
+            if response.status_code != 200:
+                response.failure(f"유저 삭제 실패: {response.status_code}")
 
 
 # ===========================================
@@ -259,19 +307,144 @@ class MixedWorkloadUser(HttpUser):
 
 class StressTestUser(HttpUser):
     """
-    TODO: 스트레스 테스트 시나리오
+    스트레스 테스트 시나리오
 
     시스템의 한계를 테스트:
     - wait_time을 최소화 (연속 요청)
     - 대량 유저 생성 (쓰기 위주 부하)
+    """
+
+    wait_time = between(0.1, 0.5)
+
+    @task
+    def create_user(self):
+        """유저 생성만 반복 (uuid 전체로 고유 이메일)"""
+        unique_id = uuid.uuid4().hex
+        with self.client.post(
+            "/users",
+            json={"name": f"스트레스_{unique_id[:8]}", "email": f"stress_{unique_id}@loadtest.com"},
+            name="/users [POST - Stress]",
+            catch_response=True,
+        ) as response:
+            if response.status_code == 201:
+                response.success()
+            else:
+                response.failure(f"유저 생성 실패: {response.status_code}")
+
 
-    힌트:
-    - wait_time = between(0.1, 0.5)
-    - @task에서 유저 생성만 반복
-    - uuid로 고유 이메일 생성
+# ===========================================
+# 고정 도착률 시나리오 (LOAD_SHAPE=arrival 전용)
+# ===========================================
+
+# 목표 초당 요청 수 / 실행 시간(초)
+TARGET_RPS = float(os.getenv("TARGET_RPS", "50"))
+ARRIVAL_DURATION = int(os.getenv("ARRIVAL_DURATION", "300"))
+# 유저 1명이 초당 보내는 요청 수 (0.5 → 2초에 한 번)
+# 응답이 1 / ARRIVAL_RATE_PER_USER초(= 2초)보다 느려지기 전까지는 서버 속도와 상관없이 도착률 유지
+ARRIVAL_RATE_PER_USER = 0.5
+
+
+class ArrivalRateUser(HttpUser):
+    """
+    고정 도착률(open model) 사용자
+
+    일반 시나리오(closed model)는 서버가 느려지면 유저가 응답을 기다리느라 요청도 줄어서
+    과부하가 실제보다 덜 보인다. 이 유저는 constant_throughput으로 요청 간격을 고정하고,
+    ConstantArrivalRateShape가 유저 수 = TARGET_RPS / ARRIVAL_RATE_PER_USER 로 맞춘다.
+
+    태스크마다 요청을 정확히 한 번 보낸다 (조회할 ID가 없어 건너뛰는 태스크 없음).
+    """
+
+    abstract = LOAD_SHAPE != "arrival"
+    wait_time = constant_throughput(ARRIVAL_RATE_PER_USER)
+    created_user_ids = []
+    tasks = {
+        UserCRUDUser.list_users: 3,
+        UserCRUDUser.create_user: 1,
+        UserCRUDUser.get_stats: 1,
+    }
+
+
+# ===========================================
+# 부하 모양 (LoadTestShape)
+# ===========================================
+#
+# Locust는 locustfile에 있는 shape 클래스 중 첫 번째를 쓰므로,
+# LOAD_SHAPE로 고른 것 하나만 abstract = False가 되게 한다.
+#
+#   LOAD_SHAPE=load   uv run locust --config capacity.conf UserCRUDUser
+#   LOAD_SHAPE=stress uv run locust --config capacity.conf StressTestUser
+#   LOAD_SHAPE=spike  uv run locust --config capacity.conf UserCRUDUser
+#   LOAD_SHAPE=arrival TARGET_RPS=100 uv run locust --config capacity.conf ArrivalRateUser
+
+
+class StagesShape(LoadTestShape):
     """
+    단계별 부하 (기본 클래스)
+
+    stages: (끝나는 시각(초), 유저 수, spawn rate) 목록 - 마지막 단계가 끝나면 테스트 종료
+    """
+
+    abstract = True
+    stages: list[tuple[int, int, float]] = []
+
+    def tick(self):
+        run_time = self.get_run_time()
+        for end, users, spawn_rate in self.stages:
+            if run_time < end:
+                return users, spawn_rate
+        return None
+
+
+class LoadShape(StagesShape):
+    """부하 테스트: 50명까지 올려서 유지 (5분) - 정상 부하에서의 성능"""
+
+    abstract = LOAD_SHAPE != "load"
+    stages = [
+        (60, 25, 5),
+        (300, 50, 5),
+    ]
+
+
+class StressShape(StagesShape):
+    """스트레스 테스트: 100명씩 90초마다 500명까지 (7분 30초) - 어느 단계에서 무너지는지"""
+
+    abstract = LOAD_SHAPE != "stress"
+    stages = [
+        (90, 100, 20),
+        (180, 200, 20),
+        (270, 300, 20),
+        (360, 400, 20),
+        (450, 500, 20),
+    ]
+
+
+class SpikeShape(StagesShape):
+    """스파이크 테스트: 10명 → 200명 (1분) → 10명 (3분) - 급증과 회복"""
+
+    abstract = LOAD_SHAPE != "spike"
+    stages = [
+        (60, 10, 10),
+        (120, 200, 50),
+        (180, 10, 50),
+    ]
+
+
+class ConstantArrivalRateShape(LoadTestShape):
+    """고정 도착률: ArrivalRateUser를 TARGET_RPS에 맞는 수만큼 띄워 ARRIVAL_DURATION초 유지"""
+
+    abstract = LOAD_SHAPE != "arrival"
+
+    def tick(self):
+        if self.get_run_time() >= ARRIVAL_DURATION:
+            return None
+        users = math.ceil(TARGET_RPS / ARRIVAL_RATE_PER_USER)
+        return users, min(users, 50), [ArrivalRateUser]
+
 
-    pass
+SHAPES = ("load", "stress", "spike", "arrival")
+if LOAD_SHAPE and LOAD_SHAPE not in SHAPES:
+    raise ValueError(f"지원하지 않는 LOAD_SHAPE: {LOAD_SHAPE} ({' / '.join(SHAPES)})")
 
 
 # ===========================================
@@ -279,7 +452,7 @@ class StressTestUser(HttpUser):
 # ===========================================
 
 """
-시나리오별 권장 설정:
+시나리오별 권장 설정 (LOAD_SHAPE로 고르면 아래 단계가 자동으로 적용됨):
 
 1. 부하 테스트 (Load Test):
    - Users: 10~50
@@ -2,67 +2,168 @@
 pytest 픽스처 설정
 
 핵심 전략:
-- SQLite 인메모리 DB로 PostgreSQL 대체 (테스트 속도 + 격리)
+- SQLite DB로 PostgreSQL 대체 (테스트 속도 + 격리)
 - app.dependency_overrides로 get_db를 테스트용 세션으로 교체
-- 각 테스트 함수마다 새로운 DB 생성 (완벽한 격리)
+- 테이블은 워커(프로세스)마다 한 번만 만들고, 테스트마다 연결 단위 트랜잭션을 롤백해서 격리
+  (테스트마다 CREATE/DROP TABLE을 하지 않음)
+- client를 쓰는 테스트는 동기 앱(main.py)과 비동기 앱(async_main.py)에 각각 한 번씩 실행
+
+병렬 실행 (pytest-xdist): 워커마다 자기 DB를 쓰므로 그대로 돌리면 된다
+    pytest -n auto
+    pytest --test-db=file     # 인메모리 대신 워커별 임시 파일 DB
 """
 
+import os
+
+# 앱 모듈은 import 시점에 DATABASE_URL로 엔진을 만들고 create_all을 실행한다.
+# 테스트에서는 그 엔진을 쓰지 않으므로 (get_db를 교체) 인메모리로 돌려서
+# 워커들이 같은 app.db 파일에 동시에 DDL을 날리지 않게 한다.
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ.pop("SQLITE_TUNED", None)
+os.environ.pop("RATE_LIMIT_RPS", None)
+
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
 from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 
-from app.database import Base, get_db
+from app.async_database import get_async_db, to_async_url
+from app.async_main import app as async_app
+from app.database import Base, get_db, get_read_db
 from app.main import app
 from app.models import User
+from app.stats import UserCountProvider, get_count_provider
 
 # SQLite 인메모리 DB (파일 생성 없이 메모리에서만 동작)
 TEST_DATABASE_URL = "sqlite:///:memory:"
 
 
-@pytest.fixture(scope="function")
-def test_db():
+def pytest_addoption(parser):
+    parser.addoption(
+        "--test-db",
+        choices=("memory", "file"),
+        default="memory",
+        help="동기 테스트용 DB: memory(인메모리 + StaticPool, 기본) 또는 file(워커별 임시 파일)",
+    )
+
+
+def _enable_sqlite_savepoints(engine):
+    """
+    pysqlite 드라이버의 트랜잭션 처리를 SQLAlchemy에 맡긴다 (SAVEPOINT가 제대로 동작하도록)
+
+    pysqlite는 BEGIN을 DML 직전에 알아서 보내서 SAVEPOINT / 롤백 범위가 어긋난다.
+    → 드라이버의 자동 BEGIN을 끄고, SQLAlchemy가 트랜잭션을 시작할 때 직접 BEGIN
     """
-    각 테스트 함수마다 새로운 인메모리 DB 생성
 
-    scope="function":
-    - 테스트 함수마다 새 DB → 완벽한 격리
-    - 느리지만 안전 (테스트 간 데이터 오염 없음)
+    @event.listens_for(engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def do_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
 
-    흐름:
-    1. 엔진 생성 (SQLite 인메모리)
-    2. 테이블 생성 (create_all)
-    3. 세션 생성 → yield (테스트에서 사용)
-    4. 세션 닫기 + 테이블 삭제 (정리)
+def _create_file_engine(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    with engine.connect() as conn:
+        # 이 세션이 읽는 동안에도 비동기 앱이 쓸 수 있도록
+        conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+    return engine
+
+
+@pytest.fixture(scope="session")
+def test_engine(request, tmp_path_factory):
     """
-    engine = create_engine(
-        TEST_DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
+    동기 테스트용 엔진 - 워커(프로세스)마다 하나, 테이블은 한 번만 생성
+
+    - memory: 인메모리 + StaticPool (모든 세션이 같은 연결 하나를 공유해야 같은 DB를 봄)
+    - file: tmp_path_factory 아래 파일 (xdist 워커마다 다른 디렉터리)
+    """
+    if request.config.getoption("--test-db") == "file":
+        engine = _create_file_engine(tmp_path_factory.mktemp("db") / "test.db")
+    else:
+        engine = create_engine(
+            TEST_DATABASE_URL,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    _enable_sqlite_savepoints(engine)
     Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
 
-    TestingSessionLocal = sessionmaker(
-        autocommit=False, autoflush=False, bind=engine
-    )
-    db = TestingSessionLocal()
+
+@pytest.fixture(scope="session")
+def async_test_engine(tmp_path_factory):
+    """
+    비동기 앱 테스트용 파일 DB 엔진 (워커마다 하나)
+
+    aiosqlite 연결은 test_db 세션과 다른 연결이라 인메모리 DB도, 연결 단위 트랜잭션도
+    공유할 수 없다 → 실제로 커밋하고 테스트가 끝나면 행을 지운다.
+    """
+    engine = _create_file_engine(tmp_path_factory.mktemp("async_db") / "test.db")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(params=["sync", "async"])
+def app_mode(request):
+    """테스트할 앱 (sync: main.py, async: async_main.py)"""
+    return request.param
+
+
+@pytest.fixture(scope="function")
+def test_db(request):
+    """
+    테스트 함수마다 격리된 DB 세션
+
+    동기 테스트 흐름 (DDL 없이 롤백만):
+    1. 연결을 열고 바깥 트랜잭션 시작
+    2. 세션은 그 안의 SAVEPOINT에서 동작 (join_transaction_mode="create_savepoint")
+       → 테스트/엔드포인트의 commit()/rollback()은 SAVEPOINT까지만
+    3. 끝나면 바깥 트랜잭션 롤백 → 테스트가 만든 데이터가 모두 사라짐
+
+    비동기 앱 테스트는 async_test_engine에 실제로 커밋하고, 끝나면 users 행을 지운다.
+    """
+    if "app_mode" in request.fixturenames and request.getfixturevalue("app_mode") == "async":
+        engine = request.getfixturevalue("async_test_engine")
+        db = Session(bind=engine, autoflush=False)
+        try:
+            yield db
+        finally:
+            db.close()
+            with engine.begin() as conn:
+                # users_count는 DELETE 트리거가 맞춰 준다
+                conn.execute(User.__table__.delete())
+        return
+
+    connection = request.getfixturevalue("test_engine").connect()
+    transaction = connection.begin()
+    db = Session(bind=connection, autoflush=False, join_transaction_mode="create_savepoint")
 
     try:
         yield db
     finally:
         db.close()
-        Base.metadata.drop_all(bind=engine)
+        transaction.rollback()
+        connection.close()
 
 
 @pytest.fixture(scope="function")
-def client(test_db):
+def client(test_db, app_mode):
     """
     FastAPI TestClient (HTTP 요청 시뮬레이션)
 
     핵심: app.dependency_overrides로 get_db를 교체
     → 모든 API 엔드포인트가 테스트용 SQLite DB를 사용
     """
+    if app_mode == "async":
+        yield from _async_client(test_db)
+        return
 
     def override_get_db():
         try:
@@ -71,6 +172,9 @@ def client(test_db):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    # /stats 캐시 끄기 (테스트마다 데이터가 롤백되므로)
+    app.dependency_overrides[get_count_provider] = lambda: UserCountProvider(ttl=0)
 
     with TestClient(app) as test_client:
         yield test_client
@@ -78,6 +182,28 @@ def client(test_db):
     app.dependency_overrides.clear()
 
 
+def _async_client(test_db):
+    """비동기 앱용 TestClient (test_db와 같은 파일 DB에 aiosqlite로 연결)"""
+    engine = create_async_engine(to_async_url(str(test_db.get_bind().url)))
+    TestingAsyncSessionLocal = async_sessionmaker(
+        engine, autoflush=False, expire_on_commit=False
+    )
+
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
+    async_app.dependency_overrides[get_async_db] = override_get_async_db
+    async_app.dependency_overrides[get_count_provider] = lambda: UserCountProvider(ttl=0)
+
+    with TestClient(async_app) as test_client:
+        yield test_client
+        # 연결은 TestClient의 이벤트 루프에서 만들어졌으므로 같은 루프에서 닫는다
+        test_client.portal.call(engine.dispose)
+
+    async_app.dependency_overrides.clear()
+
+
 # ===========================================
 # 데이터 픽스처
 # ===========================================
@@ -46,6 +46,7 @@ class TestHealthEndpoints:
 
         assert response.status_code == 200
         assert response.json()["total_users"] == 0
+        assert response.json()["count_mode"] == "exact"
 
 
 # ===========================================
@@ -78,6 +79,18 @@ class TestCreateUser:
         assert response.status_code == 400
         assert "이미 존재하는 이메일" in response.json()["detail"]
 
+    def test_create_user_after_duplicate_email(
+        self, client, sample_user_data, second_user_data
+    ):
+        """중복 이메일 실패(롤백) 후에도 다음 생성은 정상 동작"""
+        client.post("/users", json=sample_user_data)
+        client.post("/users", json=sample_user_data)
+
+        response = client.post("/users", json=second_user_data)
+
+        assert response.status_code == 201
+        assert client.get("/stats").json()["total_users"] == 2
+
     def test_create_user_missing_name(self, client):
         """name 누락 → 422 (Validation Error)"""
         response = client.post("/users", json={"email": "test@example.com"})
@@ -227,6 +240,28 @@ class TestUpdateUser:
         assert response.status_code == 400
         assert "이미 존재하는 이메일" in response.json()["detail"]
 
+    def test_update_user_duplicate_email_changes_nothing(
+        self, client, sample_user_in_db, second_user_data
+    ):
+        """이메일 중복으로 실패하면 같이 보낸 이름도 바뀌지 않는다 (한 문장으로 수정)"""
+        client.post("/users", json=second_user_data)
+
+        response = client.put(
+            f"/users/{sample_user_in_db.id}",
+            json={"name": "바뀌면안됨", "email": second_user_data["email"]},
+        )
+
+        assert response.status_code == 400
+        assert client.get(f"/users/{sample_user_in_db.id}").json()["name"] == "김철수"
+
+    def test_update_user_empty_body(self, client, sample_user_in_db):
+        """바꿀 값이 없으면 현재 상태 그대로 반환"""
+        response = client.put(f"/users/{sample_user_in_db.id}", json={})
+
+        assert response.status_code == 200
+        assert response.json()["email"] == sample_user_in_db.email
+        assert client.put("/users/99999", json={}).status_code == 404
+
     def test_update_user_own_email(self, client, sample_user_in_db):
         """
         TODO: 자기 자신의 이메일로 수정 → 200 (에러 아님)
@@ -270,6 +305,178 @@ class TestDeleteUser:
         pass
 
 
+# ===========================================
+# 5-1. 유저 대량 등록 (POST /users/import) 테스트
+# ===========================================
+
+
+class TestImportUsers:
+    """POST /users/import 엔드포인트 테스트 (SQLite → executemany 경로)"""
+
+    def test_import_csv(self, client):
+        """CSV 등록 → 전부 inserted"""
+        body = "name,email\n김철수,kim@example.com\n이영희,lee@example.com\n"
+        response = client.post(
+            "/users/import", content=body, headers={"Content-Type": "text/csv"}
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"inserted": 2, "rejected": 0, "rejects": []}
+        assert client.get("/stats").json()["total_users"] == 2
+
+    def test_import_ndjson(self, client):
+        """NDJSON 등록 (빈 줄은 무시)"""
+        body = (
+            '{"name": "김철수", "email": "kim@example.com"}\n'
+            "\n"
+            '{"name": "이영희", "email": "lee@example.com"}\n'
+        )
+        response = client.post(
+            "/users/import",
+            content=body.encode("utf-8"),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["inserted"] == 2
+
+    def test_import_reports_rejects(self, client, sample_user_in_db):
+        """잘못된 행 / 파일 안 중복 / 이미 있는 이메일 → rejects, 나머지는 등록"""
+        body = (
+            '{"name": "새유저", "email": "new@example.com"}\n'
+            "not json\n"
+            '{"name": "", "email": "empty@example.com"}\n'
+            '{"name": "중복", "email": "new@example.com"}\n'
+            f'{{"name": "기존", "email": "{sample_user_in_db.email}"}}\n'
+        )
+        response = client.post(
+            "/users/import",
+            content=body.encode("utf-8"),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["inserted"] == 1
+        assert data["rejected"] == 4
+        assert [r["row"] for r in data["rejects"]] == [2, 3, 4, 5]
+        reasons = [r["reason"] for r in data["rejects"]]
+        assert reasons[0].startswith("invalid_json")
+        assert reasons[1:] == ["invalid_name", "duplicate_in_file", "email_exists"]
+
+        # 기존 유저는 그대로, 새 유저는 첫 행 값으로 등록
+        users = {u["email"]: u["name"] for u in client.get("/users").json()}
+        assert users == {
+            sample_user_in_db.email: sample_user_in_db.name,
+            "new@example.com": "새유저",
+        }
+
+    def test_import_many_rows(self, client):
+        """배치 크기(1000)를 넘는 행도 모두 등록"""
+        rows = "".join(f"user{i},user{i}@example.com\n" for i in range(2500))
+        response = client.post(
+            "/users/import",
+            content="name,email\n" + rows,
+            headers={"Content-Type": "text/csv"},
+        )
+
+        assert response.json()["inserted"] == 2500
+        assert client.get("/stats").json()["total_users"] == 2500
+
+    def test_import_after_failed_import(self, client):
+        """실패한 등록(UTF-8 아님)이 임시 테이블을 남기지 않아 다음 등록이 정상 동작"""
+        failed = client.post(
+            "/users/import",
+            content=b"name,email\n\xff\xfe,bad@example.com\n",
+            headers={"Content-Type": "text/csv"},
+        )
+        response = client.post(
+            "/users/import",
+            content="name,email\n김철수,kim@example.com\n",
+            headers={"Content-Type": "text/csv"},
+        )
+
+        assert failed.status_code == 400
+        assert response.status_code == 200
+        assert response.json()["inserted"] == 1
+
+    def test_import_unsupported_content_type(self, client):
+        """지원하지 않는 Content-Type → 415"""
+        response = client.post("/users/import", json=[{"name": "a", "email": "a@b.c"}])
+
+        assert response.status_code == 415
+
+
+# ===========================================
+# 5-2. 유저 검색 (GET /users/search) 테스트
+# ===========================================
+
+
+class TestSearchUsers:
+    """GET /users/search 엔드포인트 테스트 (인덱스 사용 여부는 유닛 테스트에서)"""
+
+    SEARCH_USERS = [
+        ("Kim Chulsoo", "Kim@Example.com"),
+        ("kimberly", "kimberly@example.com"),
+        ("Lee Younghee", "lee@example.com"),
+        ("Ki_m", "underscore@example.com"),
+    ]
+
+    def _create_users(self, client):
+        for name, email in self.SEARCH_USERS:
+            client.post("/users", json={"name": name, "email": email})
+
+    def test_search_by_email_ignores_case(self, client):
+        """email은 대소문자 무시 일치"""
+        self._create_users(client)
+        response = client.get("/users/search", params={"email": "KIM@example.COM"})
+
+        assert response.status_code == 200
+        assert [u["email"] for u in response.json()] == ["Kim@Example.com"]
+
+    def test_search_by_name_prefix(self, client):
+        """name_prefix는 대소문자 무시 접두사, 이름 순"""
+        self._create_users(client)
+        response = client.get("/users/search", params={"name_prefix": "KIM"})
+
+        assert [u["name"] for u in response.json()] == ["Kim Chulsoo", "kimberly"]
+
+    def test_search_prefix_is_not_a_pattern(self, client):
+        """_ / % 는 와일드카드가 아니라 글자 그대로"""
+        self._create_users(client)
+        response = client.get("/users/search", params={"name_prefix": "ki_"})
+
+        assert [u["name"] for u in response.json()] == ["Ki_m"]
+
+    def test_search_conditions_are_combined(self, client):
+        """조건 여러 개는 AND"""
+        self._create_users(client)
+        response = client.get(
+            "/users/search", params={"name_prefix": "kim", "email": "kimberly@example.com"}
+        )
+
+        assert [u["name"] for u in response.json()] == ["kimberly"]
+
+    def test_search_limit(self, client):
+        """limit개까지만"""
+        self._create_users(client)
+        response = client.get("/users/search", params={"name_prefix": "k", "limit": 2})
+
+        assert len(response.json()) == 2
+
+    def test_search_without_conditions(self, client):
+        """조건 없음 → 400 (전체 목록은 GET /users)"""
+        response = client.get("/users/search")
+
+        assert response.status_code == 400
+
+    def test_search_contains_requires_postgres(self, client):
+        """name_contains는 트라이그램 인덱스가 있는 PostgreSQL 전용 → SQLite에서는 400"""
+        response = client.get("/users/search", params={"name_contains": "chul"})
+
+        assert response.status_code == 400
+
+
 # ===========================================
 # 6. 전체 워크플로우 테스트
 # ===========================================
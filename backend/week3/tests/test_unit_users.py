@@ -13,12 +13,24 @@ AAA 패턴:
 - Assert (검증): 결과가 기대와 일치하는지 확인
 """
 
+import asyncio
+import threading
+import time
+
 import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
 from pydantic import ValidationError
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import IntegrityError, OperationalError
 
+from app.database import ReadSession, apply_sqlite_pragmas
 from app.main import UserCreate, UserUpdate, UserResponse
 from app.models import User
+from app.queries import SELECT_USER, update_user_stmt
+from app.ratelimit import MemoryBucketStore, RateLimit, RateLimitMiddleware
+from app.search import SearchError, build_user_search
+from app.stats import UserCountProvider
 
 
 # ===========================================
@@ -235,3 +247,286 @@ class TestParametrize:
         4. 이름과 이메일이 입력값과 같은지 확인
         """
         pass
+
+
+# ===========================================
+# 4. 유저 수 카운터 / 캐시 테스트
+# ===========================================
+
+
+class TestUserCountProvider:
+    """트리거 카운터 + UserCountProvider 캐시 테스트"""
+
+    def test_counter_follows_insert_and_delete(self, test_db):
+        """ORM으로 추가/삭제해도 트리거가 카운터를 맞춰준다"""
+        users = [User(name=f"유저{i}", email=f"user{i}@test.com") for i in range(3)]
+        test_db.add_all(users)
+        test_db.commit()
+        test_db.delete(users[0])
+        test_db.commit()
+
+        assert UserCountProvider(ttl=0).get(test_db) == (2, "exact")
+
+    def test_estimate_falls_back_to_exact_on_sqlite(self, test_db):
+        """SQLite에는 reltuples가 없으므로 exact로 대신"""
+        assert UserCountProvider(mode="estimate").get(test_db) == (0, "exact")
+
+    def test_cached_until_ttl(self, test_db):
+        """ttl 동안은 DB가 바뀌어도 캐시된 값"""
+        provider = UserCountProvider(ttl=60)
+        provider.get(test_db)
+
+        test_db.add(User(name="김철수", email="kim@example.com"))
+        test_db.commit()
+
+        assert provider.get(test_db) == (0, "exact")
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            UserCountProvider(mode="fast")
+
+    def test_single_flight(self, test_db):
+        """캐시가 빈 상태에서 동시에 요청해도 DB 조회는 한 번"""
+        loads = []
+
+        class SlowProvider(UserCountProvider):
+            def _load(self, db):
+                loads.append(1)
+                time.sleep(0.05)
+                return 42, "exact"
+
+        provider = SlowProvider(ttl=60)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(provider.get(test_db)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(loads) == 1
+        assert results == [(42, "exact")] * 8
+
+
+# ===========================================
+# 5. SQLite 운영 모드 PRAGMA 테스트
+# ===========================================
+
+
+class TestSQLitePragmas:
+    """SQLITE_TUNED=1일 때 연결마다 적용하는 PRAGMA 테스트"""
+
+    def test_pragmas_applied_on_connect(self, tmp_path):
+        """파일 DB 연결이 WAL + synchronous=NORMAL(1)로 열린다"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'tuned.db'}")
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+        engine.dispose()
+
+    def test_read_connection_is_query_only(self, tmp_path):
+        """읽기 연결에서는 쓰기가 거부된다"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'tuned.db'}")
+        event.listen(
+            engine,
+            "connect",
+            lambda conn, record: apply_sqlite_pragmas(conn, record, query_only=True),
+        )
+
+        with engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("CREATE TABLE t (id INTEGER)"))
+        engine.dispose()
+
+    def test_read_session_returns_connection_after_each_query(self, tmp_path):
+        """ReadSession은 결과를 다 읽자마자 연결을 반납한다 (세션을 닫기 전에도)"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'tuned.db'}", pool_size=1, max_overflow=0)
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE t (id INTEGER)"))
+            conn.execute(text("INSERT INTO t VALUES (1), (2)"))
+
+        db = ReadSession(bind=engine)
+        rows = db.execute(text("SELECT id FROM t ORDER BY id")).all()
+        first = db.execute(text("SELECT id FROM t ORDER BY id")).first()
+
+        assert [row.id for row in rows] == [1, 2]
+        assert first.id == 1
+        assert engine.pool.checkedout() == 0
+        db.close()
+        engine.dispose()
+
+
+# ===========================================
+# 6. 검색 쿼리 실행 계획 테스트
+# ===========================================
+
+
+def explain_query_plan(db, stmt) -> list[str]:
+    """SQLite EXPLAIN QUERY PLAN 결과의 detail 열 (예: "SEARCH users USING INDEX ...")"""
+    compiled = stmt.compile(db.get_bind())
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+    return [row[-1] for row in rows]
+
+
+class TestUserSearchPlan:
+    """검색 조건마다 인덱스를 타는지 (테이블 전체 SCAN이 없는지) 확인"""
+
+    @pytest.mark.parametrize(
+        "conditions, index_name",
+        [
+            ({"email": "Kim@Example.com"}, "ix_users_email_lower"),
+            ({"name_prefix": "Kim"}, "ix_users_name_lower"),
+            ({"name_prefix": "Kim", "email": "kim@example.com"}, "ix_users_email_lower"),
+        ],
+    )
+    def test_search_uses_index(self, test_db, conditions, index_name):
+        test_db.add_all(User(name=f"user{i}", email=f"user{i}@example.com") for i in range(200))
+        test_db.commit()
+
+        plan = explain_query_plan(test_db, build_user_search("sqlite", **conditions))
+
+        assert f"USING INDEX {index_name}" in plan[0]
+        assert not any(step.startswith("SCAN") for step in plan)
+
+    @pytest.mark.parametrize(
+        "conditions",
+        [
+            {},
+            {"name_prefix": "kim", "limit": 0},
+            {"name_contains": "kim"},
+        ],
+    )
+    def test_unindexable_search_rejected(self, conditions):
+        """조건 없음 / limit 범위 밖 / SQLite의 부분 일치 → SearchError"""
+        with pytest.raises(SearchError):
+            build_user_search("sqlite", **conditions)
+
+    def test_contains_needs_three_characters(self):
+        """트라이그램 인덱스는 3글자 이상부터 후보를 줄인다"""
+        with pytest.raises(SearchError):
+            build_user_search("postgresql", name_contains="ki")
+        build_user_search("postgresql", name_contains="kim")
+
+
+# ===========================================
+# 7. 미리 만들어 둔 쿼리 테스트
+# ===========================================
+
+
+class TestPrebuiltQueries:
+    """queries.py - 문장은 재사용하고 값만 파라미터로"""
+
+    def test_update_stmt_cached_per_shape(self):
+        """같은 컬럼 조합이면 같은 문장 객체, 파라미터 순서는 상관없음"""
+        stmt1, params1 = update_user_stmt({"name": "a", "email": "a@example.com"})
+        stmt2, params2 = update_user_stmt({"email": "b@example.com", "name": "b"})
+        stmt3, _ = update_user_stmt({"name": "c"})
+
+        assert stmt1 is stmt2
+        assert stmt1 is not stmt3
+        assert params2 == {"new_name": "b", "new_email": "b@example.com"}
+
+    def test_prebuilt_statements_roundtrip(self, test_db):
+        """SELECT_USER / update_user_stmt를 파라미터만 바꿔 실행"""
+        user = User(name="김철수", email="kim@example.com")
+        test_db.add(user)
+        test_db.commit()
+
+        stmt, params = update_user_stmt({"name": "김영희"})
+        test_db.execute(stmt, {"user_id": user.id, **params})
+        test_db.commit()
+
+        row = test_db.execute(SELECT_USER, {"user_id": user.id}).one()
+        assert (row.name, row.email) == ("김영희", "kim@example.com")
+        assert test_db.execute(SELECT_USER, {"user_id": user.id + 1}).first() is None
+
+
+# ===========================================
+# 8. 요청 제한 (토큰 버킷) 테스트
+# ===========================================
+
+
+class TestRateLimit:
+    """ratelimit.py - 버킷 계산, 메모리 상한, 429 응답"""
+
+    def test_bucket_refills_at_rate(self):
+        """burst개까지 바로 허용, 그 뒤는 rate에 맞춰 대기 시간 반환"""
+        store = MemoryBucketStore()
+        limit = RateLimit(rate=2, burst=3)
+        take = lambda now: asyncio.run(store.take("c", limit, now=now))
+
+        assert [take(0.0) for _ in range(3)] == [0, 0, 0]
+        assert take(0.0) == pytest.approx(0.5)
+        assert take(0.5) == 0  # 0.5초에 토큰 1개
+
+    def test_idle_and_excess_buckets_evicted(self):
+        """오래 안 쓴 버킷과 max_keys를 넘는 버킷은 지워서 메모리가 늘지 않음"""
+        store = MemoryBucketStore(max_keys=100, idle_ttl=10)
+        limit = RateLimit(rate=1, burst=1)
+
+        async def flood():
+            for i in range(1000):
+                await store.take(f"client-{i}", limit, now=0.0)
+            assert len(store) == 100
+            await store.take("late", limit, now=11.0)
+            assert len(store) == 1
+
+        asyncio.run(flood())
+
+    def test_middleware_returns_429_per_client_and_route(self):
+        """클라이언트(X-API-Key)별, 라우트별로 따로 세고 초과하면 429 + Retry-After"""
+        app = FastAPI()
+
+        @app.get("/items")
+        def items():
+            return []
+
+        @app.get("/search")
+        def search():
+            return []
+
+        app.add_middleware(
+            RateLimitMiddleware,
+            store=MemoryBucketStore(),
+            default=RateLimit(rate=0.5, burst=2),
+            routes={("GET", "/search"): RateLimit(rate=0.5, burst=1)},
+            api_keys=frozenset({"a", "b"}),
+        )
+        client = TestClient(app)
+        a = {"X-API-Key": "a"}
+
+        assert [client.get("/items", headers=a).status_code for _ in range(3)] == [200, 200, 429]
+        response = client.get("/items", headers=a)
+        assert response.headers["Retry-After"] == "2"
+
+        assert client.get("/search", headers=a).status_code == 200
+        assert client.get("/search", headers=a).status_code == 429
+        assert client.get("/items", headers={"X-API-Key": "b"}).status_code == 200
+
+    def test_unknown_api_keys_share_ip_bucket(self):
+        """등록되지 않은 키는 접속 IP로 센다 → 요청마다 키를 바꿔도 제한을 피할 수 없음"""
+        app = FastAPI()
+
+        @app.get("/items")
+        def items():
+            return []
+
+        store = MemoryBucketStore()
+        app.add_middleware(
+            RateLimitMiddleware,
+            store=store,
+            default=RateLimit(rate=0.5, burst=2),
+            api_keys=frozenset({"known"}),
+        )
+        client = TestClient(app)
+
+        codes = [client.get("/items", headers={"X-API-Key": f"fake-{i}"}).status_code for i in range(3)]
+
+        assert codes == [200, 200, 429]
+        assert client.get("/items", headers={"X-API-Key": "known"}).status_code == 200
+        assert len(store) == 2  # IP 버킷 하나 + 등록된 키 버킷 하나
@@ -0,0 +1,55 @@
+"""
+CPU 작업 처리량을 executor 종류/워커 수별로 측정 (서버 없이 client.py의 작업 함수만 실행)
+
+    uv run python bench_executor.py --items 2000 --hash-rounds 20000
+
+thread는 워커를 늘려도 GIL 때문에 1코어 처리량 근처에 머물고,
+process는 코어 수까지 늘어난다 (청크가 작으면 pickle 왕복 비용만큼 손해).
+"""
+
+import argparse
+import os
+import time
+import uuid
+from functools import partial
+
+from client import EXECUTOR_MODES, cpu_bound_chunk, make_executor
+
+
+def run(mode: str, workers: int, items: list, chunk_size: int, hash_rounds: int) -> float:
+    """items를 chunk_size씩 묶어 제출하고 초당 처리 건수 반환 (풀 시작 시간 제외)"""
+    work_fn = partial(cpu_bound_chunk, work_time=0.0, kernel="hash", hash_rounds=hash_rounds)
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    with make_executor(mode, workers) as executor:
+        # 프로세스를 미리 띄워 둠
+        list(executor.map(work_fn, [items[:1]] * workers))
+
+        started = time.perf_counter()
+        processed = sum(len(results) for results in executor.map(work_fn, chunks))
+        elapsed = time.perf_counter() - started
+    return processed / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="executor 종류/워커 수별 CPU 작업 처리량")
+    parser.add_argument("--items", type=int, default=2000, help="처리할 건수 (기본값: 2000)")
+    parser.add_argument("--hash-rounds", type=int, default=20000, help="건당 SHA-256 횟수 (기본값: 20000)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="한 번에 제출하는 건수 (기본값: 16)")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cores, cores * 2})
+    items = [({"item_id": i, "payload": str(uuid.uuid4())}, {}) for i in range(args.items)]
+
+    print(f"[Bench] 코어={cores}, 건수={args.items}, 해싱={args.hash_rounds}회/건, 청크={args.chunk_size}")
+    baseline = None
+    for mode in EXECUTOR_MODES:
+        for workers in worker_counts:
+            throughput = run(mode, workers, items, args.chunk_size, args.hash_rounds)
+            baseline = baseline or throughput
+            print(f"[Bench] {mode:7s} 워커={workers:3d}  {throughput:8.1f}건/초  (x{throughput / baseline:.2f})")
+
+
+if __name__ == "__main__":
+    main()
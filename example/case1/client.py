@@ -1,9 +1,17 @@
 import argparse
 import asyncio
+import contextlib
+import hashlib
+import importlib.util
+import json
+import math
+import os
+import random
 import time
 import uuid
-from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Dict, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import httpx
 
@@ -18,221 +26,917 @@ class TokenBucket:
         self.last_fill = time.monotonic()
         self.lock = asyncio.Lock()
 
-    async def take(self) -> bool:
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.last_fill
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.fill_rate)
+            self.last_fill = now
+
+    async def acquire(self, n: int = 1) -> None:
+        """
+        토큰 n개를 쓸 수 있을 때까지 기다렸다가 사용한다.
+
+        토큰이 모자라면 부족한 만큼 채워지는 시간((n - tokens) / fill_rate)만 정확히 잔다 (폴링 없음).
+        기다리는 동안 lock을 쥐고 있으므로 여러 곳에서 호출해도 먼저 온 순서대로 받는다.
+        자고 일어나면 다시 계산하므로 그 사이에 fill_rate가 바뀌어도(AIMD) 맞게 동작한다.
+        """
         async with self.lock:
-            now = time.monotonic()
-            elapsed = now - self.last_fill
-            if elapsed > 0:
-                self.tokens = min(self.capacity, self.tokens + elapsed * self.fill_rate)
-                self.last_fill = now
+            while True:
+                if n > self.capacity:
+                    raise ValueError(f"토큰 {n}개는 버킷 크기({self.capacity})보다 많아 받을 수 없습니다")
+                self._refill()
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                await asyncio.sleep((n - self.tokens) / self.fill_rate)
 
-            if self.tokens >= 1:
-                self.tokens -= 1
-                return True
-            return False
 
+class LatencyHistogram:
+    """
+    HDR 방식 지연 시간 히스토그램 (µs 단위, 상대 오차 1/64 ≈ 1.6% 이내)
 
-class ResultTracker:
-    """API 성공/실패를 별도로 기록."""
+    값을 전부 저장하지 않고 구간별 개수만 센다. 128µs까지는 1µs 단위, 그 위로는 2배 구간마다
+    64칸으로 나눠서 1ms든 10초든 같은 상대 정밀도로 기록한다 → 건수와 상관없이 메모리 일정.
+    record()는 dict 카운트 하나 증가라 요청마다 불러도 부담이 없다.
+    """
+
+    SUB_BUCKET_BITS = 7  # 2배 구간마다 2^(7-1) = 64칸
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+    HALF = SUB_BUCKETS >> 1
 
     def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum_us = 0
+        self.max_us = 0
+
+    @classmethod
+    def _index(cls, value_us: int) -> int:
+        if value_us < cls.SUB_BUCKETS:
+            return value_us
+        shift = value_us.bit_length() - cls.SUB_BUCKET_BITS
+        return cls.SUB_BUCKETS + (shift - 1) * cls.HALF + ((value_us >> shift) - cls.HALF)
+
+    @classmethod
+    def _upper_bound(cls, index: int) -> int:
+        """index 구간에 들어가는 가장 큰 값 (µs)"""
+        if index < cls.SUB_BUCKETS:
+            return index
+        shift = (index - cls.SUB_BUCKETS) // cls.HALF + 1
+        mantissa = (index - cls.SUB_BUCKETS) % cls.HALF + cls.HALF
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        value_us = int(seconds * 1_000_000)
+        index = self._index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        self.sum_us += value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, q: float) -> float:
+        """q 퍼센타일 (초), 기록이 없으면 0"""
+        if self.total == 0:
+            return 0.0
+        rank = max(1, math.ceil(self.total * q / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._upper_bound(index), self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+    def summary(self) -> Dict[str, float]:
+        """JSON 요약용 (ms)"""
+        return {
+            "count": self.total,
+            "mean_ms": round(self.sum_us / self.total / 1000, 3) if self.total else 0.0,
+            **{f"p{q:g}_ms": round(self.percentile(q) * 1000, 3) for q in (50, 90, 95, 99, 99.9)},
+            "max_ms": round(self.max_us / 1000, 3),
+        }
+
+
+class AimdController:
+    """
+    AIMD(Additive Increase / Multiplicative Decrease)로 TokenBucket의 fill_rate를 조절한다.
+
+    1초마다 adjust()를 호출하면 지난 구간의 요청 결과를 보고
+    - 과부하 신호(503/429·타임아웃 비율 > max_overload, 성공률 < target_success, P95 > target_p95)가 있으면
+      rate *= decrease
+    - 정상이고 실제로 rate 가까이 보냈으면 rate += increase
+    - 정상이지만 rate만큼 보내지도 못했으면(컨슈머/큐가 병목) 그대로 둔다 (안 쓰는 한도가 계속 올라가지 않게)
+    TCP 혼잡 제어와 같은 방식이라 서버가 버틸 수 있는 TPS 근처에서 톱니 모양으로 오르내린다.
+
+    과부하는 건수가 아니라 비율로 본다 (부하와 무관한 1% 503에 반응하지 않도록).
+    구간에 min_samples건이 모이기 전에는 판단을 미루고 다음 구간과 합친다.
+    """
+
+    def __init__(
+        self,
+        bucket: TokenBucket,
+        min_rate: float,
+        max_rate: float,
+        increase: float,
+        decrease: float,
+        target_success: float,
+        target_p95: float,
+        max_overload: float = 0.05,
+        min_samples: int = 50,
+    ) -> None:
+        self.bucket = bucket
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.target_success = target_success
+        self.target_p95 = target_p95
+        self.max_overload = max_overload
+        self.min_samples = min_samples
+        self.rate = min(max(bucket.fill_rate, min_rate), max_rate)
+        self._apply()
+        self._reset_window()
+
+    def _reset_window(self) -> None:
+        self.sent = 0
+        self.succeeded = 0
+        self.overloaded = 0  # 503/429 응답 + 타임아웃
+        self.latency = LatencyHistogram()
+        self.window_start = time.monotonic()
+
+    def _apply(self) -> None:
+        # 버킷 크기도 약 1초 분량으로 맞춰서 rate를 낮춘 직후 쌓인 토큰이 한꺼번에 나가지 않게
+        self.bucket.fill_rate = self.rate
+        self.bucket.capacity = max(1, int(self.rate))
+        self.bucket.tokens = min(self.bucket.tokens, self.bucket.capacity)
+
+    def observe(self, success: bool, latency: float, overloaded: bool) -> None:
+        """컨슈머가 요청마다 호출 (같은 이벤트 루프에서만 호출되므로 락 없음)"""
+        self.sent += 1
+        self.succeeded += success
+        self.overloaded += overloaded
+        self.latency.record(latency)
+
+    def adjust(self) -> Tuple[float, str]:
+        """지난 구간 결과로 rate 조정, (새 rate, 이유) 반환"""
+        elapsed = time.monotonic() - self.window_start
+        if self.sent == 0:
+            self._reset_window()
+            return self.rate, "idle"
+        if self.sent < self.min_samples and self.overloaded <= self.max_overload * self.min_samples:
+            # 구간을 비우지 않고 다음 호출까지 이어서 모은다
+            return self.rate, f"wait: {self.sent}/{self.min_samples}건"
+
+        p95 = self.latency.percentile(95)
+        success_rate = self.succeeded / self.sent
+
+        if self.overloaded > self.max_overload * self.sent:
+            reason = f"overload {self.overloaded}/{self.sent}"
+        elif success_rate < self.target_success:
+            reason = f"success {success_rate:.1%}"
+        elif p95 * 1000 > self.target_p95:
+            reason = f"p95 {p95 * 1000:.0f}ms"
+        else:
+            reason = ""
+
+        if reason:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            reason = "decrease: " + reason
+        elif self.sent >= 0.9 * self.rate * elapsed:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            reason = "increase"
+        else:
+            reason = "hold: demand < rate"
+
+        self._apply()
+        self._reset_window()
+        return self.rate, reason
+
+
+def failure_reason(detail: Dict[str, Any]) -> str:
+    """실패 detail → 집계용 이유 (종류가 몇 개 안 되도록 메시지 대신 상태 코드/예외 이름만)"""
+    if detail.get("timeout"):
+        return "timeout"
+    if "status_code" in detail:
+        return f"http {detail['status_code']}"
+    error_type = detail.get("error_type", "error")
+    return f"worker {error_type}" if detail.get("stage") == "worker" else error_type
+
+
+class ResultTracker:
+    """
+    API 성공/실패를 별도로 기록.
+
+    실패를 전부 메모리에 쌓으면 서버가 계속 실패하는 긴 실행에서 메모리가 끝없이 늘어난다. 대신
+    - 이유별 개수 (failure_reasons)
+    - 실패 예시는 저수지 샘플링(reservoir sampling)으로 최대 sample_size개만 - 실패가 몇 건이든
+      지금까지의 모든 실패에서 고르게 뽑힌 예시가 남는다 (앞쪽 몇 건만 남는 것이 아니라)
+    - dead_letter_path를 주면 실패한 요청 원본을 NDJSON 파일에 한 줄씩 써 둔다 → --replay로 다시 보낼 수 있음
+    """
+
+    def __init__(self, sample_size: int = 100, dead_letter_path: Optional[str] = None) -> None:
         self.success = 0
         self.failure = 0
-        self.failed_items: list[Tuple[int, Dict[str, Any]]] = []
+        self.failure_reasons: Dict[str, int] = {}
+        self.sample_size = sample_size
+        self.failure_samples: List[Tuple[int, Dict[str, Any]]] = []
+        self.dead_letter_path = dead_letter_path
+        self._dead_letter = None
+        if dead_letter_path:
+            directory = os.path.dirname(dead_letter_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._dead_letter = open(dead_letter_path, "a", encoding="utf-8")
 
-    def record(self, item_id: int, success: bool, detail: Dict[str, Any]) -> None:
+    def record(
+        self,
+        item_id: int,
+        success: bool,
+        detail: Dict[str, Any],
+        payload: Optional[Dict[str, Any]] = None,
+    ) -> None:
         if success:
             self.success += 1
+            return
+
+        self.failure += 1
+        reason = failure_reason(detail)
+        self.failure_reasons[reason] = self.failure_reasons.get(reason, 0) + 1
+
+        # 저수지 샘플링 (Algorithm R): n번째 실패는 sample_size/n 확률로 예시에 들어감
+        if len(self.failure_samples) < self.sample_size:
+            self.failure_samples.append((item_id, detail))
         else:
-            self.failure += 1
-            self.failed_items.append((item_id, detail))
+            slot = random.randrange(self.failure)
+            if slot < self.sample_size:
+                self.failure_samples[slot] = (item_id, detail)
+
+        if self._dead_letter is not None and payload is not None:
+            record = {
+                "item_id": item_id, "payload": payload, "reason": reason, "detail": detail, "ts": time.time(),
+            }
+            self._dead_letter.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        if self._dead_letter is not None:
+            self._dead_letter.close()
+            self._dead_letter = None
 
     def report(self) -> None:
         print(f"[Result] success={self.success} failure={self.failure}")
-        if self.failed_items:
-            preview = ", ".join(f"id={item} detail={detail}" for item, detail in self.failed_items[:5])
+        if self.failure_reasons:
+            reasons = ", ".join(
+                f"{reason}={count}" for reason, count in sorted(self.failure_reasons.items(), key=lambda x: -x[1])
+            )
+            print(f"[Result] failure reasons: {reasons}")
+        if self.failure_samples:
+            preview = ", ".join(f"id={item} detail={detail}" for item, detail in self.failure_samples[:5])
             print(f"[Result] failed samples: {preview}")
+        if self.dead_letter_path and self.failure:
+            print(f"[Result] 실패 요청 저장: {self.dead_letter_path} (--replay로 다시 보내기)")
+
+
+def read_dead_letters(path: str) -> Iterator[Dict[str, Any]]:
+    """dead letter 파일에서 요청 payload를 한 줄씩 읽음 (파일 전체를 메모리에 올리지 않음)"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)["payload"]
 
 
 class MetricsMonitor:
-    """초당 처리 건수, API 요청 수, 큐 사이즈 모니터링"""
+    """
+    초당 처리 건수, API 요청 수, 지연 시간(P50/P95/P99), HTTP 연결 재사용 모니터링
+
+    기록은 모두 이벤트 루프 스레드 한 곳에서만 한다 (컨슈머 코루틴, executor 결과도 await 후 루프에서 기록).
+    증가 도중에 await가 없으므로 다른 코루틴이 끼어들 수 없어 락이 필요 없다.
+    1초 구간(window) 값은 snapshot()이 꺼내면서 전체 누적(total)에 합친다.
+    """
+
+    COUNTERS = ("api_requests", "processed", "new_connections", "reused_connections")
+    HISTOGRAMS = ("api_latency", "work_latency", "pool_wait", "connect_time")
 
     def __init__(self) -> None:
-        self.api_request_count = 0  # API 요청 횟수
-        self.processed_count = 0  # 실제 처리 완료 건수
-        self.lock = asyncio.Lock()
+        self.started = time.monotonic()
+        self.window = self._new_window()
+        self.total = self._new_window()
 
-    async def record_api_request(self) -> None:
-        async with self.lock:
-            self.api_request_count += 1
+    def _new_window(self) -> Dict[str, Any]:
+        # api_requests: API 요청 횟수 / processed: 실제 처리 완료 건수
+        # new_connections / reused_connections: 요청마다 새로 연결했는지, 풀의 연결을 다시 썼는지
+        # api_latency: API 요청 → 응답 / work_latency: executor 제출 → 결과 (풀 대기 포함)
+        # pool_wait: 요청 → 연결 풀에서 연결을 받기까지 / connect_time: 새 TCP 연결에 걸린 시간
+        window: Dict[str, Any] = {name: 0 for name in self.COUNTERS}
+        window.update({name: LatencyHistogram() for name in self.HISTOGRAMS})
+        return window
 
-    async def record_processed(self) -> None:
-        async with self.lock:
-            self.processed_count += 1
+    def record_api_request(self, latency: float) -> None:
+        self.window["api_requests"] += 1
+        self.window["api_latency"].record(latency)
 
-    async def get_counts(self) -> Tuple[int, int]:
-        async with self.lock:
-            return self.api_request_count, self.processed_count
+    def record_processed(self, latency: float) -> None:
+        self.window["processed"] += 1
+        self.window["work_latency"].record(latency)
 
-    async def reset_counts(self) -> Tuple[int, int]:
-        """현재 카운트를 반환하고 리셋"""
-        async with self.lock:
-            api_count = self.api_request_count
-            proc_count = self.processed_count
-            self.api_request_count = 0
-            self.processed_count = 0
-            return api_count, proc_count
+    def connection_tracer(self) -> Callable[[str, Dict[str, Any]], Awaitable[None]]:
+        """
+        요청 하나용 httpcore trace 콜백 (client.post(..., extensions={"trace": ...}))
+
+        연결 풀에서 연결을 받은 뒤에야 첫 이벤트가 온다.
+        - 새 연결: connection.connect_tcp.started가 먼저
+        - 재사용: 바로 http11(http2).send_request_headers.started
+        → 요청 시작부터 첫 이벤트까지 = 풀 대기 시간
+        """
+        started = time.monotonic()
+        state = {"first": True, "connect_started": 0.0}
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            now = time.monotonic()
+            if state["first"]:
+                state["first"] = False
+                self.window["pool_wait"].record(now - started)
+                if event.startswith("connection.connect_tcp"):
+                    self.window["new_connections"] += 1
+                else:
+                    self.window["reused_connections"] += 1
+            if event == "connection.connect_tcp.started":
+                state["connect_started"] = now
+            elif event == "connection.connect_tcp.complete":
+                self.window["connect_time"].record(now - state["connect_started"])
+
+        return trace
 
+    def snapshot(self) -> Dict[str, Any]:
+        """지난 구간의 값(COUNTERS 개수 + HISTOGRAMS 히스토그램)을 반환하고 새 구간 시작"""
+        window, self.window = self.window, self._new_window()
+        for name in self.COUNTERS:
+            self.total[name] += window[name]
+        for name in self.HISTOGRAMS:
+            self.total[name].merge(window[name])
+        return window
 
-def cpu_bound_work(payload: Dict[str, Any], response_data: Dict[str, Any], work_time: float) -> Dict[str, Any]:
-    """CPU-bound 작업 시뮬레이션 (워커 스레드에서 실행)"""
-    # CPU 집약적인 작업을 time.sleep으로 시뮬레이션
-    time.sleep(work_time)
+    def summary(self) -> Dict[str, Any]:
+        """실행 전체 요약 (종료 시 JSON으로 저장)"""
+        self.snapshot()  # 마지막 구간까지 합침
+        elapsed = time.monotonic() - self.started
+        total = self.total
+        connections = total["new_connections"] + total["reused_connections"]
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "api_requests": total["api_requests"],
+            "processed": total["processed"],
+            "api_requests_per_s": round(total["api_requests"] / elapsed, 1),
+            "processed_per_s": round(total["processed"] / elapsed, 1),
+            "api_latency": total["api_latency"].summary(),
+            "work_latency": total["work_latency"].summary(),
+            "connections": {
+                "new": total["new_connections"],
+                "reused": total["reused_connections"],
+                "reuse_ratio": round(total["reused_connections"] / connections, 4) if connections else None,
+                "pool_wait": total["pool_wait"].summary(),
+                "connect_time": total["connect_time"].summary(),
+            },
+        }
+
+
+def format_percentiles(histogram: LatencyHistogram) -> str:
+    if histogram.total == 0:
+        return "-"
+    return "/".join(f"{histogram.percentile(q) * 1000:.0f}" for q in (50, 95, 99))
+
+
+def cpu_bound_work(
+    payload: Dict[str, Any],
+    response_data: Dict[str, Any],
+    work_time: float,
+    kernel: str = "sleep",
+    hash_rounds: int = 0,
+) -> Dict[str, Any]:
+    """
+    CPU-bound 작업 (워커 스레드 또는 워커 프로세스에서 실행)
+
+    - sleep: time.sleep(work_time)으로 흉내만 냄 (GIL을 놓으므로 스레드도 병렬로 돈다)
+    - hash: payload를 SHA-256으로 hash_rounds번 반복 해싱 (실제 CPU 사용, 작은 입력이라 GIL을 쥔 채 계산)
+    """
+    if kernel == "hash":
+        digest = payload["payload"].encode()
+        for _ in range(hash_rounds):
+            digest = hashlib.sha256(digest).digest()
+        result = digest.hex()
+    else:
+        time.sleep(work_time)
+        result = None
 
     # 작업 결과 반환
     return {
         "item_id": payload["item_id"],
         "processed": True,
         "response": response_data,
-        "worker_thread": True
+        "result": result,
+        "worker_pid": os.getpid(),
     }
 
 
+def cpu_bound_chunk(
+    items: List[Tuple[Dict[str, Any], Dict[str, Any]]], **work_options: Any
+) -> List[Dict[str, Any]]:
+    """
+    (payload, 응답) 여러 개를 한 번에 처리 - executor에 한 번만 제출
+
+    프로세스 풀은 제출할 때마다 인자/결과를 pickle해서 프로세스 간에 주고받으므로,
+    작업이 짧으면 그 비용이 계산보다 커진다. 묶어서 보내면 왕복 비용을 청크 크기만큼 나눠 낸다.
+    """
+    return [cpu_bound_work(payload, data, **work_options) for payload, data in items]
+
+
+EXECUTOR_MODES = ("thread", "process")
+
+
+def make_executor(mode: str, max_workers: int) -> Executor:
+    """thread: GIL 때문에 순수 파이썬 계산은 한 번에 하나씩 / process: 코어 수만큼 병렬 (pickle 비용 있음)"""
+    if mode == "process":
+        return ProcessPoolExecutor(max_workers=max_workers)
+    if mode == "thread":
+        return ThreadPoolExecutor(max_workers=max_workers)
+    raise ValueError(f"지원하지 않는 executor: {mode} ({' 또는 '.join(EXECUTOR_MODES)})")
+
+
 async def send_request(
-    client: httpx.AsyncClient, endpoint: str, payload: Dict[str, Any]
+    client: httpx.AsyncClient,
+    endpoint: str,
+    payload: Dict[str, Any],
+    metrics: Optional[MetricsMonitor] = None,
 ) -> Tuple[bool, Dict[str, Any]]:
+    # metrics가 있으면 연결 재사용/풀 대기 시간도 기록
+    extensions = {"trace": metrics.connection_tracer()} if metrics is not None else None
     try:
-        response = await client.post(endpoint, json=payload)
+        response = await client.post(endpoint, json=payload, extensions=extensions)
         ok = response.status_code == 200
         body = response.json() if ok else {"status_code": response.status_code, "body": response.text}
         return ok, body
+    except httpx.TimeoutException as exc:
+        return False, {"error": str(exc) or "timeout", "timeout": True}
     except httpx.HTTPError as exc:
-        return False, {"error": str(exc)}
+        return False, {"error": str(exc), "error_type": type(exc).__name__}
+    except ValueError as exc:
+        # 200인데 본문이 JSON이 아님 (프록시 오류 페이지 등) - 컨슈머가 죽지 않도록 실패로
+        return False, {"error": f"invalid JSON body: {exc}", "error_type": type(exc).__name__}
+
+
+def batch_result(result: Any) -> Optional[Tuple[bool, Dict[str, Any]]]:
+    """results[i] 하나를 (성공 여부, 결과)로, 형식이 맞지 않으면 None"""
+    if not isinstance(result, dict) or not isinstance(result.get("status_code"), int):
+        return None
+    # 실패한 건은 status_code를 남겨야 is_overload/is_retryable/failure_reason이 건별 503/429를 본다
+    ok = result["status_code"] == 200
+    if ok:
+        result.pop("status_code")
+    return ok, result
+
+
+async def send_batch(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    payloads: List[Dict[str, Any]],
+    metrics: Optional[MetricsMonitor] = None,
+) -> List[Tuple[bool, Dict[str, Any]]]:
+    """
+    POST /work/batch 한 번으로 여러 건 전송, payloads와 같은 순서로 건별 (성공 여부, 결과) 반환
+
+    - 요청 자체가 실패하면 모두 같은 실패
+    - 결과는 순서가 아니라 item_id로 맞춘다. 응답에 결과가 빠졌거나 형식이 틀린 건은 재시도할 수 있는 실패로
+      돌려준다 (건수가 모자라도 모든 payload가 재시도/실패 기록/task_done까지 가도록)
+    """
+    ok, body = await send_request(client, endpoint, {"items": payloads}, metrics)
+    if not ok:
+        return [(False, body)] * len(payloads)
+
+    results = body.get("results") if isinstance(body, dict) else None
+    by_id = {}
+    for result in results if isinstance(results, list) else ():
+        if isinstance(result, dict) and "item_id" in result:
+            by_id[result["item_id"]] = result
+
+    missing = {"error": "missing batch result", "error_type": "MissingBatchResult"}
+    return [batch_result(by_id.pop(payload["item_id"], None)) or (False, missing) for payload in payloads]
+
+
+async def fill_batch(
+    queue: asyncio.Queue, first: Dict[str, Any], batch_size: int, linger: float
+) -> List[Dict[str, Any]]:
+    """
+    first에 이어 큐에서 batch_size개가 될 때까지 더 꺼낸다.
+    큐에 바로 있는 것은 그대로, 없으면 첫 건부터 linger초까지만 기다린다 (덜 차도 보냄).
+    """
+    batch = [first]
+    deadline = time.monotonic() + linger
+    while len(batch) < batch_size:
+        try:
+            batch.append(queue.get_nowait())
+            continue
+        except asyncio.QueueEmpty:
+            pass
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+
+# 서버가 감당하지 못한다는 응답 (AIMD에서 rate를 줄이는 신호)
+OVERLOAD_STATUS = (429, 503)
+
+
+def is_overload(data: Dict[str, Any]) -> bool:
+    return data.get("timeout", False) or data.get("status_code") in OVERLOAD_STATUS
+
+
+def is_retryable(data: Dict[str, Any]) -> bool:
+    """과부하(503/429/타임아웃)나 연결 오류만 재시도 (그 밖의 4xx/5xx는 다시 보내도 같음)"""
+    return is_overload(data) or ("error_type" in data and "status_code" not in data)
+
+
+class RetryPolicy:
+    """
+    실패한 요청의 재시도 여부와 대기 시간 결정
+
+    - 지수 백오프 + full jitter: n번째 재시도 전 random(0, min(max_delay, base_delay * 2^(n-1)))초 대기
+      (모든 클라이언트가 같은 간격으로 동시에 다시 보내는 것을 막음)
+    - 최대 시도 횟수: 첫 시도 포함 max_attempts번
+    - 재시도 예산: 첫 시도 1건마다 budget_ratio만큼 예산이 쌓이고 재시도 1번에 1씩 쓴다 (최대 budget_cap)
+      → 서버가 계속 실패해도 재시도는 전체 요청의 약 budget_ratio 비율을 넘지 않는다
+    재시도 자체도 TokenBucket 토큰을 쓰므로 (requeue 참고) 재시도가 늘면 새 요청이 그만큼 줄어든다.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.1,
+        max_delay: float = 5.0,
+        budget_ratio: float = 0.1,
+        budget_cap: float = 100.0,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_cap = budget_cap
+        # 시작할 때 조금은 재시도할 수 있도록
+        self.budget = min(budget_cap, 10.0)
+        # 재시도 대기 중인 건의 다음 시도 번호 (끝나면 지움 → 재시도 중인 건수만큼만 메모리 사용)
+        self.attempts: Dict[int, int] = {}
+
+        self.retries = 0
+        self.gave_up_max_attempts = 0
+        self.gave_up_budget = 0
+
+    def on_result(self, item_id: int, success: bool, data: Dict[str, Any]) -> Tuple[Optional[float], int]:
+        """
+        시도 결과 기록
+
+        Returns:
+            (재시도 전 대기 초 - 재시도하지 않으면 None, 이번이 몇 번째 시도였는지)
+        """
+        attempt = self.attempts.pop(item_id, 1)
+        if attempt == 1:
+            self.budget = min(self.budget_cap, self.budget + self.budget_ratio)
+
+        if success or not is_retryable(data):
+            return None, attempt
+        if attempt >= self.max_attempts:
+            self.gave_up_max_attempts += 1
+            return None, attempt
+        if self.budget < 1:
+            self.gave_up_budget += 1
+            return None, attempt
+
+        self.budget -= 1
+        self.retries += 1
+        self.attempts[item_id] = attempt + 1
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))), attempt
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "gave_up_max_attempts": self.gave_up_max_attempts,
+            "gave_up_budget": self.gave_up_budget,
+        }
+
+
+async def requeue(queue: asyncio.Queue, bucket: TokenBucket, payload: Dict[str, Any], delay: float) -> None:
+    """백오프만큼 기다린 뒤 토큰을 받아 큐에 다시 넣음"""
+    await asyncio.sleep(delay)
+    await bucket.acquire()  # 재시도도 새 요청과 같은 토큰 버킷을 씀 → 재시도 폭주가 서버로 가지 않음
+    await queue.put(payload)
+    # 원래 건은 재시도가 큐에 들어간 뒤에 완료 처리 (그 전에 하면 queue.join()이 먼저 끝날 수 있음)
+    queue.task_done()
 
 
 async def producer(
     queue: asyncio.Queue,
     bucket: TokenBucket,
-    total_requests: int,
-    queue_limit: int,
-) -> None:
+    payloads: Iterable[Dict[str, Any]],
+) -> int:
     produced = 0
-    while produced < total_requests:
-        if queue.qsize() >= queue_limit:
-            await asyncio.sleep(0.01)
-            continue
-
-        has_token = await bucket.take()
-        if not has_token:
-            await asyncio.sleep(0.01)
-            continue
-
-        payload = {"item_id": produced, "payload": str(uuid.uuid4())}
+    for payload in payloads:
+        # 토큰이 생길 때까지, 그리고 큐(maxsize)에 자리가 날 때까지 기다림 (백프레셔)
+        await bucket.acquire()
         await queue.put(payload)
         produced += 1
 
     print(f"[Producer] queued {produced} items")
+    return produced
+
+
+def generate_payloads(total_requests: int) -> Iterator[Dict[str, Any]]:
+    for item_id in range(total_requests):
+        yield {"item_id": item_id, "payload": str(uuid.uuid4())}
 
 
 async def consumer(
     name: str,
     queue: asyncio.Queue,
+    client: httpx.AsyncClient,
     endpoint: str,
     tracker: ResultTracker,
-    executor: ThreadPoolExecutor,
+    executor: Executor,
     metrics: MetricsMonitor,
-    work_time: float,
+    work_fn: Callable[[List[Tuple[Dict[str, Any], Dict[str, Any]]]], List[Dict[str, Any]]],
+    chunk_size: int = 1,
+    controller: Optional[AimdController] = None,
+    batch_size: int = 1,
+    batch_linger: float = 0.0,
+    retry: Optional[RetryPolicy] = None,
+    bucket: Optional[TokenBucket] = None,
 ) -> None:
+    if retry is not None and bucket is None:
+        # 재시도도 새 요청과 같은 토큰을 써야 한다 (requeue 참고). 없으면 재시도 태스크 안에서 조용히 죽고
+        # task_done이 불리지 않아 queue.join()이 끝나지 않으므로 시작할 때 막는다
+        raise ValueError("retry를 쓰려면 bucket도 넘겨야 합니다 (재시도도 토큰 버킷을 거침)")
     loop = asyncio.get_event_loop()
-    async with httpx.AsyncClient(timeout=1.0) as client:
-        while True:
+    # 백오프 대기 중인 재시도 태스크 (참조를 들고 있어야 GC되지 않음)
+    retry_tasks: set = set()
+    # API는 성공했고 CPU 작업을 기다리는 (payload, 응답) - chunk_size개가 모이면 한 번에 executor로
+    pending: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+
+    async def flush() -> None:
+        # 2. CPU-bound 작업을 executor(스레드/프로세스 풀)에서 실행
+        try:
+            submitted = time.monotonic()
+            results = await loop.run_in_executor(executor, work_fn, pending)
+            work_latency = time.monotonic() - submitted
+            for processed_data in results:
+                tracker.record(processed_data["item_id"], True, processed_data)
+                metrics.record_processed(work_latency)  # 처리 완료 카운트 + 지연 시간
+        except Exception as e:
+            detail = {"error": str(e), "error_type": type(e).__name__, "stage": "worker"}
+            for payload, _ in pending:
+                tracker.record(payload["item_id"], False, detail, payload)
+            print(f"[Consumer {name}] worker error ids={[p['item_id'] for p, _ in pending]} error={e}")
+        for _ in pending:
+            queue.task_done()
+        pending.clear()
+
+    while True:
+        if pending:
+            # 처리할 게 모여 있으면 큐가 빌 때 기다리지 않고 바로 처리 (청크가 덜 찼어도)
+            try:
+                payload = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                await flush()
+                continue
+        else:
             payload = await queue.get()
 
-            # 1. API 요청 (I/O-bound, async로 처리)
-            success, data = await send_request(client, endpoint, payload)
-            await metrics.record_api_request()  # API 요청 카운트
+        # 1. API 요청 (I/O-bound, async로 처리) - batch_size > 1이면 모아서 /work/batch 한 번
+        started = time.monotonic()
+        if batch_size > 1:
+            payloads = await fill_batch(queue, payload, batch_size, batch_linger)
+            results = await send_batch(client, endpoint + "/batch", payloads, metrics)
+        else:
+            payloads = [payload]
+            results = [await send_request(client, endpoint, payload, metrics)]
+        latency = time.monotonic() - started
+        metrics.record_api_request(latency)  # API 요청 카운트 + 지연 시간
+
+        for payload, (success, data) in zip(payloads, results):
+            # 토큰은 건당 하나씩 썼으므로 AIMD도 건 단위로 관찰
+            if controller is not None:
+                controller.observe(success, latency, not success and is_overload(data))
+
+            delay, attempt = retry.on_result(payload["item_id"], success, data) if retry else (None, 1)
 
             if success:
-                # 2. CPU-bound 작업을 ThreadPoolExecutor에서 실행
-                try:
-                    processed_data = await loop.run_in_executor(
-                        executor,
-                        cpu_bound_work,
-                        payload,
-                        data,
-                        work_time
-                    )
-                    tracker.record(payload["item_id"], True, processed_data)
-                    await metrics.record_processed()  # 처리 완료 카운트
-                except Exception as e:
-                    tracker.record(payload["item_id"], False, {"error": str(e)})
-                    print(f"[Consumer {name}] worker error id={payload['item_id']} error={e}")
+                pending.append((payload, data))
+                if len(pending) >= chunk_size:
+                    await flush()
+            elif delay is not None:
+                # 재시도: task_done은 requeue가 다시 넣은 뒤에
+                task = asyncio.create_task(requeue(queue, bucket, payload, delay))
+                retry_tasks.add(task)
+                task.add_done_callback(retry_tasks.discard)
             else:
-                tracker.record(payload["item_id"], False, data)
-                print(f"[Consumer {name}] failure id={payload['item_id']} detail={data}")
-
-            queue.task_done()
+                # 최종 실패 → 실패 기록 (+ --dead-letter 파일)
+                detail = {**data, "attempts": attempt} if attempt > 1 else data
+                tracker.record(payload["item_id"], False, detail, payload)
+                print(f"[Consumer {name}] failure id={payload['item_id']} attempts={attempt} detail={data}")
+                queue.task_done()
 
 
-async def monitor_stats(queue: asyncio.Queue, metrics: MetricsMonitor, stop_event: asyncio.Event) -> None:
-    """1초마다 통계 출력"""
+async def monitor_stats(
+    queue: asyncio.Queue,
+    metrics: MetricsMonitor,
+    stop_event: asyncio.Event,
+    bucket: TokenBucket,
+    controller: Optional[AimdController] = None,
+) -> None:
+    """1초마다 통계 출력 (AIMD 사용 시 rate 조정도 여기서)"""
     while not stop_event.is_set():
         await asyncio.sleep(1.0)
 
         # 지난 1초간의 통계 수집
-        api_count, proc_count = await metrics.reset_counts()
+        window = metrics.snapshot()
         queue_size = queue.qsize()
 
-        print(f"[Stats] API 요청/초: {api_count:3d} | 처리완료/초: {proc_count:3d} | 큐 작업수: {queue_size:3d}")
+        line = (
+            f"[Stats] API 요청/초: {window['api_requests']:3d} | 처리완료/초: {window['processed']:3d}"
+            f" | 큐 작업수: {queue_size:3d}"
+            f" | API P50/95/99: {format_percentiles(window['api_latency'])}ms"
+            f" | 처리 P50/95/99: {format_percentiles(window['work_latency'])}ms"
+            f" | 새 연결: {window['new_connections']:2d} | 풀 대기 P95: {window['pool_wait'].percentile(95) * 1000:.1f}ms"
+            f" | 제한: {bucket.fill_rate:6.1f}/초"
+        )
+        if controller is not None:
+            _, reason = controller.adjust()
+            line += f" → {controller.rate:6.1f}/초 ({reason})"
+        print(line)
+
+
+def write_summary(
+    path: str,
+    config: Dict[str, Any],
+    metrics: MetricsMonitor,
+    tracker: ResultTracker,
+    controller: Optional[AimdController],
+    retry: Optional[RetryPolicy] = None,
+) -> None:
+    """실행 설정 + 전체 처리량/지연 퍼센타일 + 성공/실패 수를 JSON으로 저장 (실행끼리 비교용)"""
+    summary = {
+        "config": config,
+        **metrics.summary(),
+        "success": tracker.success,
+        "failure": tracker.failure,
+        "failure_reasons": tracker.failure_reasons,
+        "retry": retry.summary() if retry is not None else None,
+        "final_rate": controller.rate if controller is not None else config["rate_limit"],
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    print(f"[Main] 요약 저장: {path}")
 
 
-async def main(max_workers: int, work_time: float, rate_limit: int, queue_size: int, num_consumers: int) -> None:
+async def main(
+    max_workers: int,
+    work_time: float,
+    rate_limit: int,
+    queue_size: int,
+    num_consumers: int,
+    total_requests: int = 500,
+    aimd: Optional[Dict[str, float]] = None,
+    executor_mode: str = "thread",
+    kernel: str = "sleep",
+    hash_rounds: int = 0,
+    chunk_size: int = 1,
+    batch_size: int = 1,
+    batch_linger: float = 0.0,
+    summary_path: Optional[str] = None,
+    failure_samples: int = 100,
+    dead_letter_path: Optional[str] = None,
+    replay_path: Optional[str] = None,
+    retry_options: Optional[Dict[str, float]] = None,
+    max_connections: int = 100,
+    max_keepalive: int = 20,
+    keepalive_expiry: float = 5.0,
+    http2: bool = False,
+) -> None:
     endpoint = "http://127.0.0.1:8000/work"
-    total_requests = 500
 
     queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
     bucket = TokenBucket(capacity=rate_limit, fill_rate=rate_limit)
-    tracker = ResultTracker()
+    # aimd가 있으면 rate_limit은 시작 rate, 이후 AimdController가 조정
+    controller = AimdController(bucket, **aimd) if aimd is not None else None
+    if replay_path and dead_letter_path and os.path.abspath(replay_path) == os.path.abspath(dead_letter_path):
+        raise ValueError("--replay와 --dead-letter에 같은 파일을 쓸 수 없습니다")
+    # --replay면 새 요청 대신 dead letter 파일의 요청을 다시 보냄
+    payloads = read_dead_letters(replay_path) if replay_path else generate_payloads(total_requests)
+    tracker = ResultTracker(failure_samples, dead_letter_path)
+    retry = RetryPolicy(**retry_options) if retry_options is not None else None
     metrics = MetricsMonitor()
     stop_event = asyncio.Event()
 
-    # ThreadPoolExecutor 생성
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        print(f"[Main] 설정: 워커={max_workers}, 컨슈머={num_consumers}, 작업시간={work_time}초, API제한={rate_limit}/초, 큐크기={queue_size}")
+    # 프로세스 풀로 보내려면 pickle 가능해야 하므로 모듈 최상위 함수 + partial
+    work_fn = partial(cpu_bound_chunk, work_time=work_time, kernel=kernel, hash_rounds=hash_rounds)
+
+    config = {
+        "workers": max_workers, "executor": executor_mode, "consumers": num_consumers, "kernel": kernel,
+        "work_time": work_time, "hash_rounds": hash_rounds, "chunk_size": chunk_size, "batch_size": batch_size,
+        "rate_limit": rate_limit, "adaptive": aimd is not None, "queue_size": queue_size,
+        "total_requests": total_requests, "replay": replay_path, "retry": retry_options,
+        "max_connections": max_connections, "max_keepalive": max_keepalive, "http2": http2,
+    }
+    try:
+        # ThreadPoolExecutor 또는 ProcessPoolExecutor 생성
+        async with contextlib.AsyncExitStack() as stack:
+            executor = stack.enter_context(make_executor(executor_mode, max_workers))
+            print(f"[Main] 설정: 워커={max_workers}({executor_mode}), 컨슈머={num_consumers}, 작업={kernel}"
+                  f"({f'{work_time}초' if kernel == 'sleep' else f'{hash_rounds}회 해싱'}), 청크={chunk_size}, "
+                  f"묶음={batch_size}, API제한={rate_limit}/초, 큐크기={queue_size}, "
+                  f"연결={max_connections}(keepalive {max_keepalive}){', HTTP/2' if http2 else ''}")
+
+            # 모든 컨슈머가 HTTP 클라이언트(연결 풀) 하나를 공유
+            # - max_connections: 동시에 열 수 있는 연결 수 (넘으면 풀에서 대기 → 풀 대기 시간으로 보임)
+            # - max_keepalive / keepalive_expiry: 요청이 끝난 뒤 다시 쓰려고 열어 두는 연결 수 / 시간
+            limits = httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry,
+            )
+            client = await stack.enter_async_context(httpx.AsyncClient(timeout=1.0, limits=limits, http2=http2))
 
-        # 모니터링 태스크 시작
-        monitor_task = asyncio.create_task(monitor_stats(queue, metrics, stop_event))
+            # 모니터링 태스크 시작
+            monitor_task = asyncio.create_task(monitor_stats(queue, metrics, stop_event, bucket, controller))
 
-        # 컨슈머에 work_time 전달
-        consumers = [
-            asyncio.create_task(consumer(f"C{i}", queue, endpoint, tracker, executor, metrics, work_time))
-            for i in range(num_consumers)
-        ]
+            # 컨슈머에 작업 함수 전달
+            consumers = [
+                asyncio.create_task(
+                    consumer(
+                        f"C{i}", queue, client, endpoint, tracker, executor, metrics, work_fn, chunk_size, controller,
+                        batch_size, batch_linger, retry, bucket,
+                    )
+                )
+                for i in range(num_consumers)
+            ]
 
-        await producer(queue, bucket, total_requests, queue_size)
-        await queue.join()
+            started = time.monotonic()
+            total_requests = await producer(queue, bucket, payloads)
+            await queue.join()
+            elapsed = time.monotonic() - started
 
-        # 모니터 중지
-        stop_event.set()
-        await monitor_task
+            # 모니터 중지
+            stop_event.set()
+            await monitor_task
 
-        for task in consumers:
-            task.cancel()
-        await asyncio.gather(*consumers, return_exceptions=True)
+            for task in consumers:
+                task.cancel()
+            await asyncio.gather(*consumers, return_exceptions=True)
+    finally:
+        tracker.close()
+        # 중간에 Ctrl+C로 멈춰도 그때까지의 결과는 저장
+        if summary_path:
+            write_summary(summary_path, config, metrics, tracker, controller, retry)
 
     tracker.report()
+    if retry is not None:
+        print(
+            f"[Retry] 재시도={retry.retries} | 최대 시도 후 포기={retry.gave_up_max_attempts}"
+            f" | 예산 부족으로 포기={retry.gave_up_budget}"
+        )
+    connections = metrics.total["new_connections"] + metrics.total["reused_connections"]
+    if connections:
+        print(
+            f"[Conn] 새 연결={metrics.total['new_connections']} | 재사용={metrics.total['reused_connections']}"
+            f" ({metrics.total['reused_connections'] / connections:.1%})"
+            f" | 풀 대기 P50/95/99: {format_percentiles(metrics.total['pool_wait'])}ms"
+        )
+    print(f"[Main] {total_requests}건 {elapsed:.2f}초 ({total_requests / elapsed:.1f}건/초)")
+    if controller is not None:
+        print(f"[Main] AIMD 최종 rate: {controller.rate:.1f}/초")
     print("[Main] demo finished")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
-        description="Adaptive TPS 클라이언트 - ThreadPoolExecutor 기반 CPU-bound 작업 처리"
+        description="Adaptive TPS 클라이언트 - 스레드/프로세스 풀 기반 CPU-bound 작업 처리"
     )
     parser.add_argument(
         "--workers",
         type=int,
         default=8,
-        help="ThreadPoolExecutor 워커 스레드 수 (기본값: 8)"
+        help="executor 워커(스레드/프로세스) 수 (기본값: 8)"
     )
     parser.add_argument(
         "--consumers",
@@ -259,5 +963,194 @@ if __name__ == "__main__":
         help="작업 큐의 최대 크기 (기본값: 200)"
     )
 
+    parser.add_argument(
+        "--total-requests",
+        type=int,
+        default=500,
+        help="보낼 전체 요청 수 (기본값: 500)"
+    )
+
+    # CPU 작업을 어디서 어떻게 돌릴지
+    parser.add_argument(
+        "--executor",
+        choices=EXECUTOR_MODES,
+        default="thread",
+        help="CPU 작업을 돌릴 풀: thread(ThreadPoolExecutor) 또는 process(ProcessPoolExecutor) (기본값: thread)"
+    )
+    parser.add_argument(
+        "--kernel",
+        choices=("sleep", "hash"),
+        default="sleep",
+        help="CPU 작업 내용: sleep(--work-time만큼 대기) 또는 hash(--hash-rounds번 SHA-256) (기본값: sleep)"
+    )
+    parser.add_argument(
+        "--hash-rounds",
+        type=int,
+        default=20000,
+        help="hash 작업에서 반복할 해싱 횟수 (기본값: 20000)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1,
+        help="컨슈머가 모아서 한 번에 executor로 보내는 건수 (process에서는 8~32 권장, 기본값: 1)"
+    )
+
+    # 요청 묶음 (POST /work/batch)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="한 요청에 묶어 보내는 최대 건수, 1이면 건마다 POST /work (기본값: 1)"
+    )
+    parser.add_argument(
+        "--batch-linger",
+        type=float,
+        default=5.0,
+        help="묶음이 덜 찼을 때 더 기다리는 최대 시간(ms) (기본값: 5)"
+    )
+
+    parser.add_argument(
+        "--summary-json",
+        default="results/client_summary.json",
+        help="종료 시 처리량/지연 퍼센타일 요약을 저장할 파일, 빈 값이면 저장 안 함 (기본값: results/client_summary.json)"
+    )
+
+    # 실패 기록
+    parser.add_argument(
+        "--failure-samples",
+        type=int,
+        default=100,
+        help="메모리에 남길 실패 예시 수 (저수지 샘플링, 기본값: 100)"
+    )
+    parser.add_argument(
+        "--dead-letter",
+        default=None,
+        help="실패한 요청을 NDJSON으로 추가 저장할 파일 (기본값: 저장 안 함)"
+    )
+    parser.add_argument(
+        "--replay",
+        default=None,
+        help="새 요청 대신 dead letter 파일의 요청을 다시 보냄 (--total-requests 무시)"
+    )
+
+    # HTTP 연결 풀 (모든 컨슈머가 공유)
+    parser.add_argument(
+        "--max-connections", type=int, default=100, help="동시에 열 수 있는 최대 연결 수 (기본값: 100)"
+    )
+    parser.add_argument(
+        "--max-keepalive", type=int, default=20, help="재사용하려고 열어 두는 최대 연결 수 (기본값: 20)"
+    )
+    parser.add_argument(
+        "--keepalive-expiry", type=float, default=5.0, help="쉬는 연결을 닫기까지의 시간(초) (기본값: 5)"
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="HTTP/2 사용 (uv sync --extra http2 필요). 이 예제 서버(http://, uvicorn)는 HTTP/1.1만 지원하므로 "
+             "켜도 효과 없음 - TLS(ALPN)로 HTTP/2를 협상하는 서버에서만 의미가 있다"
+    )
+
+    # 재시도 (503/429/타임아웃/연결 오류만)
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="첫 시도를 포함한 최대 시도 횟수, 1이면 재시도 안 함 (기본값: 3)"
+    )
+    parser.add_argument(
+        "--retry-base-delay", type=float, default=100.0, help="첫 재시도 백오프 상한(ms), 재시도마다 2배 (기본값: 100)"
+    )
+    parser.add_argument(
+        "--retry-max-delay", type=float, default=5000.0, help="재시도 백오프 최대값(ms) (기본값: 5000)"
+    )
+    parser.add_argument(
+        "--retry-budget",
+        type=float,
+        default=0.1,
+        help="재시도가 차지할 수 있는 최대 비율 (첫 시도 대비, 기본값: 0.1)"
+    )
+
+    # AIMD: 서버 상태를 보고 초당 API 호출 제한을 자동 조정
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="AIMD로 API 호출 제한 자동 조정 (--rate-limit은 시작값)"
+    )
+    parser.add_argument("--min-rate", type=float, default=1.0, help="AIMD 최소 rate (기본값: 1)")
+    parser.add_argument("--max-rate", type=float, default=1000.0, help="AIMD 최대 rate (기본값: 1000)")
+    parser.add_argument(
+        "--increase", type=float, default=5.0, help="정상일 때 1초마다 늘리는 rate (기본값: 5)"
+    )
+    parser.add_argument(
+        "--decrease", type=float, default=0.5, help="과부하일 때 곱하는 값 (기본값: 0.5)"
+    )
+    parser.add_argument(
+        "--target-success", type=float, default=0.95, help="이보다 성공률이 낮으면 감소 (기본값: 0.95)"
+    )
+    parser.add_argument(
+        "--max-overload",
+        type=float,
+        default=0.05,
+        help="구간의 503/429·타임아웃 비율이 이보다 크면 감소 (기본값: 0.05)"
+    )
+    parser.add_argument(
+        "--min-samples",
+        type=int,
+        default=50,
+        help="구간에 이만큼 요청이 모여야 성공률/비율/P95로 판단 (기본값: 50)"
+    )
+    parser.add_argument(
+        "--target-p95", type=float, default=200.0, help="API P95(ms)가 이보다 크면 감소 (기본값: 200)"
+    )
+
     args = parser.parse_args()
-    asyncio.run(main(args.workers, args.work_time, args.rate_limit, args.queue_size, args.consumers))
+    if args.http2 and importlib.util.find_spec("h2") is None:
+        # httpx는 요청을 보낼 때가 아니라 AsyncClient를 만들 때 ImportError를 내므로 미리 확인
+        parser.error("--http2에는 h2 패키지가 필요합니다: uv sync --extra http2 (또는 pip install 'httpx[http2]')")
+    retry_options = None
+    if args.max_attempts > 1:
+        retry_options = {
+            "max_attempts": args.max_attempts,
+            "base_delay": args.retry_base_delay / 1000,
+            "max_delay": args.retry_max_delay / 1000,
+            "budget_ratio": args.retry_budget,
+        }
+    aimd = None
+    if args.adaptive:
+        aimd = {
+            "min_rate": args.min_rate,
+            "max_rate": args.max_rate,
+            "increase": args.increase,
+            "decrease": args.decrease,
+            "target_success": args.target_success,
+            "target_p95": args.target_p95,
+            "max_overload": args.max_overload,
+            "min_samples": args.min_samples,
+        }
+    asyncio.run(
+        main(
+            args.workers,
+            args.work_time,
+            args.rate_limit,
+            args.queue_size,
+            args.consumers,
+            args.total_requests,
+            aimd,
+            args.executor,
+            args.kernel,
+            args.hash_rounds,
+            args.chunk_size,
+            args.batch_size,
+            args.batch_linger / 1000,
+            args.summary_json,
+            args.failure_samples,
+            args.dead_letter,
+            args.replay,
+            retry_options,
+            args.max_connections,
+            args.max_keepalive,
+            args.keepalive_expiry,
+            args.http2,
+        )
+    )
@@ -1,20 +1,27 @@
 import random
-from typing import Dict
+from typing import Any, Dict, List
 
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 app = FastAPI(title="Adaptive TPS Test Server")
 
 # True로 바꾸면 서버가 1% 확률로 503 에러를 리턴함.
 ERROR_MODE = False
 
+# /work/batch 한 번에 받을 수 있는 최대 건수 (넘으면 422)
+MAX_BATCH_SIZE = 1000
+
 
 class WorkItem(BaseModel):
     item_id: int
     payload: str
 
 
+class WorkBatch(BaseModel):
+    items: List[WorkItem] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
 class ServerState:
     """서버가 처리한 요청/실패 수를 단순 추적."""
 
@@ -34,22 +41,42 @@ class ServerState:
 state = ServerState()
 
 
-@app.post("/work")
-async def process_work(item: WorkItem):
-    """즉시 응답하며 오류 플래그에 따라 1% 확률로 실패."""
+def handle_item(item: WorkItem) -> Dict[str, Any]:
+    """작업 하나 처리. 오류 플래그에 따라 1% 확률로 실패 (실패하면 status_code 503)"""
     state.inflight += 1
 
     try:
         if ERROR_MODE and random.random() < 0.01:
             state.failed += 1
-            raise HTTPException(status_code=503, detail="Injected error mode")
+            return {"item_id": item.item_id, "status_code": 503, "detail": "Injected error mode"}
 
         state.completed += 1
         return {
             "item_id": item.item_id,
+            "status_code": 200,
             "payload": item.payload,
             "error_mode": ERROR_MODE,
             "server_state": state.to_dict(),
         }
     finally:
         state.inflight -= 1
+
+
+@app.post("/work")
+async def process_work(item: WorkItem):
+    """즉시 응답하며 오류 플래그에 따라 1% 확률로 실패."""
+    result = handle_item(item)
+    if result["status_code"] != 200:
+        raise HTTPException(status_code=result["status_code"], detail=result["detail"])
+    del result["status_code"]
+    return result
+
+
+@app.post("/work/batch")
+async def process_work_batch(batch: WorkBatch):
+    """
+    여러 작업을 요청 한 번으로 처리. 항상 200이고 건별 성공/실패는 results[i].status_code로 알려준다.
+
+    /work를 N번 부르면 HTTP 요청/응답, JSON 파싱, 라우팅 비용을 N번 내지만 여기서는 한 번만 낸다.
+    """
+    return {"results": [handle_item(item) for item in batch.items]}
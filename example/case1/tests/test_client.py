@@ -0,0 +1,256 @@
+"""
+client.py 유닛 테스트 (서버 없이 httpx.MockTransport로 응답을 흉내낸다)
+
+실행: uv run --with pytest pytest
+"""
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import httpx
+import pytest
+
+from client import (
+    AimdController,
+    MetricsMonitor,
+    ResultTracker,
+    RetryPolicy,
+    TokenBucket,
+    consumer,
+    cpu_bound_chunk,
+    failure_reason,
+    is_overload,
+    is_retryable,
+    send_batch,
+)
+
+ENDPOINT = "http://test/work"
+
+
+def batch_server(fail_once: set):
+    """/work/batch 흉내: fail_once의 id는 처음 한 번만 건별 503, 요청 자체는 항상 200 (server.py와 같은 형식)"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        items = httpx.Response(200, content=request.content).json()["items"]
+        calls.append([item["item_id"] for item in items])
+        results = []
+        for item in items:
+            if item["item_id"] in fail_once:
+                fail_once.discard(item["item_id"])
+                results.append({"item_id": item["item_id"], "status_code": 503, "detail": "Injected error mode"})
+            else:
+                results.append({"item_id": item["item_id"], "status_code": 200, "payload": item["payload"]})
+        return httpx.Response(200, json={"results": results})
+
+    return httpx.MockTransport(handler), calls
+
+
+def test_send_batch_keeps_per_item_status_code():
+    """건별 실패는 status_code가 남아 과부하/재시도 대상으로 분류되고, 성공한 건은 status_code를 뺀다"""
+
+    async def run():
+        transport, _ = batch_server({1})
+        async with httpx.AsyncClient(transport=transport) as client:
+            payloads = [{"item_id": i, "payload": f"p{i}"} for i in range(2)]
+            return await send_batch(client, ENDPOINT + "/batch", payloads)
+
+    (ok, data), (failed_ok, failed) = asyncio.run(run())
+
+    assert ok and "status_code" not in data
+    assert not failed_ok
+    assert failed["status_code"] == 503
+    assert is_overload(failed)
+    assert is_retryable(failed)
+    assert failure_reason(failed) == "http 503"
+
+
+def test_send_batch_matches_results_by_item_id():
+    """결과는 item_id로 맞추고, 응답에 빠진 건은 재시도할 수 있는 실패로 돌려준다"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        # 순서를 바꾸고 item_id 1의 결과는 빠뜨림
+        return httpx.Response(200, json={"results": [
+            {"item_id": 2, "status_code": 200}, {"item_id": 0, "status_code": 503},
+        ]})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            payloads = [{"item_id": i, "payload": f"p{i}"} for i in range(3)]
+            return await send_batch(client, ENDPOINT + "/batch", payloads)
+
+    results = asyncio.run(run())
+
+    assert [ok for ok, _ in results] == [False, False, True]
+    assert results[0][1]["status_code"] == 503
+    assert results[1][1]["error"] == "missing batch result"
+    assert is_retryable(results[1][1])
+    assert results[2][1] == {"item_id": 2}
+
+
+@pytest.mark.parametrize("response", [
+    httpx.Response(200, json={}),
+    httpx.Response(200, json={"results": "oops"}),
+    httpx.Response(200, json={"results": [{"item_id": 0}, "oops"]}),
+    httpx.Response(200, json=[]),
+    httpx.Response(200, text="<html>bad gateway</html>"),
+], ids=["no-results", "results-not-list", "bad-items", "not-object", "not-json"])
+def test_send_batch_malformed_body(response):
+    """200이어도 본문 형식이 틀리면 예외 대신 건마다 재시도할 수 있는 실패"""
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(lambda request: response)) as client:
+            payloads = [{"item_id": i, "payload": f"p{i}"} for i in range(2)]
+            return await send_batch(client, ENDPOINT + "/batch", payloads)
+
+    results = asyncio.run(run())
+
+    assert len(results) == 2
+    assert all(not ok and is_retryable(data) for ok, data in results)
+
+
+def run_consumer(transport: httpx.MockTransport, count: int, batch_size: int, retry=None):
+    """count건을 큐에 넣고 컨슈머 하나로 모두 처리될 때까지 (task_done이 빠지면 타임아웃)"""
+
+    async def run():
+        bucket = TokenBucket(capacity=100, fill_rate=1000)
+        controller = AimdController(
+            bucket, min_rate=1, max_rate=1000, increase=1, decrease=0.5, target_success=0.9, target_p95=1.0
+        )
+        tracker = ResultTracker()
+        queue: asyncio.Queue = asyncio.Queue()
+        for i in range(count):
+            queue.put_nowait({"item_id": i, "payload": f"p{i}"})
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            async with httpx.AsyncClient(transport=transport) as client:
+                task = asyncio.create_task(
+                    consumer(
+                        "c0", queue, client, ENDPOINT, tracker, executor, MetricsMonitor(),
+                        partial(cpu_bound_chunk, work_time=0), controller=controller,
+                        batch_size=batch_size, retry=retry, bucket=bucket,
+                    )
+                )
+                await asyncio.wait_for(queue.join(), timeout=5)
+                assert not task.done()  # 컨슈머가 예외로 죽지 않았음
+                task.cancel()
+        return controller, tracker
+
+    return asyncio.run(run())
+
+
+def test_consumer_short_batch_body_does_not_hang():
+    """결과가 모자란 배치 응답에도 빠진 건이 재시도되어 queue.join()이 끝난다"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        items = httpx.Response(200, content=request.content).json()["items"]
+        if not calls:
+            items = items[:1]  # 첫 응답은 한 건 결과만
+        calls.append(len(items))
+        return httpx.Response(200, json={"results": [{"item_id": i["item_id"], "status_code": 200} for i in items]})
+
+    _, tracker = run_consumer(httpx.MockTransport(handler), 3, batch_size=3, retry=RetryPolicy(base_delay=0.001))
+
+    assert tracker.success == 3 and tracker.failure == 0
+
+
+def test_consumer_malformed_batch_body_records_failures():
+    """재시도 없이 본문이 깨지면 건마다 실패로 기록되고 queue.join()이 끝난다"""
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"detail": "oops"}))
+
+    _, tracker = run_consumer(transport, 2, batch_size=2)
+
+    assert tracker.failure == 2
+    assert tracker.failure_reasons == {"MissingBatchResult": 2}
+
+
+def test_consumer_retries_per_item_503_in_batch():
+    """배치 안의 건별 503은 AIMD에 과부하로 세고, 그 건만 재시도해서 성공시킨다"""
+    transport, calls = batch_server({1})
+    retry = RetryPolicy(base_delay=0.001)
+
+    controller, tracker = run_consumer(transport, 2, batch_size=2, retry=retry)
+
+    assert calls == [[0, 1], [1]]
+    assert controller.overloaded == 1
+    assert retry.retries == 1
+    assert tracker.success == 2 and tracker.failure == 0
+
+
+def test_consumer_requires_bucket_with_retry():
+    """retry만 주고 bucket을 빠뜨리면 재시도 태스크가 조용히 죽는 대신 시작할 때 ValueError"""
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200))) as client:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                await consumer(
+                    "c0", asyncio.Queue(), client, ENDPOINT, ResultTracker(), executor, MetricsMonitor(),
+                    partial(cpu_bound_chunk, work_time=0), retry=RetryPolicy(),
+                )
+
+    with pytest.raises(ValueError, match="bucket"):
+        asyncio.run(run())
+
+
+def run_aimd(controller: AimdController, seconds: int, capacity: float, error_rate: float, seed: int = 1):
+    """
+    1초 구간마다 rate만큼 보낸 것으로 치고 adjust() 호출, 구간별 rate 반환
+
+    capacity를 넘는 요청과 error_rate 비율의 무작위 요청은 503 (ERROR_MODE 흉내)
+    """
+    rng = random.Random(seed)
+    rates = []
+    for _ in range(seconds):
+        for i in range(int(controller.rate)):
+            overloaded = i >= capacity or rng.random() < error_rate
+            controller.observe(not overloaded, 0.01, overloaded)
+        controller.window_start = time.monotonic() - 1.0
+        controller.adjust()
+        rates.append(controller.rate)
+    return rates
+
+
+def make_controller(rate: float) -> AimdController:
+    return AimdController(
+        TokenBucket(int(rate), rate), min_rate=1, max_rate=1000, increase=5, decrease=0.5,
+        target_success=0.95, target_p95=200,
+    )
+
+
+def test_aimd_ignores_random_1pct_errors():
+    """부하와 무관한 1% 503(ERROR_MODE)만 있으면 rate를 줄이지 않고 계속 올린다"""
+    rates = run_aimd(make_controller(50), seconds=100, capacity=float("inf"), error_rate=0.01)
+
+    assert rates == sorted(rates)
+    assert rates[-1] >= 500
+
+
+def test_aimd_settles_below_server_capacity():
+    """서버 한계(초당 300건)를 넘으면 줄이고, 1% 503이 섞여도 한계 근처에서 오르내린다"""
+    rates = run_aimd(make_controller(50), seconds=300, capacity=300, error_rate=0.01)
+
+    tail = rates[150:]
+    assert max(tail) <= 320
+    assert sum(tail) / len(tail) >= 150
+
+
+def test_aimd_waits_for_min_samples():
+    """구간 요청이 min_samples보다 적으면 503 한 건으로는 판단하지 않고 구간을 이어서 모은다"""
+    controller = make_controller(10)
+    for overloaded in [True] + [False] * 9:
+        controller.observe(not overloaded, 0.01, overloaded)
+
+    rate, reason = controller.adjust()
+
+    assert rate == 10 and reason.startswith("wait")
+    assert controller.sent == 10
+
+    # 적게 모였어도 과부하가 min_samples의 max_overload 비율(50 x 5% = 2.5건)을 넘으면 바로 줄인다
+    for _ in range(2):
+        controller.observe(False, 0.01, True)
+    rate, reason = controller.adjust()
+
+    assert rate == 5 and reason == "decrease: overload 3/12"
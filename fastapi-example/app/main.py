@@ -5,6 +5,7 @@ from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from app.routers import todos
 from app.init_db import init_db
+from app.ratelimit import RateLimit, add_rate_limit
 
 
 @asynccontextmanager
@@ -30,6 +31,10 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# 클라이언트별 요청 제한 (RATE_LIMIT_RPS가 설정된 경우만, ratelimit.py 참고)
+# TODO 생성은 DB 쓰기(커밋)라 조회보다 낮게, 버킷도 따로
+add_rate_limit(app, routes={("POST", "/todos/"): RateLimit(rate=5, burst=10)})
+
 # 라우터 등록
 app.include_router(todos.router)
 
@@ -0,0 +1,268 @@
+"""
+클라이언트별 요청 제한 (토큰 버킷)
+
+클라이언트 하나가 요청을 몰아 보내면 워커(스레드풀/DB 연결)를 혼자 다 차지한다.
+클라이언트마다 토큰 버킷을 두고, 토큰이 없으면 라우트를 실행하지 않고 바로 429를 돌려준다.
+
+- 클라이언트 구분: 등록된 API 키(RATE_LIMIT_API_KEYS)를 X-API-Key 헤더로 보내면 키별, 아니면 접속 IP
+  (헤더 값을 그대로 믿으면 요청마다 새 키를 보내 제한을 피하고, 가짜 키로 다른 클라이언트의 버킷을 밀어낼 수 있다)
+  (프록시 뒤라면 uvicorn --proxy-headers로 실제 IP가 들어오게 할 것)
+- 버킷: 초당 rate개씩 채워지고 burst개까지 쌓인다 (example/case1/client.py의 TokenBucket과 같은 방식)
+- 라우트별 제한: add_rate_limit(app, routes={(메서드, 경로): RateLimit})로 따로 지정, 나머지는 기본 제한
+- 429 응답에는 토큰이 다시 생길 때까지의 초를 Retry-After로 넣는다
+
+이 파일은 backend/week3/app/ratelimit.py와 fastapi-example/app/ratelimit.py에 똑같이 들어 있다.
+두 프로젝트는 따로 설치/배포되므로 복사본을 두고, 고칠 때는 둘을 같이 고친다.
+프로젝트마다 다른 설정(라우트별 제한)은 이 파일이 아니라 add_rate_limit를 부르는 쪽에 둔다.
+
+저장소 (RATE_LIMIT_STORE):
+- memory (기본): 프로세스 메모리. uvicorn --workers N이면 워커마다 따로 세므로 실제 허용량은 N배
+- redis: 모든 워커/서버가 같은 버킷을 공유 (RATE_LIMIT_REDIS_URL, redis 패키지 필요)
+
+설정 (환경 변수):
+    RATE_LIMIT_RPS=20 RATE_LIMIT_BURST=40 RATE_LIMIT_API_KEYS=key1,key2 uvicorn app.main:app
+    RATE_LIMIT_RPS가 없거나 0이면 미들웨어를 등록하지 않는다 (부하 테스트는 한 IP에서 오므로 기본은 끔)
+"""
+
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from fastapi import FastAPI
+from starlette.responses import JSONResponse
+
+
+class RateLimit(NamedTuple):
+    """초당 rate개 허용, 순간적으로는 burst개까지"""
+
+    rate: float
+    burst: int
+
+
+# 제한하지 않는 경로 (헬스체크, 문서)
+EXEMPT_PATHS = frozenset({"/", "/health", "/docs", "/redoc", "/openapi.json"})
+
+API_KEY_HEADER = b"x-api-key"
+
+
+# ===========================================
+# 버킷 저장소
+# ===========================================
+
+
+class MemoryBucketStore:
+    """
+    프로세스 메모리 버킷 저장소
+
+    버킷은 (토큰 수, 마지막 갱신 시각) 튜플 하나. OrderedDict를 마지막 사용 순서로 유지해서
+    - idle_ttl초 동안 안 쓰인 버킷은 앞에서부터 지운다 (그동안 어차피 가득 찼을 버킷이라 지워도 같음)
+    - max_keys를 넘으면 가장 오래 안 쓰인 버킷부터 지운다
+    → 키가 몇 개가 들어오든 메모리는 max_keys개 이하 (10만 개 ≈ 수십 MB)
+
+    이벤트 루프 한 스레드에서만 호출되므로 락이 필요 없다.
+    """
+
+    def __init__(self, max_keys: int = 100_000, idle_ttl: float = 60.0) -> None:
+        self.max_keys = max_keys
+        self.idle_ttl = idle_ttl
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def take(self, key: str, limit: RateLimit, now: float | None = None) -> float:
+        """
+        토큰 하나 사용
+
+        Returns:
+            0이면 허용, 아니면 토큰이 생길 때까지 기다려야 하는 초
+        """
+        if now is None:
+            now = time.monotonic()
+        buckets = self._buckets
+
+        state = buckets.pop(key, None)
+        if state is None:
+            tokens = float(limit.burst)
+        else:
+            tokens, updated = state
+            tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / limit.rate
+        buckets[key] = (tokens, now)  # 맨 뒤 = 가장 최근에 사용
+
+        self._evict(now)
+        return wait
+
+    def _evict(self, now: float) -> None:
+        buckets = self._buckets
+        expire_before = now - self.idle_ttl
+        while buckets:
+            oldest_key, (_, updated) = next(iter(buckets.items()))
+            if updated >= expire_before and len(buckets) <= self.max_keys:
+                break
+            del buckets[oldest_key]
+
+
+# 토큰 계산을 Redis 안에서 한 번에 (여러 워커가 동시에 읽고 써도 원자적)
+# 안 쓰인 버킷은 PEXPIRE로 Redis가 알아서 지운다
+_REDIS_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local ttl_ms = tonumber(ARGV[4])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1])
+if tokens == nil then
+    tokens = burst
+else
+    tokens = math.min(burst, tokens + (now - tonumber(state[2])) * rate)
+end
+
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], ttl_ms)
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """
+    Redis 버킷 저장소 - 워커/서버 여러 대가 같은 제한을 공유
+
+    시각은 각 워커의 time.time()을 쓴다 (같은 서버 또는 NTP로 맞춘 서버끼리 전제).
+    """
+
+    def __init__(self, url: str, idle_ttl: float = 60.0, prefix: str = "ratelimit:") -> None:
+        try:
+            from redis.asyncio import Redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_STORE=redis에는 redis 패키지가 필요합니다 (uv add redis)") from e
+
+        self.prefix = prefix
+        self.idle_ttl = idle_ttl
+        self._redis = Redis.from_url(url)
+        self._take = self._redis.register_script(_REDIS_TAKE_SCRIPT)
+
+    async def take(self, key: str, limit: RateLimit, now: float | None = None) -> float:
+        if now is None:
+            now = time.time()
+        wait = await self._take(
+            keys=[self.prefix + key],
+            args=[limit.rate, limit.burst, now, int(self.idle_ttl * 1000)],
+        )
+        return float(wait)
+
+
+# ===========================================
+# 미들웨어
+# ===========================================
+
+
+class RateLimitMiddleware:
+    """
+    ASGI 미들웨어 (BaseHTTPMiddleware보다 요청당 오버헤드가 작고 스트리밍 Body를 건드리지 않음)
+
+    app.add_middleware(RateLimitMiddleware, store=MemoryBucketStore(), default=RateLimit(20, 40))
+    """
+
+    def __init__(
+        self,
+        app,
+        store,
+        default: RateLimit,
+        routes: dict[tuple[str, str], RateLimit] | None = None,
+        api_keys: frozenset[str] = frozenset(),
+        exempt_paths: frozenset[str] = EXEMPT_PATHS,
+    ) -> None:
+        self.app = app
+        self.store = store
+        self.default = default
+        self.routes = routes or {}
+        self.api_keys = api_keys
+        self.exempt_paths = exempt_paths
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        route = (scope["method"], scope["path"])
+        limit = self.routes.get(route)
+        if limit is None:
+            limit = self.default
+            bucket = "*"
+        else:
+            bucket = f"{route[0]} {route[1]}"
+
+        wait = await self.store.take(f"{client_key(scope, self.api_keys)}|{bucket}", limit)
+        if wait > 0:
+            response = JSONResponse(
+                {"detail": "요청이 너무 많습니다. 잠시 후 다시 시도하세요"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+def client_key(scope, api_keys: frozenset[str] = frozenset()) -> str:
+    """X-API-Key 헤더가 등록된 키면 그 키, 아니면(헤더 없음/모르는 키) 접속 IP"""
+    for name, value in scope["headers"]:
+        if name == API_KEY_HEADER:
+            key = value.decode("latin-1")
+            if key in api_keys:
+                return "key:" + key
+            break
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+def add_rate_limit(app: FastAPI, routes: dict[tuple[str, str], RateLimit] | None = None) -> None:
+    """
+    환경 변수에 제한이 설정되어 있으면 app에 미들웨어 등록
+
+    Args:
+        routes: 라우트별 제한 {(메서드, 경로): RateLimit} (기본 제한 대신 적용, 버킷도 따로)
+    """
+    rps = float(os.getenv("RATE_LIMIT_RPS", "0"))
+    if rps <= 0:
+        return
+
+    burst = int(os.getenv("RATE_LIMIT_BURST", str(max(1, math.ceil(rps * 2)))))
+    idle_ttl = float(os.getenv("RATE_LIMIT_IDLE_TTL", "60"))
+    store_name = os.getenv("RATE_LIMIT_STORE", "memory")
+
+    if store_name == "memory":
+        store = MemoryBucketStore(
+            max_keys=int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000")), idle_ttl=idle_ttl
+        )
+    elif store_name == "redis":
+        store = RedisBucketStore(
+            os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0"), idle_ttl=idle_ttl
+        )
+    else:
+        raise RuntimeError(f"지원하지 않는 RATE_LIMIT_STORE: {store_name} (memory 또는 redis)")
+
+    api_keys = frozenset(key.strip() for key in os.getenv("RATE_LIMIT_API_KEYS", "").split(",") if key.strip())
+    app.add_middleware(
+        RateLimitMiddleware,
+        store=store,
+        default=RateLimit(rate=rps, burst=burst),
+        routes=routes,
+        api_keys=api_keys,
+    )
@@ -5,11 +5,24 @@ pytest 설정 및 픽스처 정의
 - 테스트에서 반복적으로 사용하는 설정이나 데이터를 미리 준비해두는 것
 - @pytest.fixture 데코레이터로 정의
 - 테스트 함수의 파라미터로 주입받아 사용
+
+DB 격리 방식:
+- 테이블은 워커(프로세스)마다 한 번만 생성 (scope="session")
+- 테스트마다 연결 단위 트랜잭션을 열고 끝나면 롤백 → 테스트마다 CREATE/DROP TABLE 없음
+- 워커마다 자기 DB를 쓰므로 병렬 실행 가능: pytest -n auto (pytest-xdist)
+- 기본은 인메모리 SQLite, --test-db=file 이면 워커별 임시 파일
 """
 import os
+
+# 앱의 lifespan(init_db)이 DATABASE_URL로 테이블을 만든다.
+# 테스트는 get_db를 교체하므로 앱 엔진은 쓰지 않음 → PostgreSQL 없이도 돌도록 인메모리로
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ.pop("RATE_LIMIT_RPS", None)
+
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 
 from app.database import Base, get_db
@@ -19,38 +32,76 @@ from app.models import TodoDB
 
 # 테스트용 데이터베이스 URL (SQLite 사용)
 # 실제 PostgreSQL을 사용하지 않고 메모리 DB로 빠르게 테스트
-TEST_DATABASE_URL = "sqlite:///./test.db"
+TEST_DATABASE_URL = "sqlite:///:memory:"
 
 
-@pytest.fixture(scope="function")
-def test_db():
-    """
-    테스트용 데이터베이스 세션 픽스처
+def pytest_addoption(parser):
+    """pytest 명령행 옵션 추가: --test-db=memory|file"""
+    parser.addoption(
+        "--test-db",
+        choices=("memory", "file"),
+        default="memory",
+        help="테스트 DB: memory(인메모리 + StaticPool, 기본) 또는 file(워커별 임시 파일)",
+    )
+
 
-    scope="function": 각 테스트 함수마다 새로운 DB 생성
-    - 테스트 간 격리 보장
-    - 각 테스트는 독립적으로 실행
+@pytest.fixture(scope="session")
+def test_engine(request, tmp_path_factory):
     """
-    # 테스트용 엔진 생성
-    engine = create_engine(
-        TEST_DATABASE_URL,
-        connect_args={"check_same_thread": False}  # SQLite용 설정
-    )
+    테스트용 엔진 픽스처 (워커마다 하나)
 
-    # 테이블 생성
+    scope="session": 테스트 전체에서 한 번만 생성 → 테이블도 한 번만 생성
+    - memory: 인메모리 DB는 연결마다 따로 생기므로 StaticPool로 연결 하나를 공유
+    - file: tmp_path_factory 아래 파일 (xdist 워커마다 다른 디렉터리 → 충돌 없음)
+    """
+    if request.config.getoption("--test-db") == "file":
+        url = f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+    else:
+        engine = create_engine(
+            TEST_DATABASE_URL,
+            connect_args={"check_same_thread": False},  # SQLite용 설정
+            poolclass=StaticPool,
+        )
+
+    # pysqlite 드라이버는 BEGIN을 알아서 보내서 SAVEPOINT가 제대로 동작하지 않는다
+    # → 드라이버의 자동 BEGIN을 끄고 SQLAlchemy가 트랜잭션을 시작할 때 직접 BEGIN
+    @event.listens_for(engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def do_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    # 테이블 생성 (한 번만)
     Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def test_db(test_engine):
+    """
+    테스트용 데이터베이스 세션 픽스처
 
-    # 세션 팩토리 생성
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    scope="function": 각 테스트 함수마다 깨끗한 DB 상태
+    - 연결을 열고 바깥 트랜잭션 시작
+    - 세션은 그 안의 SAVEPOINT에서 동작 (테스트/API의 commit()은 SAVEPOINT까지만 반영)
+    - 테스트가 끝나면 바깥 트랜잭션을 롤백 → 테스트가 만든 데이터가 모두 사라짐
+    """
+    connection = test_engine.connect()
+    transaction = connection.begin()
 
     # 세션 생성
-    db = TestingSessionLocal()
+    db = Session(bind=connection, autoflush=False, join_transaction_mode="create_savepoint")
 
     try:
         yield db  # 테스트에 세션 제공
     finally:
         db.close()  # 테스트 후 세션 종료
-        Base.metadata.drop_all(bind=engine)  # 테이블 삭제 (정리)
+        transaction.rollback()  # 테스트 데이터 되돌리기 (정리)
+        connection.close()
 
 
 @pytest.fixture(scope="function")
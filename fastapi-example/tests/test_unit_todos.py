@@ -299,3 +299,54 @@ class TestParametrizedTests:
         TODO: description 필드 검증 파라미터화 테스트
         """
         pass
+
+
+class TestRateLimit:
+    """요청 제한 미들웨어 (app/ratelimit.py) 테스트"""
+
+    def test_post_todos_limited_per_client(self, client):
+        """
+        TODO 생성은 ROUTE_LIMITS의 별도 버킷으로 세고, 클라이언트(X-API-Key)마다 따로 센다
+
+        테스트 클라이언트의 앱에 미들웨어를 직접 추가해서 확인
+        """
+        from app.ratelimit import MemoryBucketStore, RateLimit, RateLimitMiddleware
+
+        # Arrange
+        app = client.app
+        app.user_middleware.clear()
+        app.middleware_stack = None  # 다음 요청에서 미들웨어 스택을 다시 만들도록
+        app.add_middleware(
+            RateLimitMiddleware,
+            store=MemoryBucketStore(),
+            default=RateLimit(rate=100, burst=100),
+            routes={("POST", "/todos/"): RateLimit(rate=0.5, burst=2)},
+            api_keys=frozenset({"a", "b"}),
+        )
+        todo = {"title": "제한 테스트", "completed": False}
+
+        try:
+            # Act
+            codes = [client.post("/todos/", json=todo, headers={"X-API-Key": "a"}).status_code for _ in range(3)]
+            limited = client.post("/todos/", json=todo, headers={"X-API-Key": "a"})
+            other = client.post("/todos/", json=todo, headers={"X-API-Key": "b"})
+            listing = client.get("/todos/", headers={"X-API-Key": "a"})
+
+            # Assert
+            assert codes == [201, 201, 429]
+            assert limited.headers["Retry-After"] == "2"
+            assert other.status_code == 201
+            assert listing.status_code == 200  # 조회는 기본 버킷
+        finally:
+            app.user_middleware.clear()
+            app.middleware_stack = None
+
+    def test_unregistered_api_key_falls_back_to_ip(self):
+        """등록되지 않은 X-API-Key는 무시하고 접속 IP로 구분"""
+        from app.ratelimit import client_key
+
+        scope = {"headers": [(b"x-api-key", b"made-up")], "client": ("10.0.0.1", 5000)}
+
+        assert client_key(scope, frozenset({"real"})) == "ip:10.0.0.1"
+        assert client_key({**scope, "headers": [(b"x-api-key", b"real")]}, frozenset({"real"})) == "key:real"
+        assert client_key({"headers": [], "client": None}) == "ip:unknown"